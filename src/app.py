@@ -16,14 +16,27 @@
 import logging
 import os
 import json
+import random
+import time
 import boto3
 from aws_lambda_powertools import Metrics
 from aws_lambda_powertools.metrics import MetricUnit
+from aws_lambda_powertools.utilities import parameters
 from log.processing import log_processing_rules
 from log.processing import processing
+from log.processing import triage
+from log.processing.log_processing_rule import parse_date_from_string
 from log.forwarding import log_forwarding_rules
 from log.sinks import dynatrace
+from log.sinks import spool
 from utils import aws_appconfig_extension_helpers as aws_appconfig_helpers
+from utils import idempotency
+from utils import ingestion_lag
+from utils import memory
+from utils import profiling
+from utils import sqs_visibility
+from utils import tracing
+from utils.helpers import load_cloudwatch_logs_attribute_mappings
 from version import get_version
 
 
@@ -34,8 +47,14 @@ logger.setLevel(os.getenv("LOGGING_LEVEL", "INFO"))
 logging.getLogger('boto3').setLevel(logging.WARNING)
 logging.getLogger('botocore').setLevel(logging.WARNING)
 
-# Create a boto3 session to reuse
+# Open connections to Dynatrace and S3 and fetch the API keys during the init phase
+prewarm_connections = os.getenv("PREWARM_CONNECTIONS", "false") == "true"
+
+# Create a boto3 session to reuse. The S3 and SQS clients are created on first use (the S3 client
+# during init when pre-warming connections) and reused across invocations
 boto3_session = boto3.Session()
+s3_client = None
+sqs_client = None
 
 # initialize Metrics
 metrics = Metrics()
@@ -52,7 +71,63 @@ logger.info("Loaded log-processing-rules version %s from %s",
             current_log_forwarding_rules_version, os.environ.get('LOG_FORWARDER_CONFIGURATION_LOCATION'))
 
 # load sinks
-dynatrace_sinks = dynatrace.load_sinks()
+dynatrace_sinks = dynatrace.load_sinks(warm_up=prewarm_connections)
+
+
+def get_s3_client():
+    global s3_client
+
+    if s3_client is None:
+        s3_client = boto3_session.client('s3')
+
+    return s3_client
+
+
+def get_sqs_client():
+    global sqs_client
+
+    if sqs_client is None:
+        sqs_client = boto3_session.client('sqs')
+
+    return sqs_client
+
+
+def warm_up_s3_connection():
+    '''
+    Opens a connection to the S3 endpoint, using the first bucket with log forwarding rules defined
+    '''
+    bucket_names = [bucket for bucket in defined_log_forwarding_rules if bucket != 'default']
+    if bucket_names:
+        processing.warm_up_s3_client(get_s3_client(), bucket_names[0])
+
+
+if prewarm_connections:
+    warm_up_s3_connection()
+
+# Throttled batches are stored in the spool (if enabled) and replayed at the start of later invocations
+dynatrace.set_spool(dynatrace_sinks, spool.create_spool(get_s3_client))
+
+# Objects already forwarded are skipped when notified again (if enabled)
+idempotency_cache = idempotency.create_idempotency_cache(get_s3_client)
+
+
+def refresh_warm_state():
+    '''
+    Fetches the Dynatrace API keys again and, if PREWARM_CONNECTIONS is enabled, opens connections to
+    Dynatrace and S3 if they were closed
+    '''
+    for dynatrace_sink in dynatrace_sinks.values():
+        dynatrace_sink.warm_up(open_connection=prewarm_connections)
+
+    if prewarm_connections:
+        warm_up_s3_connection()
+
+
+def is_warm_up_event(event) -> bool:
+    '''
+    Warm-up events are sent by the scheduled warm-up rule with the input {"warm_up": true}
+    '''
+    return isinstance(event, dict) and event.get('warm_up') is True
 
 
 def generate_execution_timeout_batch_item_failures(index: int, batch_item_failures: dict, messages: list):
@@ -68,6 +143,54 @@ def generate_execution_timeout_batch_item_failures(index: int, batch_item_failur
     return batch_item_failures
 
 
+def flush_coalesced_batches(batch_item_failures: dict, processed_objects: list, received_time: float):
+    '''
+    Flushes the batches coalesced across log objects, adds the SQS messages with log entries in failed
+    batches to batch_item_failures and emits the ingestion lag metrics of the other processed objects
+    '''
+    failed_message_ids = dynatrace.flush_sinks(dynatrace_sinks)
+
+    batch_item_failure_ids = {item['itemIdentifier'] for item in batch_item_failures['batchItemFailures']}
+    for message_id in sorted(failed_message_ids - batch_item_failure_ids):
+        batch_item_failures['batchItemFailures'].append({'itemIdentifier': message_id})
+
+    for s3_notification, message, sinks, bucket_name, processing_rule_name in processed_objects:
+        if message['messageId'] not in failed_message_ids:
+            mark_object_completed(s3_notification)
+            ingestion_lag.emit_ingestion_lag_metrics(
+                s3_notification, message, received_time, sinks, bucket_name, processing_rule_name,
+                message_id=message['messageId'])
+
+    return batch_item_failures
+
+
+def is_duplicate_object(s3_notification: dict, batch_idempotency_keys: set) -> bool:
+    '''
+    Returns True if the object of the notification was already forwarded or is notified by a previous
+    message of the batch, adding it to batch_idempotency_keys otherwise
+    '''
+    idempotency_key = idempotency.get_idempotency_key(s3_notification)
+    if idempotency_cache is None or idempotency_key is None:
+        return False
+
+    if idempotency_key in batch_idempotency_keys:
+        logger.info('Skipping %s, already notified by a previous message of the batch', idempotency_key)
+        return True
+
+    if idempotency_cache.is_completed(idempotency_key):
+        logger.info('Skipping %s, already forwarded', idempotency_key)
+        return True
+
+    batch_idempotency_keys.add(idempotency_key)
+    return False
+
+
+def mark_object_completed(s3_notification: dict):
+    idempotency_key = idempotency.get_idempotency_key(s3_notification)
+    if idempotency_cache is not None and idempotency_key is not None:
+        idempotency_cache.mark_completed(idempotency_key)
+
+
 def reload_rules(rules_type: str):
 
     if os.environ['LOG_FORWARDER_CONFIGURATION_LOCATION'] == "aws-appconfig":
@@ -93,15 +216,81 @@ def reload_rules(rules_type: str):
     return False
 
 
+def before_snapshot():
+    '''
+    Runtime hook executed before a snapshot of the initialized execution environment is taken.
+    Compiles all log processing rules and warms up the caches otherwise built on the first invocation,
+    and drops the state that mustn't be part of the snapshot: open connections and the cached API keys.
+    '''
+    logger.info("Preparing execution environment for snapshot")
+
+    log_processing_rules.compile_rules(defined_log_processing_rules)
+    load_cloudwatch_logs_attribute_mappings()
+    parse_date_from_string("2022-01-01T00:00:00Z")
+
+    for dynatrace_sink in dynatrace_sinks.values():
+        dynatrace_sink.session.close()
+
+    parameters.clear_caches()
+    metrics.clear_metrics()
+
+
+def after_restore():
+    '''
+    Runtime hook executed after the execution environment is restored from a snapshot. Reseeds the
+    random number generator (all restored environments share the same state), creates new AWS and
+    Dynatrace sessions and fetches the Dynatrace API keys.
+    '''
+    global boto3_session, s3_client, sqs_client
+
+    logger.info("Restoring execution environment from snapshot")
+
+    random.seed()
+
+    boto3_session = boto3.Session()
+    s3_client = None
+    sqs_client = None
+
+    for dynatrace_sink in dynatrace_sinks.values():
+        dynatrace_sink.reset_session()
+
+    refresh_warm_state()
+
+
+# Register the snapshot hooks on runtimes supporting snapshot and restore (e.g. AWS Lambda SnapStart)
+try:
+    from snapshot_restore_py import register_before_snapshot, register_after_restore
+except ImportError:
+    logger.debug("snapshot_restore_py not available, snapshot runtime hooks not registered")
+else:
+    register_before_snapshot(before_snapshot)
+    register_after_restore(after_restore)
+
+
 @metrics.log_metrics
+@profiling.profile_invocation(get_s3_client)
+@sqs_visibility.heartbeat_invocation(get_sqs_client)
 def lambda_handler(event, context):
 
     logging.info("dynatrace-aws-s3-log-forwarder version: %s", get_version())
 
+    # Scheduled warm-up: refresh API keys and connections and return
+    if is_warm_up_event(event):
+        logger.debug("Received warm-up event")
+        refresh_warm_state()
+        metrics.add_metric(name='WarmUpInvocations', unit=MetricUnit.Count, value=1)
+        return {'batchItemFailures': []}
+
+    # The messages of the batch are received when the function is invoked, before reloading the rules
+    # and replaying spooled batches
+    messages_received_time = time.time()
+
     # If we're using AWS AppConfig and there's a new config version available, reload
     reload_rules('forwarding')
     reload_rules('processing')
 
+    dynatrace.replay_spooled_batches(dynatrace_sinks, context)
+
     logger.debug(json.dumps(event, indent=2))
 
     os.environ['FORWARDER_FUNCTION_ARN'] = context.invoked_function_arn
@@ -118,12 +307,30 @@ def lambda_handler(event, context):
         logger.error(json.dumps(event, indent=2))
         event_records = []
 
-    for index, message in enumerate(event_records):
+    # Large objects are processed last, so they can't make the small objects behind them run out of time
+    event_records, num_large_objects = triage.defer_large_objects(event_records)
+    if num_large_objects:
+        metrics.add_metric(name='LargeObjectsDeferred', unit=MetricUnit.Count, value=num_large_objects)
 
-        # Empty the sinks in case some content was left due to errors and initialize
-        # num_batch to 1.
+    # When coalescing, log entries of several objects are buffered in the same batches, and the sinks
+    # are only flushed when full and at the end of the invocation
+    coalesce_batches = dynatrace.DYNATRACE_COALESCE_BATCHES
+    coalesced_objects = []
+    if coalesce_batches:
         dynatrace.empty_sinks(dynatrace_sinks)
 
+    # Duplicate notifications of the same object in the batch are only processed once
+    batch_idempotency_keys = set()
+
+    for index, message in enumerate(event_records):
+
+        if coalesce_batches:
+            dynatrace.start_message(dynatrace_sinks, message['messageId'])
+        else:
+            # Empty the sinks in case some content was left due to errors and initialize
+            # num_batch to 1.
+            dynatrace.empty_sinks(dynatrace_sinks)
+
         try:
             s3_notification = json.loads(message['body'])
         except json.decoder.JSONDecodeError as exception:
@@ -138,6 +345,22 @@ def lambda_handler(event, context):
             'Processing object s3://%s/%s; posted by %s',
             bucket_name, key_name, s3_notification['detail']['requester'])
 
+        if is_duplicate_object(s3_notification, batch_idempotency_keys):
+            metrics.add_metric(name='DuplicateObjectsSkipped', unit=MetricUnit.Count, value=1)
+            continue
+
+        if triage.is_empty_object(s3_notification):
+            logger.info('Dropping object. s3://%s/%s is empty', bucket_name, key_name)
+            metrics.add_metric(name='DroppedObjectsEmpty', unit=MetricUnit.Count, value=1)
+            continue
+
+        record_span = tracing.start_span('SQSRecord', {
+            'messaging.message_id': message.get('messageId'),
+            'messaging.aws_trace_header': message.get('attributes', {}).get('AWSTraceHeader'),
+            'aws.s3.bucket': bucket_name,
+            'aws.s3.key': key_name
+        })
+
         # Catch all exception. If anything fails, add messageId to batchItemFailures
         try:
             matched_log_forwarding_rule = log_forwarding_rules.get_matching_log_forwarding_rule(
@@ -166,6 +389,12 @@ def lambda_handler(event, context):
                 key_name)
 
             if matched_log_processing_rule is not None:
+                if triage.is_expired_object(matched_log_processing_rule, key_name):
+                    logger.info('Dropping object. s3://%s/%s is older than the maximum age of log records accepted by Dynatrace',
+                                bucket_name, key_name)
+                    metrics.add_metric(name='DroppedObjectsExpired', unit=MetricUnit.Count, value=1)
+                    continue
+
                 log_object_destination_sinks = []
 
                 for sink_id in matched_log_forwarding_rule.sinks:
@@ -183,44 +412,81 @@ def lambda_handler(event, context):
                                        unit=MetricUnit.Count, value=1)
                     continue
 
-                processing.process_log_object(
-                    matched_log_processing_rule, bucket_name, key_name, s3_notification['region'],
-                    log_object_destination_sinks, context,
-                    user_defined_annotations=user_defined_log_annotations,
-                    session=boto3_session
-                )
+                # Fail fast without downloading the object while a sink is unreachable, SQS retries it later
+                unavailable_sink_ids = [sink.get_sink_id() for sink in log_object_destination_sinks
+                                        if not sink.is_available()]
+                if unavailable_sink_ids:
+                    logger.warning('Failing object s3://%s/%s, the circuit breaker of sinks %s is open',
+                                   bucket_name, key_name, ', '.join(unavailable_sink_ids))
+                    metrics.add_metric(name='LogFilesFailedSinkUnavailable', unit=MetricUnit.Count, value=1)
+                    batch_item_failures['batchItemFailures'].append(
+                        {'itemIdentifier': message['messageId']})
+                    continue
 
-                # Iterate through all sinks and flush
-                for dynatrace_sink in log_object_destination_sinks:
-                    dynatrace_sink.flush()
+                processing_rule_name = f'{matched_log_processing_rule.source}.{matched_log_processing_rule.name}'
+                record_span.set_attribute('log.processing_rule', processing_rule_name)
+
+                with profiling.profile_object(bucket_name, key_name, message, get_s3_client()), \
+                        memory.account_object(bucket_name, key_name, log_object_destination_sinks, processing_rule_name):
+                    processing.process_log_object(
+                        matched_log_processing_rule, bucket_name, key_name, s3_notification['region'],
+                        log_object_destination_sinks, context,
+                        user_defined_annotations=user_defined_log_annotations,
+                        session=boto3_session,
+                        s3_client=get_s3_client()
+                    )
+
+                    # Flush all sinks concurrently
+                    if not coalesce_batches:
+                        dynatrace.flush_sinks_concurrently(log_object_destination_sinks)
+                    for dynatrace_sink in log_object_destination_sinks:
+                        dynatrace_sink.emit_stage_timing_metrics(processing_rule_name)
 
                 metrics.add_metric(name='LogFilesProcessed',
                                    unit=MetricUnit.Count, value=1)
 
+                if coalesce_batches:
+                    # The batches with the last log entries of the object are acknowledged later
+                    coalesced_objects.append((s3_notification, message, log_object_destination_sinks,
+                                              bucket_name, processing_rule_name))
+                else:
+                    mark_object_completed(s3_notification)
+                    ingestion_lag.emit_ingestion_lag_metrics(
+                        s3_notification, message, messages_received_time, log_object_destination_sinks,
+                        bucket_name, processing_rule_name)
+
             else:
                 logger.warning('Could not find a matching log processing rule for source %s and key %s. Skipping...',
                                matched_log_forwarding_rule.source, key_name)
                 metrics.add_metric(name="LogFilesSkipped",
                                    unit=MetricUnit.Count, value=1)
 
-        except UnicodeDecodeError:
+        except UnicodeDecodeError as exception:
+            record_span.record_exception(exception)
+            dynatrace.discard_message(dynatrace_sinks, message['messageId'])
             logger.exception(
                 'Error decoding log object. Log contains non-UTF-8 characters. Dropping object s3://%s/%s', bucket_name, key_name
             )
             metrics.add_metric(
                 name='DroppedObjectsDecodingErrors', unit=MetricUnit.Count, value=1)
 
-        except processing.NotEnoughExecutionTimeRemaining:
+        except processing.NotEnoughExecutionTimeRemaining as exception:
+            record_span.record_exception(exception)
+            dynatrace.discard_message(dynatrace_sinks, message['messageId'])
             logger.exception(
                 'Unable to process log file s3://%s/%s with remaining Lambda execution time. %s total non-processed log files in batch',
-                bucket_name, key_name, (len(event['Records']) - index)
+                bucket_name, key_name, (len(event_records) - index)
             )
 
             metrics.add_metric(
                 name='NotEnoughExecutionTimeRemainingErrors', unit=MetricUnit.Count, value=1)
 
             total_batch_item_failures = generate_execution_timeout_batch_item_failures(
-                index, batch_item_failures, event['Records'])
+                index, batch_item_failures, event_records)
+
+            if coalesce_batches:
+                total_batch_item_failures = flush_coalesced_batches(
+                    total_batch_item_failures, coalesced_objects, messages_received_time)
 
             metrics.add_metric(name='LogProcessingFailures', unit=MetricUnit.Count, value=len(
                 total_batch_item_failures['batchItemFailures']))
@@ -229,13 +495,22 @@ def lambda_handler(event, context):
 
             return total_batch_item_failures
 
-        except Exception:
+        except Exception as exception:
+            record_span.record_exception(exception)
+            dynatrace.discard_message(dynatrace_sinks, message['messageId'])
             logger.exception(
                 'Error processing message %s', message['messageId'])
 
             batch_item_failures['batchItemFailures'].append(
                 {'itemIdentifier': message['messageId']})
 
+        finally:
+            record_span.end()
+
+    if coalesce_batches:
+        batch_item_failures = flush_coalesced_batches(
+            batch_item_failures, coalesced_objects, messages_received_time)
+
     logger.debug(json.dumps(batch_item_failures, indent=2))
 
     metrics.add_metric(name='LogProcessingFailures', unit=MetricUnit.Count, value=len(
@@ -22,7 +22,7 @@ from . import LogForwardingRule
 from utils.helpers import is_yaml_file
 from utils import aws_appconfig_extension_helpers as aws_appconfig_helpers
 from log.processing.log_processing_rules import AVAILABLE_LOG_SOURCES
-from utils.helpers import ENCODING
+from utils.helpers import ENCODING, YamlSafeLoader
 
 
 # Old log forwarding rules format to be deprecated
@@ -55,7 +55,7 @@ def load_forwarding_rules_yaml(body: str) -> dict:
     log_forwarding_rules = {}
 
     try:
-        yaml_iterator = yaml.load_all(body,Loader=yaml.SafeLoader)
+        yaml_iterator = yaml.load_all(body,Loader=YamlSafeLoader)
         for i, forwarding_rule_dict in enumerate(yaml_iterator):
             try:
                 if isinstance(forwarding_rule_dict,dict):
@@ -152,7 +152,7 @@ def load_forwarding_rules_from_local_folder():
         try:
             with open(rule_config_file_path, encoding=ENCODING) as rule_file:
                 rules_list = yaml.load(
-                    rule_file, Loader=yaml.loader.SafeLoader)
+                    rule_file, Loader=YamlSafeLoader)
 
                 # if not a dict
                 if not isinstance(rules_list, list):
@@ -0,0 +1,143 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import functools
+import os
+import regex
+from pygrok import Grok
+from pygrok import pygrok
+from utils.helpers import custom_grok_expressions
+
+
+def load_pattern_files(patterns_dirs: list) -> dict:
+    '''
+    Reads the Grok pattern files in the given directories (one "NAME regex" definition per line, #
+    for comments), as pygrok does
+    '''
+    patterns = {}
+    for patterns_dir in patterns_dirs:
+        for file_name in sorted(os.listdir(patterns_dir)):
+            with open(os.path.join(patterns_dir, file_name), 'r', encoding='utf-8') as patterns_file:
+                for line in patterns_file:
+                    line = line.strip()
+                    if line == '' or line.startswith('#'):
+                        continue
+                    pattern_name, _, regex_str = line.partition(' ')
+                    patterns[pattern_name] = pygrok.Pattern(pattern_name, regex_str.strip())
+    return patterns
+
+
+@functools.lru_cache(maxsize=None)
+def get_pattern_library() -> dict:
+    '''
+    Returns the pygrok base patterns plus our custom Grok expressions. pygrok reads all its
+    pattern files on every Grok() instantiation, here they're read once per process and shared.
+    '''
+    patterns = load_pattern_files(pygrok.DEFAULT_PATTERNS_DIRS)
+
+    for pattern_name, regex_str in custom_grok_expressions.items():
+        patterns[pattern_name] = pygrok.Pattern(pattern_name, regex_str)
+
+    return patterns
+
+
+def get_undefined_patterns(pattern: str) -> set:
+    '''
+    Returns the names of the Grok patterns referenced by a Grok expression, directly or through other
+    patterns, that aren't in the shared pattern library. Cheaper than building the Grok object, so
+    rules can be validated when loaded and compiled on first use.
+    '''
+    patterns = get_pattern_library()
+    undefined_patterns = set()
+    referenced_patterns = set()
+    pending_expressions = [pattern]
+
+    while pending_expressions:
+        for pattern_name in regex.findall(r'%{(\w+)(?::\w+){0,2}}', pending_expressions.pop()):
+            if pattern_name in referenced_patterns:
+                continue
+            referenced_patterns.add(pattern_name)
+            if pattern_name in patterns:
+                pending_expressions.append(patterns[pattern_name].regex_str)
+            else:
+                undefined_patterns.add(pattern_name)
+
+    return undefined_patterns
+
+
+class SharedLibraryGrok(Grok):
+    '''
+    pygrok Grok object built from the shared pattern library instead of reloading the pattern files.
+    Pattern expansion is the same as pygrok's Grok.__init__ (pygrok is pinned in requirements.txt and
+    test_grok checks both produce the same regex), match() also accepts a timeout.
+    '''
+
+    def __init__(self, pattern: str, predefined_patterns: dict):
+        self.pattern = pattern
+        self.custom_patterns_dir = None
+        self.predefined_patterns = predefined_patterns
+        self.type_mapper = {}
+
+        py_regex_pattern = pattern
+        while True:
+            # Find all types specified in the groks
+            for n in regex.findall(r'%{(\w+):(\w+):(\w+)}', py_regex_pattern):
+                self.type_mapper[n[1]] = n[2]
+
+            # replace %{pattern_name:custom_name} (or %{pattern_name:custom_name:type})
+            # with regex and regex group name
+            py_regex_pattern = regex.sub(
+                r'%{(\w+):(\w+)(?::\w+)?}',
+                lambda m: "(?P<" + m.group(2) + ">" + self.predefined_patterns[m.group(1)].regex_str + ")",
+                py_regex_pattern)
+
+            # replace %{pattern_name} with regex
+            py_regex_pattern = regex.sub(
+                r'%{(\w+)}',
+                lambda m: "(" + self.predefined_patterns[m.group(1)].regex_str + ")",
+                py_regex_pattern)
+
+            if regex.search(r'%{\w+(:\w+)?}', py_regex_pattern) is None:
+                break
+
+        self.regex_obj = regex.compile(py_regex_pattern)
+
+    def match(self, text, timeout: float = None):
+        '''
+        Same as pygrok's Grok.match(). If a timeout (in seconds) is given and matching takes longer
+        (e.g. catastrophic backtracking on a long line), raises TimeoutError.
+        '''
+        match_obj = self.regex_obj.search(text, timeout=timeout)
+
+        if match_obj is None:
+            return None
+        matches = match_obj.groupdict()
+        for key, match in matches.items():
+            try:
+                if self.type_mapper[key] == 'int':
+                    matches[key] = int(match)
+                if self.type_mapper[key] == 'float':
+                    matches[key] = float(match)
+            except (TypeError, KeyError):
+                pass
+        return matches
+
+
+@functools.lru_cache(maxsize=None)
+def compile_grok(pattern: str) -> Grok:
+    '''
+    Compiles a Grok expression using the shared pattern library. Rules with the same expression
+    share the compiled object.
+    '''
+    return SharedLibraryGrok(pattern, get_pattern_library())
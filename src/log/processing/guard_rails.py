@@ -0,0 +1,196 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+'''
+Guard rails against pathological log objects (huge lines or records, gzip bombs, log lines causing
+catastrophic backtracking on Grok expressions, deeply nested JSON). Log lines and records hitting a
+guard rail are ingested raw or truncated instead of stalling the processing of the whole batch. When
+the rest of the object can't be read (huge JSON records, gzip bombs), its processing stops and the
+object is acknowledged with the records read so far, as retrying it would fail again after ingesting
+them once more. A value of 0 disables each guard rail:
+  - LOG_PROCESSING_MAX_EXTRACTION_LINE_LENGTH: text log lines longer than this (in characters) are
+    ingested without attribute extraction.
+  - LOG_PROCESSING_MAX_RECORD_SIZE: text log lines longer than this (in bytes) are truncated. The
+    processing of JSON log objects stops on records larger than this.
+  - LOG_PROCESSING_MAX_DECOMPRESSION_RATIO: the processing of gzip objects stops if the ratio of
+    decompressed to compressed bytes exceeds this (after DECOMPRESSION_RATIO_MIN_SIZE bytes).
+  - LOG_PROCESSING_EXTRACTION_TIME_BUDGET_MS: Grok expressions taking longer than this to match a
+    log line are aborted and the line is ingested without attribute extraction.
+'''
+
+import io
+import os
+
+
+def _get_int_from_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name))
+    except (ValueError, TypeError):
+        return default
+
+
+MAX_EXTRACTION_LINE_LENGTH = _get_int_from_env('LOG_PROCESSING_MAX_EXTRACTION_LINE_LENGTH', 32768)
+MAX_RECORD_SIZE = _get_int_from_env('LOG_PROCESSING_MAX_RECORD_SIZE', 16 * 1024 * 1024)
+MAX_DECOMPRESSION_RATIO = _get_int_from_env('LOG_PROCESSING_MAX_DECOMPRESSION_RATIO', 200)
+EXTRACTION_TIME_BUDGET_MS = _get_int_from_env('LOG_PROCESSING_EXTRACTION_TIME_BUDGET_MS', 250)
+
+# The decompression ratio isn't checked until this many bytes have been decompressed, so small
+# and highly compressible objects are processed normally
+DECOMPRESSION_RATIO_MIN_SIZE = 16 * 1024 * 1024
+
+# JSON records nested deeper than this are truncated, as serializing them would exceed the
+# recursion limit
+MAX_RECORD_NESTING_DEPTH = 100
+TRUNCATED_VALUE = '[truncated]'
+
+
+class RecordTooLarge(Exception):
+    '''
+    Exception for JSON log records larger than MAX_RECORD_SIZE
+    '''
+    pass
+
+
+class DecompressionRatioExceeded(Exception):
+    '''
+    Exception for gzip objects exceeding MAX_DECOMPRESSION_RATIO
+    '''
+    pass
+
+
+def get_extraction_timeout():
+    '''
+    Returns the extraction time budget in seconds to pass to Grok, or None if disabled
+    '''
+    return EXTRACTION_TIME_BUDGET_MS / 1000 if EXTRACTION_TIME_BUDGET_MS > 0 else None
+
+
+def iter_lines(stream, max_line_size: int, keep_line_endings: bool = True, on_truncated=None):
+    '''
+    Yields the lines of a binary stream (e.g. an io.BufferedReader). Lines longer than max_line_size
+    bytes (if > 0) are truncated and the rest of the line is discarded (calling on_truncated if given),
+    so huge lines never need to fit in memory. If keep_line_endings is False, trailing \\n or \\r\\n
+    are removed.
+    '''
+    limit = max_line_size if max_line_size > 0 else -1
+
+    while True:
+        line = stream.readline(limit)
+        if not line:
+            return
+
+        if limit > 0 and len(line) == limit and not line.endswith(b'\n'):
+            # discard the rest of the line
+            while True:
+                rest = stream.readline(limit)
+                if not rest or rest.endswith(b'\n'):
+                    break
+            if on_truncated is not None:
+                on_truncated()
+
+        if not keep_line_endings:
+            if line.endswith(b'\r\n'):
+                line = line[:-2]
+            elif line.endswith(b'\n'):
+                line = line[:-1]
+
+        yield line
+
+
+def limit_nesting_depth(value, max_depth: int = MAX_RECORD_NESTING_DEPTH, depth: int = 0):
+    '''
+    Returns a copy of a JSON value with dicts and lists nested deeper than max_depth replaced with
+    TRUNCATED_VALUE
+    '''
+    if isinstance(value, dict):
+        if depth >= max_depth:
+            return TRUNCATED_VALUE
+        return {k: limit_nesting_depth(v, max_depth, depth + 1) for k, v in value.items()}
+    if isinstance(value, list):
+        if depth >= max_depth:
+            return TRUNCATED_VALUE
+        return [limit_nesting_depth(v, max_depth, depth + 1) for v in value]
+    return value
+
+
+class CountingReader(io.RawIOBase):
+    '''
+    Wraps a binary file-like object counting the bytes read from it
+    '''
+
+    def __init__(self, fileobj):
+        super().__init__()
+        self._fileobj = fileobj
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            data = self._fileobj.read()
+        else:
+            data = self._fileobj.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class DecompressionRatioGuard(CountingReader):
+    '''
+    Wraps a decompressed stream (e.g. a GzipFile) raising DecompressionRatioExceeded once more than
+    min_size bytes have been decompressed and the ratio to the bytes read from compressed_stream
+    (a CountingReader) exceeds max_ratio.
+    '''
+
+    def __init__(self, fileobj, compressed_stream: CountingReader, max_ratio: int = None,
+                 min_size: int = None):
+        super().__init__(fileobj)
+        self._compressed_stream = compressed_stream
+        self._max_ratio = MAX_DECOMPRESSION_RATIO if max_ratio is None else max_ratio
+        self._min_size = DECOMPRESSION_RATIO_MIN_SIZE if min_size is None else min_size
+
+    def read(self, size=-1):
+        data = super().read(size)
+        if (self._max_ratio > 0 and self.bytes_read > self._min_size and
+                self.bytes_read > self._max_ratio * max(self._compressed_stream.bytes_read, 1)):
+            raise DecompressionRatioExceeded(
+                f'{self.bytes_read} bytes decompressed from {self._compressed_stream.bytes_read} bytes')
+        return data
+
+
+class RecordSizeGuard(CountingReader):
+    '''
+    Wraps the stream a JSON parser reads from, raising RecordTooLarge if more than max_record_size
+    bytes are read without a record being completed (calls to mark()). As parsers read ahead in
+    chunks, the size is accurate to the parser's buffer size.
+    '''
+
+    def __init__(self, fileobj, max_record_size: int = None):
+        super().__init__(fileobj)
+        self._max_record_size = MAX_RECORD_SIZE if max_record_size is None else max_record_size
+        self._marked_bytes = 0
+
+    def mark(self):
+        self._marked_bytes = self.bytes_read
+
+    def read(self, size=-1):
+        data = super().read(size)
+        if 0 < self._max_record_size < self.bytes_read - self._marked_bytes:
+            raise RecordTooLarge(f'More than {self._max_record_size} bytes read without completing a record')
+        return data
@@ -13,20 +13,42 @@
 #  limitations under the License.
 
 from dataclasses import dataclass, field
-from typing import Optional, List
+from typing import Optional, List, TYPE_CHECKING
+import datetime
 import logging
 import re
-from pygrok import Grok
 import jmespath
-import dateutil.parser as dateparser
 from utils.helpers import helper_regexes, custom_grok_expressions, get_attributes_from_cloudwatch_logs_data
+from utils.timing import StageTimer, NULL_STAGE_TIMER
+
+if TYPE_CHECKING:
+    from pygrok import Grok
 
 logger = logging.getLogger(__name__)
 
+# dateutil.parser module, imported on first use
+_dateparser = None
+
+
+def get_dateparser():
+    '''
+    Returns the dateutil.parser module, importing it the first time it's called, so it's only loaded
+    when a rule extracts a timestamp_to_transform attribute.
+    '''
+    global _dateparser
+
+    if _dateparser is None:
+        import dateutil.parser
+        _dateparser = dateutil.parser
+    return _dateparser
+
+
 def parse_date_from_string(date_string: str):
     '''
-    Uses dateutil to parse a date from a given str
+    Uses dateutil to parse a date from a given str.
     '''
+    dateparser = get_dateparser()
+
     datetime = date_string
 
     try:
@@ -42,6 +64,22 @@ def parse_date_from_string(date_string: str):
     return datetime
 
 
+def get_key_date_regex(known_key_path_pattern: str) -> Optional[re.Pattern]:
+    '''
+    Compiles the known key path pattern of a rule capturing the first year, month and day in the
+    key_year, key_month and key_day groups, or returns None if the pattern doesn't contain a date
+    '''
+    for helper_regex_name, group_name in (('year_pattern', 'key_year'), ('month_pattern', 'key_month'),
+                                          ('day_pattern', 'key_day')):
+        placeholder = '{' + helper_regex_name + '}'
+        if placeholder not in known_key_path_pattern:
+            return None
+        known_key_path_pattern = known_key_path_pattern.replace(
+            placeholder, f'(?P<{group_name}>{placeholder})', 1)
+
+    return re.compile(known_key_path_pattern.format(**helper_regexes))
+
+
 @dataclass(frozen=True)
 class LogProcessingRule:
     name: str
@@ -63,9 +101,9 @@ class LogProcessingRule:
     attribute_extraction_from_top_level_json: Optional[dict] = None
     attribute_mapping_from_json_keys: Optional[dict] = None
     known_key_path_pattern_regex: re.Pattern = field(init=False)
-    attribute_extraction_from_key_name_regex: re.Pattern = field(init=False)
-    attribute_extraction_grok_object: Grok = field(init=False)
     skip_header_lines: Optional[int] = None
+    # Grok, JMESPath and key name expressions are compiled the first time the rule is used
+    _compiled: Optional['CompiledLogProcessingRule'] = field(init=False, default=None, repr=False, compare=False)
 
     def validate(self):
         '''
@@ -130,60 +168,115 @@ class LogProcessingRule:
         elif self.skip_header_lines and self.skip_header_lines != 0:
             raise ValueError("skip_header_lines is only valid for text log format")
 
+        # validate the patterns of the Grok expression exist, the Grok object is built on first use
+        if self.attribute_extraction_grok_expression is not None:
+            from log.processing.grok import get_undefined_patterns
+            undefined_patterns = get_undefined_patterns(self.attribute_extraction_grok_expression)
+            if undefined_patterns:
+                raise ValueError(
+                    f"Undefined Grok patterns in attribute_extraction_grok_expression: {', '.join(sorted(undefined_patterns))}")
+
     def __post_init__(self):
         self.validate()
-        # Compile Regular expression here using defined helper patterns
+        # Compile Regular expression here using defined helper patterns. It's needed to select the rule,
+        # everything else is compiled on first use with compile()
         object.__setattr__(self, "known_key_path_pattern_regex", re.compile(
             self.known_key_path_pattern.format(**helper_regexes)))
 
-        if self.attribute_extraction_from_key_name is not None:
-            # Compile regular expressions for attribute extraction from key using
-            # the defined helper patterns
-            compiled_regexes_dict = {}
-            for k, v in self.attribute_extraction_from_key_name.items():
-                compiled_regexes_dict[k] = re.compile(
-                    v.format(**helper_regexes))
-            object.__setattr__(
-                self, "attribute_extraction_from_key_name_regex", compiled_regexes_dict)
-        else:
-            object.__setattr__(
-                self, "attribute_extraction_from_key_name_regex", None)
+    def __getstate__(self):
+        # Compiled matchers aren't serialized, they're built on first use after unpickling
+        state = dict(self.__dict__)
+        state['_compiled'] = None
+        return state
 
-        # Load Grok object once. PyGrok reloads all patterns on __init__
-        if self.attribute_extraction_grok_expression is not None:
-            object.__setattr__(self, "attribute_extraction_grok_object", Grok(
-                self.attribute_extraction_grok_expression,custom_patterns=custom_grok_expressions))
-        else:
-            object.__setattr__(self, "attribute_extraction_grok_object", None)
+    def compile(self) -> 'CompiledLogProcessingRule':
+        '''
+        Compiles the attribute extraction expressions of the rule the first time it's called and
+        returns the cached CompiledLogProcessingRule afterwards.
+        '''
+        if self._compiled is not None:
+            return self._compiled
+
+        try:
+            compiled_rule = CompiledLogProcessingRule.from_rule(self)
+        except Exception as ex:
+            raise ValueError(f"Unable to compile log processing rule {self.source}.{self.name}") from ex
+
+        object.__setattr__(self, "_compiled", compiled_rule)
+
+        return compiled_rule
+
+    def is_compiled(self) -> bool:
+        return self._compiled is not None
+
+    @property
+    def attribute_extraction_from_key_name_regex(self) -> Optional[dict]:
+        return self.compile().attribute_extraction_from_key_name_regex
+
+    @property
+    def attribute_extraction_grok_object(self) -> Optional['Grok']:
+        return self.compile().attribute_extraction_grok_object
 
     def get_attributes_from_s3_key_name(self, key: str):
         '''
         Extract the required attributes from the S3 Key Name
         '''
         injected_attributes = {}
-        if self.attribute_extraction_from_key_name_regex is not None:
-            for dt_attribute, regex in self.attribute_extraction_from_key_name_regex.items():
+        key_name_regexes = self.compile().attribute_extraction_from_key_name_regex
+        if key_name_regexes is not None:
+            for dt_attribute, regex in key_name_regexes.items():
                 attrib = re.search(regex, key)
                 if attrib is not None:
                     injected_attributes.update({dt_attribute: attrib.group()})
         return injected_attributes
 
-    def get_extracted_log_attributes(self, message) -> dict:
+    def get_date_from_s3_key(self, key: str) -> Optional[datetime.date]:
+        '''
+        Returns the date in the S3 key name (as defined in known_key_path_pattern), or None if not found
+        '''
+        key_date_regex = self.compile().key_date_regex
+        if key_date_regex is None:
+            return None
+
+        match = key_date_regex.match(key)
+        if match is None or None in (match.group('key_year'), match.group('key_month'), match.group('key_day')):
+            return None
+
+        try:
+            return datetime.date(int(match.group('key_year')), int(match.group('key_month')),
+                                 int(match.group('key_day')))
+        except ValueError:
+            return None
+
+    def get_extracted_log_attributes(self, message, stage_timer: StageTimer = None, grok_timeout: float = None) -> dict:
         '''
         Receives the log message (dict or str) and extracts attributes.
         Text log: apply grok expression if it exists; then apply jmespath expression if it exists to calculate additional fields.
         JSON log: apply JMESPATH expressions to extract attributes.
         Tries to generate an ISO timestamp if the attribute timestamp_to_transform is present after extraction
         Cleans up attributes with Null values
+        If a stage_timer is given, accounts the time spent on Grok, JMESPath and timestamp parsing to it.
+        If a grok_timeout (seconds) is given and the Grok expression takes longer to match, raises AttributeExtractionTimeout.
         '''
 
+        if stage_timer is None:
+            stage_timer = NULL_STAGE_TIMER
+
+        compiled_rule = self.compile()
         attributes_dict = {}
         json_message = {}
 
-        if self.attribute_extraction_grok_object is not None:
+        if compiled_rule.attribute_extraction_grok_object is not None:
             if isinstance(message, str):
-                grok_attributes = self.attribute_extraction_grok_object.match(
-                    message)
+                stage_timer.start('Grok')
+                try:
+                    grok_attributes = compiled_rule.attribute_extraction_grok_object.match(
+                        message, timeout=grok_timeout)
+                except TimeoutError as ex:
+                    raise AttributeExtractionTimeout(
+                        f'Grok expression of rule {self.source}.{self.name} took longer than {grok_timeout}s') from ex
+                finally:
+                    stage_timer.stop()
                 if grok_attributes is not None:
                     attributes_dict.update(grok_attributes)
                     # Create JSON message, in case we need to apply also
@@ -201,9 +294,11 @@ class LogProcessingRule:
         if isinstance(message, dict):
             json_message = message
 
-        if self.attribute_extraction_jmespath_expression is not None:
-            for k, v in self.attribute_extraction_jmespath_expression.items():
-                jmespath_attr = jmespath.search(v, json_message)
+        if compiled_rule.attribute_extraction_jmespath_expression is not None:
+            for k, (v, expression) in compiled_rule.attribute_extraction_jmespath_expression.items():
+                stage_timer.start('Jmespath')
+                jmespath_attr = expression.search(json_message)
+                stage_timer.stop()
                 if jmespath_attr is not None:
                     attributes_dict[k] = jmespath_attr
                     # if attribute is being renamed from existing attribute remove
@@ -230,8 +325,10 @@ class LogProcessingRule:
 
         # Check if timestamp needs to be translated to ISO format
         if "timestamp_to_transform" in attributes_dict:
+            stage_timer.start('TimestampParsing')
             attributes_dict['timestamp'] = parse_date_from_string(
                                             attributes_dict['timestamp_to_transform'])
+            stage_timer.stop()
             attributes_dict.pop('timestamp_to_transform')
 
         # Check if aws.log_group exists to extract aws.service and aws.resource.id
@@ -245,6 +342,25 @@ class LogProcessingRule:
 
         return clean_attributes_dict
 
+    def get_attributes_from_top_level_json(self, log_entry: dict) -> dict:
+        '''
+        Extracts the attributes defined in attribute_extraction_from_top_level_json from a JSON object
+        containing a list of log entries, so they can be inherited by each of them
+        '''
+        top_level_json_attributes = {}
+
+        compiled_expressions = self.compile().attribute_extraction_from_top_level_json
+        if compiled_expressions:
+            for k, (v, expression) in compiled_expressions.items():
+                attr_value = expression.search(log_entry)
+                if attr_value:
+                    top_level_json_attributes[v] = attr_value
+                else:
+                    logger.warning(
+                        'No matches found for %s in top level json.', k)
+
+        return top_level_json_attributes
+
     def get_processing_log_annotations(self):
         attributes = {}
         if self.annotations is not None:
@@ -276,3 +392,63 @@ class LogProcessingRule:
             return True
         else:
             return False
+
+
+@dataclass(frozen=True)
+class CompiledLogProcessingRule:
+    '''
+    Compiled matchers of a LogProcessingRule: regular expressions to extract attributes from the S3 key name,
+    the Grok object and the JMESPath expressions. Expensive to build, so it's only created when the rule is used.
+    '''
+    attribute_extraction_from_key_name_regex: Optional[dict]
+    attribute_extraction_grok_object: Optional['Grok']
+    # {attribute_name: (jmespath_expression, compiled_expression)}
+    attribute_extraction_jmespath_expression: Optional[dict]
+    # {jmespath_expression: (attribute_name, compiled_expression)}
+    attribute_extraction_from_top_level_json: Optional[dict]
+    # known_key_path_pattern capturing the date in the key name, if any
+    key_date_regex: Optional[re.Pattern] = None
+
+    @classmethod
+    def from_rule(cls, rule: LogProcessingRule) -> 'CompiledLogProcessingRule':
+        key_name_regexes = None
+        if rule.attribute_extraction_from_key_name is not None:
+            # Compile regular expressions for attribute extraction from key using
+            # the defined helper patterns
+            key_name_regexes = {}
+            for k, v in rule.attribute_extraction_from_key_name.items():
+                key_name_regexes[k] = re.compile(v.format(**helper_regexes))
+
+        # Grok objects are built from the pattern library shared by all rules. pygrok is only
+        # imported if a rule defines a Grok expression
+        grok_object = None
+        if rule.attribute_extraction_grok_expression is not None:
+            from log.processing.grok import compile_grok
+            grok_object = compile_grok(rule.attribute_extraction_grok_expression)
+
+        jmespath_expressions = None
+        if rule.attribute_extraction_jmespath_expression is not None:
+            jmespath_expressions = {
+                k: (v, jmespath.compile(v)) for k, v in rule.attribute_extraction_jmespath_expression.items()
+            }
+
+        top_level_json_expressions = None
+        if rule.attribute_extraction_from_top_level_json is not None:
+            top_level_json_expressions = {
+                k: (v, jmespath.compile(k)) for k, v in rule.attribute_extraction_from_top_level_json.items()
+            }
+
+        return cls(
+            attribute_extraction_from_key_name_regex=key_name_regexes,
+            attribute_extraction_grok_object=grok_object,
+            attribute_extraction_jmespath_expression=jmespath_expressions,
+            attribute_extraction_from_top_level_json=top_level_json_expressions,
+            key_date_regex=get_key_date_regex(rule.known_key_path_pattern)
+        )
+
+
+class AttributeExtractionTimeout(Exception):
+    '''
+    Exception for attribute extraction exceeding its time budget
+    '''
+    pass
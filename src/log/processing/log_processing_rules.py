@@ -16,7 +16,8 @@ import os
 import logging
 import yaml
 from log.processing import LogProcessingRule
-from utils.helpers import is_yaml_file, ENCODING
+from log.processing import rules_artifact
+from utils.helpers import is_yaml_file, ENCODING, YamlSafeLoader
 from utils import aws_appconfig_extension_helpers as aws_appconfig_helpers
 
 BUILT_IN_PROCESSING_RULES_PATH = os.path.join(
@@ -122,7 +123,7 @@ def load_rules_from_dir(directory: str) -> dict:
         try:
             with open(file, encoding=ENCODING) as rule_file:
                 processing_rule_dict = yaml.load(
-                    rule_file, Loader=yaml.loader.SafeLoader)
+                    rule_file, Loader=YamlSafeLoader)
                 # if not a dict
                 if not isinstance(processing_rule_dict, dict):
                     raise InvalidLogProcessingRuleFile(file=rule_file)
@@ -155,7 +156,7 @@ def load_processing_rules_from_yaml(body: str):
         log_processing_rules[log_source] = {}
 
     try:
-        yaml_iterator = yaml.load_all(body, Loader=yaml.SafeLoader)
+        yaml_iterator = yaml.load_all(body, Loader=YamlSafeLoader)
         for i, processing_rule_dict in enumerate(yaml_iterator):
             try:
                 if isinstance(processing_rule_dict, dict):
@@ -226,17 +227,48 @@ class InvalidLogProcessingRuleFile(Exception):
         return f"{self.message} --> {self.file}"
 
 
-def load_built_in_rules():
+def list_built_in_rule_files():
     '''
-    Load built-in log processing rules.
+    List the yaml files defining the built-in log processing rules.
     '''
+    return list_rules_in_dir(BUILT_IN_PROCESSING_RULES_PATH)
+
+
+def list_local_custom_rule_files():
+    '''
+    List the local yaml files load_custom_rules() loads custom log processing rules from: either
+    config/log-processing-rules.yaml or the files in the log processing rules directory.
+    '''
+    if os.path.isfile(DEFAULT_CUSTOM_LOG_PROCESSING_RULES_FILE):
+        return [DEFAULT_CUSTOM_LOG_PROCESSING_RULES_FILE]
+
+    log_processing_rules_directory = os.environ.get('LOG_PROCESSING_RULES_PATH',
+                                                    DEFAULT_CUSTOM_LOG_PROCESSING_RULES_PATH)
+    if os.path.isdir(log_processing_rules_directory):
+        return list_rules_in_dir(log_processing_rules_directory)
+
+    return []
+
+
+def load_built_in_rules(use_artifact: bool = True):
+    '''
+    Load built-in log processing rules. Uses the prebuilt rules artifact if it was built from the
+    current rule files.
+    '''
+    if use_artifact:
+        log_processing_rules = rules_artifact.load_rules(
+            rules_artifact.BUILT_IN_RULES_SECTION, list_built_in_rule_files())
+        if log_processing_rules is not None:
+            return log_processing_rules
+
     return load_rules_from_dir(BUILT_IN_PROCESSING_RULES_PATH)
 
 
-def load_custom_rules():
+def load_custom_rules(use_artifact: bool = True):
     '''
     Load custom Log Processing rules. Returns a dict with the rules and the version.
-    If custom rules are local, version is set to 0.
+    If custom rules are local, version is set to 0 and the prebuilt rules artifact is used if it was
+    built from the current rule files.
     '''
     log_processing_rules_verison = 0
     log_processing_rules = {}
@@ -250,7 +282,15 @@ def load_custom_rules():
         else:
             log_processing_rules_directory = DEFAULT_CUSTOM_LOG_PROCESSING_RULES_PATH
 
-        if os.path.isfile(DEFAULT_CUSTOM_LOG_PROCESSING_RULES_FILE):
+        artifact_rules = None
+        if use_artifact:
+            custom_rule_files = list_local_custom_rule_files()
+            if custom_rule_files:
+                artifact_rules = rules_artifact.load_rules(rules_artifact.CUSTOM_RULES_SECTION, custom_rule_files)
+
+        if artifact_rules is not None:
+            log_processing_rules = artifact_rules
+        elif os.path.isfile(DEFAULT_CUSTOM_LOG_PROCESSING_RULES_FILE):
             log_processing_rules = load_custom_rules_from_local_file()
         elif os.path.isdir(log_processing_rules_directory):
             loaded_log_processing_rules = load_rules_from_dir(
@@ -289,6 +329,20 @@ def load():
     return log_processing_rules, custom_rules_version
 
 
+def compile_rules(processing_rules: dict):
+    '''
+    Compiles all the given log processing rules ahead of their first use, e.g. before taking a
+    snapshot of the execution environment. Rules that fail to compile are logged and skipped, so
+    they fail when they're used as they would without compiling ahead.
+    '''
+    for source, source_rules in processing_rules.items():
+        for name, processing_rule in source_rules.items():
+            try:
+                processing_rule.compile()
+            except ValueError:
+                logger.exception("Unable to compile log processing rule %s.%s", source, name)
+
+
 def lookup_processing_rule(source: str, source_name: str, processing_rules: dict, key_name: str):
     '''
     Given a dict of processing rules:
@@ -13,6 +13,7 @@
 #  limitations under the License.
 
 
+import collections
 import logging
 import os
 from os import environ
@@ -20,20 +21,31 @@ import sys
 import time
 import json
 import gzip
+import io
 import boto3
-import jmespath
+from botocore.exceptions import BotoCoreError, ClientError
 from aws_lambda_powertools import Metrics
 from aws_lambda_powertools.metrics import MetricUnit
 import ijson
 
-from log.processing.log_processing_rule import LogProcessingRule
+from log.processing import guard_rails
+from log.processing import triage
+from log.processing.log_processing_rule import LogProcessingRule, AttributeExtractionTimeout
+from log.sinks import dynatrace
+from utils import memory
+from utils import sqs_visibility
+from utils import tracing
 from utils.helpers import ENCODING
+from utils.timing import StageTimer, TimedReader
 
 logger = logging.getLogger()
 metrics = Metrics()
 
 EXECUTION_REMAINING_TIME_LIMIT = 10000
 
+# Buffer size to iterate lines of decompressed text logs
+TEXT_LINES_BUFFER_SIZE = 65536
+
 # Initialize ijson backend once at module level for better performance
 ijson_backend_name = os.getenv("IJSON_BACKEND", "yajl2_c")
 try:
@@ -85,15 +97,129 @@ def get_log_entry_size(log_entry):
 
     return size
 
+def get_decompressed_stream(compressed_stream, stage_timer: StageTimer):
+    '''
+    Returns a reader of the decompressed content of a gzip stream, accounting the time spent decompressing
+    to stage_timer and raising DecompressionRatioExceeded if it exceeds the maximum decompression ratio
+    '''
+    counting_stream = guard_rails.CountingReader(compressed_stream)
+    decompressed_stream = guard_rails.DecompressionRatioGuard(
+        gzip.GzipFile(mode='rb', fileobj=counting_stream), counting_stream, guard_rails.MAX_DECOMPRESSION_RATIO)
+    return TimedReader(decompressed_stream, stage_timer, 'Decompression')
+
+
+def iterate_with_guard_rails(log_entries, record_size_guard: guard_rails.RecordSizeGuard, bucket: str, key: str):
+    '''
+    Yields the log entries, stopping if a record exceeds the maximum record size or the object exceeds
+    the maximum decompression ratio. The rest of the object can't be read, and the failure would repeat
+    on every retry of the SQS message, ingesting the log entries before it again, so the object is
+    acknowledged with the log entries yielded until then and the skipped object is logged.
+    '''
+    try:
+        for log_entry in log_entries:
+            yield log_entry
+            if record_size_guard is not None:
+                record_size_guard.mark()
+    except guard_rails.RecordTooLarge as ex:
+        logger.error("Stopped processing s3://%s/%s, the rest of the object is skipped. Record too large: %s",
+                     bucket, key, ex)
+        metrics.add_metric(name='LogFilesRecordTooLarge', unit=MetricUnit.Count, value=1)
+    except guard_rails.DecompressionRatioExceeded as ex:
+        logger.error("Stopped processing s3://%s/%s, the rest of the object is skipped. "
+                     "Maximum decompression ratio exceeded: %s", bucket, key, ex)
+        metrics.add_metric(name='LogFilesDecompressionRatioExceeded', unit=MetricUnit.Count, value=1)
+
+
+def _count_truncated_record():
+    metrics.add_metric(name='LogRecordsTruncated', unit=MetricUnit.Count, value=1)
+
+
+def _emit_record_age_metrics(record_age_results: collections.Counter):
+    '''
+    Emits the number of log entries of an object dropped or with their timestamp rewritten for being
+    older than the maximum age accepted by Dynatrace
+    '''
+    if record_age_results[triage.RECORD_DROPPED]:
+        logger.info("Dropped %d log entries older than the maximum age accepted by Dynatrace",
+                    record_age_results[triage.RECORD_DROPPED])
+        metrics.add_metric(name='LogRecordsExpiredDropped', unit=MetricUnit.Count,
+                           value=record_age_results[triage.RECORD_DROPPED])
+    if record_age_results[triage.RECORD_REWRITTEN]:
+        metrics.add_metric(name='LogRecordsExpiredTimestampRewritten', unit=MetricUnit.Count,
+                           value=record_age_results[triage.RECORD_REWRITTEN])
+
+
+def _get_extracted_log_attributes(log_processing_rule: LogProcessingRule, log_entry, stage_timer: StageTimer,
+                                  grok_timeout: float) -> dict:
+    '''
+    Extracts attributes from the log entry, returning no attributes if the extraction exceeds its time budget
+    '''
+    stage_timer.start('AttributeExtraction')
+    try:
+        return log_processing_rule.get_extracted_log_attributes(log_entry, stage_timer=stage_timer,
+                                                                grok_timeout=grok_timeout)
+    except AttributeExtractionTimeout as ex:
+        logger.debug("Ingesting log entry without attribute extraction: %s", ex)
+        metrics.add_metric(name='LogRecordsExtractionTimeouts', unit=MetricUnit.Count, value=1)
+        return {}
+    finally:
+        stage_timer.stop()
+
+
+def _serialize_log_message(dt_log_message: dict, stage_timer: StageTimer) -> dynatrace.SerializedLogMessage:
+    '''
+    Serializes the log message once, the same serialized message is pushed to all the destination sinks
+    '''
+    stage_timer.start('RecordSerialization')
+    try:
+        return dynatrace.serialize_log_message(dt_log_message)
+    finally:
+        stage_timer.stop()
+
+
+def _push_to_sinks(serialized_log_message: dynatrace.SerializedLogMessage, log_sinks: list):
+    '''
+    Pushes the log message to all the destination sinks. When the batches of several sinks are full,
+    they're flushed concurrently instead of one after the other.
+    '''
+    if len(log_sinks) > 1:
+        full_log_sinks = [log_sink for log_sink in log_sinks if log_sink.is_full(serialized_log_message)]
+        if len(full_log_sinks) > 1:
+            dynatrace.flush_sinks_concurrently(full_log_sinks, next_batch=True)
+
+    for log_sink in log_sinks:
+        log_sink.push(serialized_log_message)
+
+
+def warm_up_s3_client(s3_client, bucket: str):
+    '''
+    Opens a connection to the S3 endpoint of the given client with a HeadBucket request. The result
+    is irrelevant (the function may not be allowed to list the bucket), the connection stays in the pool.
+    '''
+    try:
+        s3_client.head_bucket(Bucket=bucket)
+    except (ClientError, BotoCoreError):
+        logger.debug("S3 warm-up request to bucket %s failed", bucket, exc_info=True)
+
+
 def process_log_object(log_processing_rule: LogProcessingRule, bucket: str, key: str, bucket_region: str, log_sinks: list,
-                       lambda_context, user_defined_annotations: dict = None, session: boto3.Session = None):
+                       lambda_context, user_defined_annotations: dict = None, session: boto3.Session = None,
+                       s3_client=None):
     '''
     Downloads a log from S3, decompresses and reads log messages within it and transforms the messages to Dynatrace LogV2 API format.
     Can read JSON logs (list of dicts) or text line by line (both gzipped or plain).
     The function also adds context, inferred and user-defined log attributes. Returns a the number of log entries processed.
+    An existing S3 client can be passed in s3_client to reuse its connections, otherwise a new one is created from the session.
+    The time spent on each stage (S3 download, decompression, parsing, attribute extraction...) is emitted as metrics
+    with the processing_rule dimension once the object is processed.
+    Pathological records and objects are handled as configured in guard_rails: oversized text lines are truncated,
+    long lines or lines exceeding the extraction time budget are ingested without attribute extraction, and the
+    processing stops on oversized JSON records or objects exceeding the maximum decompression ratio.
     '''
 
     start_time = time.time()
+    stage_timer = StageTimer()
+    grok_timeout = guard_rails.get_extraction_timeout()
 
     # https://ben11kehoe.medium.com/boto3-sessions-and-why-you-should-use-them-9b094eb5ca8e
     # https://github.com/boto/boto3/issues/2707
@@ -103,20 +229,34 @@ def process_log_object(log_processing_rule: LogProcessingRule, bucket: str, key:
     if user_defined_annotations is None:
         user_defined_annotations = {}
 
-    s3_client = session.client('s3')
+    if s3_client is None:
+        s3_client = session.client('s3')
 
-    log_obj_http_response = s3_client.get_object(Bucket=bucket, Key=key)
+    stage_timer.start('S3GetObject')
+    with tracing.span('S3GetObject', {'aws.s3.bucket': bucket, 'aws.s3.key': key}) as get_object_span:
+        log_obj_http_response = s3_client.get_object(Bucket=bucket, Key=key)
+        get_object_span.set_attribute('aws.s3.content_length', log_obj_http_response.get('ContentLength'))
+    stage_timer.stop()
+    memory.sample('S3GetObject')
+    sqs_visibility.object_started(log_obj_http_response.get('ContentLength'))
 
     log_obj_http_response_body = log_obj_http_response['Body']
     log_obj_http_response_content_encoding = log_obj_http_response.get('ContentEncoding', '').lower()
 
     logger.debug("s3://%s/%s Object size: %i KB",bucket,key,log_obj_http_response['ContentLength']/1024)
 
-    if key.endswith('.gz') or log_obj_http_response_content_encoding == 'gzip':
-        log_stream = gzip.GzipFile(
-            mode='rb', fileobj=log_obj_http_response_body)
+    # Reads are wrapped to account the time spent downloading and decompressing, and to count the
+    # bytes downloaded to report the progress
+    s3_counting_stream = guard_rails.CountingReader(log_obj_http_response_body)
+    s3_stream = TimedReader(s3_counting_stream, stage_timer, 'S3Read')
+    is_gzip_compressed = key.endswith('.gz') or log_obj_http_response_content_encoding == 'gzip'
+
+    if is_gzip_compressed:
+        log_stream = get_decompressed_stream(s3_stream, stage_timer)
     else:
-        log_stream = log_obj_http_response_body
+        log_stream = s3_stream
+
+    record_size_guard = None
 
     # Get log_format from processing rule and generate iterable log_entries
 
@@ -127,27 +267,28 @@ def process_log_object(log_processing_rule: LogProcessingRule, bucket: str, key:
                 log_processing_rule.log_entries_key)
         else:
             ijson_path = 'item'
+        record_size_guard = guard_rails.RecordSizeGuard(log_stream, guard_rails.MAX_RECORD_SIZE)
         log_entries = ijson_backend.items(
-            log_stream, ijson_path, use_float=True)
+            record_size_guard, ijson_path, use_float=True)
 
     # if it's a stream of JSON objects, create an iterable list of dicts
     elif log_processing_rule.log_format == 'json_stream':
         # if the rule is cw_to_fh, need to decompress data
         if log_processing_rule.name == "cwl_to_fh":
-            json_stream = gzip.GzipFile(mode='rb', fileobj=log_stream)
+            json_stream = get_decompressed_stream(log_stream, stage_timer)
         else:
             json_stream = log_stream
 
         # For json_stream with multiple root-level objects, use empty prefix
+        record_size_guard = guard_rails.RecordSizeGuard(json_stream, guard_rails.MAX_RECORD_SIZE)
         log_entries = ijson_backend.items(
-            json_stream, '', multiple_values=True, use_float=True)
+            record_size_guard, '', multiple_values=True, use_float=True)
 
-    # if it's text, either iterate the GzipFile if compressed or botocore response body iter_lines() if plain text
+    # if it's text, iterate the lines (with line endings removed if plain text), truncating oversized lines
     elif log_processing_rule.log_format == 'text':
-        if type(log_stream) is gzip.GzipFile:
-            log_entries = log_stream
-        else:
-            log_entries = log_stream.iter_lines()
+        log_entries = guard_rails.iter_lines(io.BufferedReader(log_stream, buffer_size=TEXT_LINES_BUFFER_SIZE),
+                                             guard_rails.MAX_RECORD_SIZE, keep_line_endings=is_gzip_compressed,
+                                             on_truncated=_count_truncated_record)
 
     # catch-all? this should never happen
     else:
@@ -170,14 +311,35 @@ def process_log_object(log_processing_rule: LogProcessingRule, bucket: str, key:
     
     # Count log entries (can't len() a stream)
     num_log_entries = 0
+    # Log entries too old for Dynatrace are counted per object, there may be millions in a backlog
+    record_age_results = collections.Counter()
+    min_record_timestamp = triage.get_min_record_timestamp()
     decompressed_log_object_size = 0
 
-    for log_entry in log_entries:
+    # Time not accounted to any other stage (building log messages, pushing them to sinks...)
+    stage_timer.start('RecordProcessing')
+
+    # Downloading, decompressing and parsing are streamed, the span covers them all (and the batches
+    # POST'ed to Dynatrace while processing). If processing fails, the span ends with its parent.
+    parsing_span = tracing.start_span('ParseLogObject', {
+        'log.processing_rule': f'{log_processing_rule.source}.{log_processing_rule.name}',
+        'log.format': log_processing_rule.log_format
+    })
+
+    log_entries = iterate_with_guard_rails(log_entries, record_size_guard, bucket, key)
+
+    for log_entry in stage_timer.iterate(log_entries, 'Parsing'):
 
         dt_log_message = {}
+        skip_attribute_extraction = False
 
-        # calculate raw log entry size
-        decompressed_log_object_size += get_log_entry_size(log_entry)
+        # calculate raw log entry size, truncating records too deeply nested to serialize
+        try:
+            decompressed_log_object_size += get_log_entry_size(log_entry)
+        except RecursionError:
+            log_entry = guard_rails.limit_nesting_depth(log_entry)
+            metrics.add_metric(name='LogRecordsNestingTruncated', unit=MetricUnit.Count, value=1)
+            decompressed_log_object_size += get_log_entry_size(log_entry)
 
         # start with the json_list within json_stream case as it requires a
         # second level of iteration
@@ -190,16 +352,7 @@ def process_log_object(log_processing_rule: LogProcessingRule, bucket: str, key:
                         continue
 
                 # check if we need to inherit attributes from top level object
-                top_level_json_attributes = {}
-
-                if log_processing_rule.attribute_extraction_from_top_level_json:
-                    for k, v in log_processing_rule.attribute_extraction_from_top_level_json.items():
-                        attr_value = jmespath.search(k, log_entry)
-                        if attr_value:
-                            top_level_json_attributes[v] = attr_value
-                        else:
-                            logger.warning(
-                                'No matches found for %s in top level json.', k)
+                top_level_json_attributes = log_processing_rule.get_attributes_from_top_level_json(log_entry)
 
                 # iterate through list of log entries in json obj within json stream
                 for sub_entry in log_entry[log_processing_rule.log_entries_key]:
@@ -212,15 +365,17 @@ def process_log_object(log_processing_rule: LogProcessingRule, bucket: str, key:
                     # add cwl attributes to subentry for additional extraction
                     sub_entry.update(top_level_json_attributes)
                     dt_log_message.update(
-                        log_processing_rule.get_extracted_log_attributes(sub_entry))
+                        _get_extracted_log_attributes(log_processing_rule, sub_entry, stage_timer, grok_timeout))
 
                     # if the aws.region is not found, infer region from bucket
                     if "aws.region" not in dt_log_message:
                         dt_log_message['aws.region'] = bucket_region
 
-                    # Push to destination sink(s)
-                    for log_sink in log_sinks:
-                        log_sink.push(dt_log_message)
+                    # Push to destination sink(s), unless it's too old for Dynatrace
+                    record_age_result = triage.check_record_age(dt_log_message, min_record_timestamp)
+                    record_age_results[record_age_result] += 1
+                    if record_age_result != triage.RECORD_DROPPED:
+                        _push_to_sinks(_serialize_log_message(dt_log_message, stage_timer), log_sinks)
 
                     num_log_entries += 1
             else:
@@ -234,6 +389,8 @@ def process_log_object(log_processing_rule: LogProcessingRule, bucket: str, key:
             # do this here, since we continue for json-stream + list
             if num_log_entries % 1000 == 0:
                 logger.debug("Processed %s entries", str(num_log_entries))
+                memory.sample('RecordProcessing')
+                sqs_visibility.report_progress(s3_counting_stream.bytes_read)
                 # Check remaining execution time for Lambda function
                 if lambda_context.get_remaining_time_in_millis() <= EXECUTION_REMAINING_TIME_LIMIT:
                     raise NotEnoughExecutionTimeRemaining
@@ -252,6 +409,9 @@ def process_log_object(log_processing_rule: LogProcessingRule, bucket: str, key:
                     logger.debug('skipping empty log line')
                     continue
                 dt_log_message['content'] = log_entry
+                # extraction on very long lines is slow and rarely useful, ingest them raw
+                if 0 < guard_rails.MAX_EXTRACTION_LINE_LENGTH < len(log_entry):
+                    skip_attribute_extraction = True
             else:
                 metrics.add_metric(name='FilesWithInvalidLogEntries',
                                    unit=MetricUnit.Count, value=1)
@@ -273,33 +433,51 @@ def process_log_object(log_processing_rule: LogProcessingRule, bucket: str, key:
         dt_log_message.update(context_log_attributes)
 
         # Add extracted attributes and log annotations from log processing rule
-        dt_log_message.update(
-            log_processing_rule.get_extracted_log_attributes(log_entry))
+        if skip_attribute_extraction:
+            metrics.add_metric(name='LogRecordsExtractionSkipped', unit=MetricUnit.Count, value=1)
+        else:
+            dt_log_message.update(
+                _get_extracted_log_attributes(log_processing_rule, log_entry, stage_timer, grok_timeout))
 
         # if the aws.region is not found, infer region from bucket
         if "aws.region" not in dt_log_message:
             dt_log_message['aws.region'] = bucket_region
 
-        # Push to destination sink(s)
-        for log_sink in log_sinks:
-            log_sink.push(dt_log_message)
+        # Push to destination sink(s), unless it's too old for Dynatrace
+        record_age_result = triage.check_record_age(dt_log_message, min_record_timestamp)
+        record_age_results[record_age_result] += 1
+        if record_age_result != triage.RECORD_DROPPED:
+            _push_to_sinks(_serialize_log_message(dt_log_message, stage_timer), log_sinks)
 
         num_log_entries += 1
 
         # if we're processing a large log file, check remaining execution time
         if num_log_entries % 1000 == 0:
             logger.debug("Processed %s entries", str(num_log_entries))
+            memory.sample('RecordProcessing')
+            sqs_visibility.report_progress(s3_counting_stream.bytes_read)
             # Check remaining execution time for Lambda function
             if lambda_context.get_remaining_time_in_millis() <= EXECUTION_REMAINING_TIME_LIMIT:
                 raise NotEnoughExecutionTimeRemaining
 
+    stage_timer.stop()
+    memory.sample('RecordProcessing')
+
+    parsing_span.set_attribute('log.entries', num_log_entries)
+    parsing_span.set_attribute('log.uncompressed_size', decompressed_log_object_size)
+    for stage, elapsed_ns in stage_timer.get_timings().items():
+        parsing_span.set_attribute(f'stage.{stage}.ms', elapsed_ns / 1000000)
+    parsing_span.end()
+
     logger.info("Total log entries processed: %s", str(num_log_entries))
+    _emit_record_age_metrics(record_age_results)
 
     end_time = time.time()
     metrics.add_metric(name='LogProcessingTime',
                        unit=MetricUnit.Seconds, value=(end_time - start_time))
     metrics.add_metric(name='ReceivedUncompressedLogFileSize',
                        unit=MetricUnit.Bytes, value=decompressed_log_object_size)
+    stage_timer.emit_metrics({'processing_rule': f'{log_processing_rule.source}.{log_processing_rule.name}'})
 
     # return number of log entries processed
     return (num_log_entries)
@@ -0,0 +1,177 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+'''
+Prebuilt log processing rules artifact. Parsing and validating the rule YAML files gives the same
+result on every container of a given image, so the container image build serializes the loaded
+rules into a binary artifact together with a hash of the files they were loaded from. At cold start,
+log_processing_rules uses the artifact if the hash of the current files matches, and falls back to
+parsing the files otherwise.
+
+The artifact is a pickle file created during the image build: only load artifacts you built.
+
+Build it from the directory the function runs from (so ./config is resolved as in Lambda):
+  python -m log.processing.rules_artifact [--output path]
+'''
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sys
+from log.processing import log_processing_rule
+from utils.helpers import helper_regexes
+from version import get_version
+
+RULES_ARTIFACT_FORMAT_VERSION = 1
+
+DEFAULT_RULES_ARTIFACT_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "compiled_rules.bin"
+)
+
+BUILT_IN_RULES_SECTION = 'built_in'
+CUSTOM_RULES_SECTION = 'custom'
+
+logger = logging.getLogger()
+
+
+def get_rules_artifact_file() -> str:
+    return os.environ.get('LOG_PROCESSING_RULES_ARTIFACT', DEFAULT_RULES_ARTIFACT_FILE)
+
+
+def get_sources_hash(source_files: list) -> str:
+    '''
+    Returns a sha256 hash of the given rule files plus everything else that determines the loaded
+    rules: the helper regexes used to expand the key patterns and the rule loading code.
+    '''
+    sources_hash = hashlib.sha256()
+    sources_hash.update(str(RULES_ARTIFACT_FORMAT_VERSION).encode())
+    sources_hash.update(json.dumps(helper_regexes, sort_keys=True).encode())
+
+    code_files = [log_processing_rule.__file__,
+                  os.path.join(os.path.dirname(log_processing_rule.__file__), 'log_processing_rules.py')]
+
+    for file in code_files:
+        with open(file, 'rb') as f:
+            sources_hash.update(hashlib.sha256(f.read()).digest())
+
+    for file in sorted(source_files):
+        sources_hash.update(file.encode())
+        with open(file, 'rb') as f:
+            sources_hash.update(hashlib.sha256(f.read()).digest())
+
+    return sources_hash.hexdigest()
+
+
+def load_rules(section: str, source_files: list, artifact_file: str = None):
+    '''
+    Returns the rules stored in the given section of the artifact if they were built from the same
+    source files. Returns None if there's no artifact, it's invalid or the sources have changed.
+    '''
+    if artifact_file is None:
+        artifact_file = get_rules_artifact_file()
+
+    if not os.path.isfile(artifact_file):
+        return None
+
+    try:
+        with open(artifact_file, 'rb') as f:
+            artifact = pickle.load(f)
+
+        if (artifact['format_version'] != RULES_ARTIFACT_FORMAT_VERSION or
+                artifact['python_version'] != list(sys.version_info[:2])):
+            logger.info("Ignoring log processing rules artifact %s built for a different format or Python version",
+                        artifact_file)
+            return None
+
+        artifact_section = artifact['sections'].get(section)
+        if artifact_section is None:
+            return None
+
+        if artifact_section['sources_hash'] != get_sources_hash(source_files):
+            logger.info("Log processing rules artifact %s is outdated for %s rules. Loading rules from source files.",
+                        artifact_file, section)
+            return None
+
+    except Exception:
+        logger.exception("Unable to read log processing rules artifact %s. Loading rules from source files.",
+                         artifact_file)
+        return None
+
+    logger.debug("Loaded %s log processing rules from artifact %s", section, artifact_file)
+
+    return artifact_section['rules']
+
+
+def build(artifact_file: str = None) -> dict:
+    '''
+    Loads the built-in log processing rules, and the custom ones if they're defined locally, and
+    writes them to the rules artifact. Returns the sections written.
+    '''
+    # imported here, log_processing_rules imports this module
+    from log.processing import log_processing_rules
+
+    if artifact_file is None:
+        artifact_file = get_rules_artifact_file()
+
+    sections = {}
+
+    built_in_rule_files = log_processing_rules.list_built_in_rule_files()
+    sections[BUILT_IN_RULES_SECTION] = {
+        'sources_hash': get_sources_hash(built_in_rule_files),
+        'rules': log_processing_rules.load_rules_from_dir(log_processing_rules.BUILT_IN_PROCESSING_RULES_PATH)
+    }
+
+    if os.environ.get('LOG_FORWARDER_CONFIGURATION_LOCATION') == 'local':
+        custom_rule_files = log_processing_rules.list_local_custom_rule_files()
+        if custom_rule_files:
+            custom_rules, _ = log_processing_rules.load_custom_rules(use_artifact=False)
+            sections[CUSTOM_RULES_SECTION] = {
+                'sources_hash': get_sources_hash(custom_rule_files),
+                'rules': custom_rules
+            }
+
+    artifact = {
+        'format_version': RULES_ARTIFACT_FORMAT_VERSION,
+        'forwarder_version': get_version(),
+        'python_version': list(sys.version_info[:2]),
+        'sections': sections
+    }
+
+    tmp_file = artifact_file + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_file, artifact_file)
+
+    return sections
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the prebuilt log processing rules artifact.')
+    parser.add_argument('--output', default=None, help='Artifact file (default: LOG_PROCESSING_RULES_ARTIFACT '
+                                                       'or compiled_rules.bin next to this module)')
+    args = parser.parse_args()
+
+    sections = build(args.output)
+
+    for section, content in sections.items():
+        num_rules = sum(len(rules) for rules in content['rules'].values())
+        print(f"{section}: {num_rules} rules, sources hash {content['sources_hash']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+'''
+Triage of log objects before downloading them, using the S3 notification and the key name:
+  - Empty objects (size 0 in the notification) are dropped.
+  - LOG_PROCESSING_SKIP_EXPIRED_OBJECTS (default false): objects whose key name date (the year, month
+    and day of the known_key_path_pattern of the processing rule) ended more than
+    DYNATRACE_LOG_INGEST_MAX_RECORD_AGE ago are dropped, as Dynatrace rejects their log records.
+  - LOG_PROCESSING_LARGE_OBJECT_SIZE: objects larger than this (in bytes) are processed after the
+    other objects of the batch, so a large object running out of execution time doesn't fail the
+    small objects behind it. 0 disables it.
+Notifications without the object size are never dropped or deferred.
+
+Log records are checked too, once their attributes are extracted: Dynatrace rejects records with a
+timestamp older than DYNATRACE_LOG_INGEST_MAX_RECORD_AGE. LOG_PROCESSING_EXPIRED_RECORDS sets what
+to do with them:
+  - keep (default): they're pushed as is.
+  - drop: they're dropped before being pushed to the sinks.
+  - rewrite: their timestamp is replaced by the ingestion time, keeping the original one in the
+    original_timestamp attribute. Objects aren't dropped by their key name date then.
+Records without a timestamp or with one that can't be parsed are always pushed.
+'''
+
+import datetime
+import json
+import math
+import os
+import time
+from log.processing.log_processing_rule import LogProcessingRule
+from log.sinks.dynatrace import DYNATRACE_LOG_INGEST_MAX_RECORD_AGE
+
+SKIP_EXPIRED_OBJECTS = os.getenv('LOG_PROCESSING_SKIP_EXPIRED_OBJECTS', 'false') == 'true'
+
+EXPIRED_RECORDS_DROP = 'drop'
+EXPIRED_RECORDS_REWRITE = 'rewrite'
+EXPIRED_RECORDS_KEEP = 'keep'
+
+EXPIRED_RECORDS_MODE = os.getenv('LOG_PROCESSING_EXPIRED_RECORDS', EXPIRED_RECORDS_KEEP)
+
+# Results of check_record_age
+RECORD_ACCEPTED = 'accepted'
+RECORD_DROPPED = 'dropped'
+RECORD_REWRITTEN = 'rewritten'
+
+try:
+    LARGE_OBJECT_SIZE = int(os.getenv('LOG_PROCESSING_LARGE_OBJECT_SIZE'))
+except (ValueError, TypeError):
+    LARGE_OBJECT_SIZE = 100 * 1024 * 1024
+
+
+def get_object_size(s3_notification: dict):
+    '''
+    Returns the size in bytes of the object of an S3 notification, or None if unknown
+    '''
+    try:
+        size = s3_notification['detail']['object']['size']
+    except (KeyError, TypeError):
+        return None
+    return size if isinstance(size, int) else None
+
+
+def is_empty_object(s3_notification: dict) -> bool:
+    return get_object_size(s3_notification) == 0
+
+
+def is_large_object(s3_notification: dict) -> bool:
+    size = get_object_size(s3_notification)
+    return LARGE_OBJECT_SIZE > 0 and size is not None and size > LARGE_OBJECT_SIZE
+
+
+def is_expired_object(log_processing_rule: LogProcessingRule, key: str, now: float = None) -> bool:
+    '''
+    Returns True if all the log records of the object are older than the maximum age accepted by
+    Dynatrace, judging by the date in its key name
+    '''
+    if not SKIP_EXPIRED_OBJECTS or EXPIRED_RECORDS_MODE == EXPIRED_RECORDS_REWRITE:
+        return False
+
+    key_date = log_processing_rule.get_date_from_s3_key(key)
+    if key_date is None:
+        return False
+
+    key_date_end = datetime.datetime.combine(
+        key_date + datetime.timedelta(days=1), datetime.time(), tzinfo=datetime.timezone.utc)
+    now = time.time() if now is None else now
+    return key_date_end.timestamp() < now - DYNATRACE_LOG_INGEST_MAX_RECORD_AGE
+
+
+def defer_large_objects(messages: list):
+    '''
+    Returns the SQS messages ordered to process the large objects last (keeping the order of the
+    rest) and the number of messages deferred
+    '''
+    small_object_messages = []
+    large_object_messages = []
+
+    for message in messages:
+        try:
+            s3_notification = json.loads(message['body'])
+        except (KeyError, TypeError, json.decoder.JSONDecodeError):
+            s3_notification = None
+
+        if is_large_object(s3_notification):
+            large_object_messages.append(message)
+        else:
+            small_object_messages.append(message)
+
+    return small_object_messages + large_object_messages, len(large_object_messages)
+
+
+def get_min_record_timestamp(now: float = None) -> float:
+    '''
+    Returns the oldest POSIX timestamp of the log records accepted by Dynatrace
+    '''
+    return (time.time() if now is None else now) - DYNATRACE_LOG_INGEST_MAX_RECORD_AGE
+
+
+def get_record_timestamp(timestamp):
+    '''
+    Returns the timestamp attribute of a log record as a POSIX timestamp, or None if it can't be parsed.
+    Accepts the formats accepted by Dynatrace: ISO 8601 and UNIX epoch (seconds, milliseconds,
+    microseconds or nanoseconds), as numbers or strings.
+    '''
+    if isinstance(timestamp, str):
+        try:
+            timestamp = float(timestamp)
+        except ValueError:
+            # datetime.fromisoformat only accepts the Z suffix since Python 3.11
+            if timestamp.endswith(('Z', 'z')):
+                timestamp = timestamp[:-1] + '+00:00'
+            try:
+                timestamp = datetime.datetime.fromisoformat(timestamp)
+            except ValueError:
+                return None
+
+    if isinstance(timestamp, datetime.datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
+        return timestamp.timestamp()
+
+    if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+        if not math.isfinite(timestamp):
+            return None
+        # The unit is inferred from the magnitude, as Dynatrace does
+        while abs(timestamp) > 100000000000:
+            timestamp /= 1000
+        return float(timestamp)
+
+    return None
+
+
+def check_record_age(dt_log_message: dict, min_record_timestamp: float) -> str:
+    '''
+    Checks if the log message is older than min_record_timestamp. Returns RECORD_DROPPED if it must be
+    dropped, RECORD_REWRITTEN if its timestamp was replaced by the current time or RECORD_ACCEPTED.
+    '''
+    if EXPIRED_RECORDS_MODE == EXPIRED_RECORDS_KEEP or 'timestamp' not in dt_log_message:
+        return RECORD_ACCEPTED
+
+    record_timestamp = get_record_timestamp(dt_log_message['timestamp'])
+    if record_timestamp is None or record_timestamp >= min_record_timestamp:
+        return RECORD_ACCEPTED
+
+    if EXPIRED_RECORDS_MODE == EXPIRED_RECORDS_REWRITE:
+        dt_log_message['original_timestamp'] = dt_log_message['timestamp']
+        dt_log_message['timestamp'] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        return RECORD_REWRITTEN
+
+    return RECORD_DROPPED
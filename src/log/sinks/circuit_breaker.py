@@ -0,0 +1,97 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+'''
+Circuit breaker of a Dynatrace sink. After CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive POST requests
+fail because Dynatrace is unreachable or unavailable (connection errors, timeouts or HTTP 5xx after
+retries), the circuit opens and log objects routed to the sink fail immediately, without downloading
+them, so SQS retries them later. After CIRCUIT_BREAKER_RECOVERY_TIMEOUT seconds the circuit is
+half-open: the next log object is processed, and the circuit closes if its first POST succeeds or
+opens again if it fails.
+
+The state lives in the sink, so it's kept across invocations of a warm execution environment.
+'''
+
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger()
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+try:
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.getenv('DYNATRACE_CIRCUIT_BREAKER_FAILURE_THRESHOLD'))
+except (ValueError, TypeError):
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD = 3
+
+try:
+    CIRCUIT_BREAKER_RECOVERY_TIMEOUT = int(os.getenv('DYNATRACE_CIRCUIT_BREAKER_RECOVERY_TIMEOUT'))
+except (ValueError, TypeError):
+    CIRCUIT_BREAKER_RECOVERY_TIMEOUT = 60
+
+
+class CircuitBreaker():
+    '''
+    Closed, open and half-open states of a sink. A failure_threshold of 0 disables the breaker.
+    '''
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                 recovery_timeout: float = CIRCUIT_BREAKER_RECOVERY_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        '''
+        Returns whether requests can be sent to the sink: the circuit is closed, or it's been open
+        for longer than the recovery timeout (it becomes half-open to try again)
+        '''
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                logger.info("Circuit breaker of sink %s is half-open, trying to send requests again", self.name)
+                self.state = HALF_OPEN
+            return self.state != OPEN
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info("Circuit breaker of sink %s closed", self.name)
+            self.state = CLOSED
+            self._consecutive_failures = 0
+
+    def record_failure(self) -> bool:
+        '''
+        Records a failed request. Returns True if the circuit opened because of it.
+        '''
+        if self.failure_threshold <= 0:
+            return False
+
+        with self._lock:
+            self._consecutive_failures += 1
+            if self.state == HALF_OPEN or (
+                    self.state == CLOSED and self._consecutive_failures >= self.failure_threshold):
+                logger.warning("Circuit breaker of sink %s opened after %d consecutive failed requests",
+                               self.name, self._consecutive_failures)
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+                return True
+            return False
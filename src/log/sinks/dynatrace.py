@@ -13,20 +13,29 @@
 #  limitations under the License.
 
 
+import contextvars
 import logging
 import os
 import sys
 import json
 import re
 import gzip
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
 from aws_lambda_powertools.utilities import parameters
 from aws_lambda_powertools import Metrics
 from aws_lambda_powertools.metrics import MetricUnit
+from log.sinks.circuit_breaker import CircuitBreaker
+from log.sinks import spool
+from log.sinks.flow_control import AdaptiveFlowControl, MAX_BACKOFF_SECONDS, THROTTLING_STATUS_CODES
+from utils import memory
+from utils import tracing
 from utils.helpers import ENCODING
+from utils.timing import StageTimer
 from version import get_version
 
 logger = logging.getLogger()
@@ -53,40 +62,237 @@ DYNATRACE_LOG_INGEST_MAX_ENTRIES_COUNT = 5000
 
 DYNATRACE_LOG_MESSAGE_MAX_ATTRIBUTES = 50
 
+# Keep buffering log messages across the log objects of an invocation, instead of flushing the sinks
+# after each object
+DYNATRACE_COALESCE_BATCHES = os.getenv('DYNATRACE_COALESCE_BATCHES', 'false') == 'true'
+
 COMMA_SEPARATOR_LENGTH = 1
 LIST_BRACKETS_LENGTH = 2
 
+# Spooled batches aren't replayed with less execution time remaining than this (in ms)
+SPOOL_REPLAY_REMAINING_TIME_LIMIT = 60000
+
+# Maximum number of sinks flushed concurrently
+try:
+    DYNATRACE_FLUSH_MAX_WORKERS = int(os.getenv('DYNATRACE_FLUSH_MAX_WORKERS'))
+except (ValueError, TypeError):
+    DYNATRACE_FLUSH_MAX_WORKERS = 4
+
 DYNATRACE_CONNECT_TIMEOUT = 3
 DYNATRACE_READ_TIMEOUT = 12
 
 metrics = Metrics()
+# Powertools Metrics isn't thread-safe, and sinks are flushed concurrently in the flush executor
+_metrics_lock = threading.Lock()
 
 default_headers = {
     "User-Agent" : f"dynatrace-aws-s3-log-forwarder/{get_version()}"
 }
 
+
+class SerializedLogMessage():
+    '''
+    Log message truncated to the Dynatrace limits and serialized to JSON. It's built once per log
+    entry and the same instance is buffered by all the sinks the entry is forwarded to.
+    '''
+    __slots__ = ('data', 'size')
+
+    def __init__(self, data: bytes):
+        self.data = data
+        # Approximate size accounted towards the batch size limit
+        self.size = sys.getsizeof(data)
+
+
+def add_metric(name: str, unit: MetricUnit, value: float):
+    '''
+    Adds a metric to the shared Powertools Metrics, serialized across the flush threads
+    '''
+    with _metrics_lock:
+        metrics.add_metric(name=name, unit=unit, value=value)
+
+
+def truncate_log_message(message: dict):
+    '''
+    Gets a Dynatrace LogMessageJson object. If message size exceeds Dynatrace limit, returns
+    truncated message.
+    '''
+    if len(message['content']) > DYNATRACE_LOG_INGEST_CONTENT_MAX_LENGTH:
+        trimmed_length = DYNATRACE_LOG_INGEST_CONTENT_MAX_LENGTH - \
+            len(DYNATRACE_LOG_INGEST_CONTENT_MARK_TRIMMED)
+        message['content'] = message['content'][0:trimmed_length] + \
+            DYNATRACE_LOG_INGEST_CONTENT_MARK_TRIMMED
+        add_metric(name='LogMessagesTrimmed',
+                   unit=MetricUnit.Count, value=1)
+    return message
+
+
+def serialize_log_message(message: dict) -> SerializedLogMessage:
+    '''
+    Truncates the log message to the Dynatrace limits and serializes it to JSON
+    '''
+    truncate_log_message(message)
+    return SerializedLogMessage(json.dumps(message).encode(ENCODING))
+
+
+def serialize_batch(logs: list) -> bytes:
+    '''
+    Returns the JSON array of a batch of log messages (SerializedLogMessage or dicts)
+    '''
+    return b'[' + b','.join(
+        log.data if isinstance(log, SerializedLogMessage) else json.dumps(log).encode(ENCODING)
+        for log in logs) + b']'
+
+
+class CompressedBatch():
+    '''
+    Compressed payload of a batch, available once the sink compressing it sets done
+    '''
+
+    def __init__(self, logs: list):
+        self.logs = tuple(logs)
+        self.payload = None
+        self.data_size = 0
+        self.done = threading.Event()
+
+    def has_logs(self, logs: list) -> bool:
+        return len(logs) == len(self.logs) and all(log is batch_log for log, batch_log in zip(logs, self.logs))
+
+
+class CompressedBatchCache():
+    '''
+    Last batch compressed by any sink. When log messages are forwarded to several sinks, their
+    batches are usually flushed at the same time with the same log messages, so each batch is only
+    serialized and compressed once. Batches are matched by the identity of their messages.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._batch = None
+
+    def get_or_compress(self, logs: list, compress):
+        '''
+        Returns the compressed payload and uncompressed size of the batch, and whether it was
+        compressed by another sink. Otherwise, compress() is called to get them. If another sink is
+        compressing the same batch concurrently, waits for it.
+        '''
+        with self._lock:
+            batch = self._batch
+            shared = batch is not None and batch.has_logs(logs)
+            if not shared:
+                batch = CompressedBatch(logs)
+                self._batch = batch
+
+        if shared:
+            batch.done.wait()
+            if batch.payload is not None:
+                return batch.payload, batch.data_size, True
+            # Compressing failed in the other sink
+            payload, data_size = compress()
+            return payload, data_size, False
+
+        try:
+            batch.payload, batch.data_size = compress()
+        finally:
+            batch.done.set()
+        return batch.payload, batch.data_size, False
+
+    def clear(self):
+        with self._lock:
+            self._batch = None
+
+
+compressed_batches = CompressedBatchCache()
+
+
 class DynatraceSink():
-    def __init__(self, dt_url: str, dt_api_key_parameter: str, verify_ssl: bool = True):
+    def __init__(self, dt_url: str, dt_api_key_parameter: str, verify_ssl: bool = True, sink_id: str = None):
         self._environment_url = dt_url
         self._api_key_parameter = dt_api_key_parameter
         self._approx_buffered_messages_size = LIST_BRACKETS_LENGTH
         self._messages = []
         self._batch_num = 1
         self._s3_source = ""
-
+        self._verify_ssl = verify_ssl
+        self._sink_id = sink_id if sink_id is not None else extract_tenant_id_from_url(dt_url)
+        # Time spent serializing, compressing and posting the messages of the current log object
+        self.stage_timer = StageTimer()
+        # When Dynatrace acknowledged the first and last batches of the current log object
+        self._first_ack_time = None
+        self._last_ack_time = None
+        # When coalescing batches across log objects: the SQS message being processed, the messages with
+        # log entries in the buffered batch, the messages with log entries in failed batches, when the
+        # batches of each message were acknowledged, and where the entries of the current message start
+        self._current_message_id = None
+        self._buffered_message_ids = set()
+        self._failed_message_ids = set()
+        self._message_ack_times = {}
+        self._current_message_start = 0
+        self._current_message_start_size = LIST_BRACKETS_LENGTH
+        # Batch limits and backoff adapted to the responses of Dynatrace, kept across invocations
+        self.flow_control = AdaptiveFlowControl(DYNATRACE_LOG_INGEST_MAX_ENTRIES_COUNT,
+                                                DYNATRACE_LOG_INGEST_PAYLOAD_MAX_SIZE)
+        # Fails fast while the Dynatrace environment is unreachable, kept across invocations
+        self.circuit_breaker = CircuitBreaker(self._sink_id)
+        # Store of the batches throttled by Dynatrace to replay later, if enabled
+        self.spool = None
+        # The spool isn't listed again until then (monotonic time) after finding it empty
+        self._spool_empty_until = 0.0
+
+        self.session = self._create_session()
+
+    def _create_session(self):
         retry_strategy = Retry(
             total = 3,
-            status_forcelist = [429, 503],
+            status_forcelist = THROTTLING_STATUS_CODES,
             allowed_methods =['POST'],
             raise_on_status = False,
-            backoff_factor = .5
+            backoff_factor = .5,
+            backoff_jitter = .5,
+            retry_after_max = MAX_BACKOFF_SECONDS
         )
 
         adapter = HTTPAdapter(max_retries=retry_strategy)
 
-        self.session = requests.Session()
-        self.session.verify = verify_ssl
-        self.session.mount("https://", adapter)
+        session = requests.Session()
+        session.verify = self._verify_ssl
+        session.mount("https://", adapter)
+
+        return session
+
+    def reset_session(self):
+        '''
+        Closes the pooled connections of the sink and creates a new HTTP session, e.g. after
+        restoring the execution environment from a snapshot, where open connections are stale.
+        '''
+        self.session.close()
+        self.session = self._create_session()
+
+    def get_api_key(self, force_fetch: bool = False):
+        '''
+        Returns the Dynatrace API Key from SSM. It's cached for 2 mins, use force_fetch to refresh it.
+        '''
+        return parameters.get_parameter(
+            self._api_key_parameter, max_age=120, decrypt=True, force_fetch=force_fetch)
+
+    def warm_up(self, open_connection: bool = True):
+        '''
+        Fetches the API Key from SSM and opens a connection to the Dynatrace environment, so the first
+        POST doesn't pay for the SSM request, DNS resolution and TCP and TLS handshakes. Errors are logged
+        and ignored, the regular ingestion path will retry them.
+        '''
+        try:
+            self.get_api_key(force_fetch=True)
+        except Exception:
+            logger.exception("Unable to fetch the API Key for %s", self._environment_url)
+
+        if open_connection:
+            try:
+                # The response is irrelevant (no credentials are sent), the connection stays in the pool
+                self.session.head(self._environment_url + LOGV2_API_URL_SUFFIX, headers=default_headers,
+                                  timeout=(DYNATRACE_CONNECT_TIMEOUT, DYNATRACE_READ_TIMEOUT),
+                                  allow_redirects=False)
+            except requests.exceptions.RequestException:
+                logger.warning("Unable to open a connection to %s", self._environment_url, exc_info=True)
 
     def get_num_of_buffered_messages(self):
         return len(self._messages)
@@ -94,68 +300,277 @@ class DynatraceSink():
     def get_size_of_buffered_messages(self):
         return self._approx_buffered_messages_size
 
+    def is_available(self):
+        '''
+        Returns False while the circuit breaker of the sink is open
+        '''
+        return self.circuit_breaker.allow_request()
+
     def is_empty(self):
         return self.get_num_of_buffered_messages() <= 0
 
     def get_environment_url(self):
         return self._environment_url
 
-    def set_s3_source(self, bucket: str, key: str):
-        self._s3_source = f"{bucket}/{key}"
+    def get_sink_id(self):
+        return self._sink_id
 
-    def push(self, message: dict):
-        # Validate that the message size doesn't reach DT limits. If so,
-        # truncate the "content" field.
+    def get_ingestion_ack_times(self, message_id: str = None):
+        '''
+        Returns the POSIX timestamps when Dynatrace acknowledged the first and last batches of the
+        current log object (or with log entries of the given SQS message when coalescing batches),
+        or (None, None) if no batch was acknowledged
+        '''
+        if message_id is not None:
+            return self._message_ack_times.get(message_id, (None, None))
+        return self._first_ack_time, self._last_ack_time
 
-        self.check_log_message_size_and_truncate(message)
+    def start_message(self, message_id: str):
+        '''
+        Tracks the log entries pushed from now on as coming from the given SQS message (None to stop
+        tracking), to fail exactly the messages with log entries in failed batches when coalescing
+        batches across log objects
+        '''
+        self._current_message_id = message_id
+        self._current_message_start = len(self._messages)
+        self._current_message_start_size = self._approx_buffered_messages_size
+        if message_id is not None:
+            self.stage_timer.reset()
 
-        # Check if we'd be exceeding limits before appending the message
-        new_message_size = sys.getsizeof(json.dumps(message).encode(ENCODING))
-        new_num_of_buffered_messages = self.get_num_of_buffered_messages() + 1
-        new_approx_size_of_buffered_messages = (
-                    self._approx_buffered_messages_size + new_message_size + COMMA_SEPARATOR_LENGTH)
+    def discard_message(self, message_id: str):
+        '''
+        Drops the buffered log entries of the given SQS message (e.g. because its processing failed and
+        it will be retried)
+        '''
+        if message_id is None or message_id != self._current_message_id:
+            return
+
+        del self._messages[self._current_message_start:]
+        self._approx_buffered_messages_size = self._current_message_start_size
+        self._buffered_message_ids.discard(message_id)
+
+    def pop_failed_message_ids(self) -> set:
+        '''
+        Returns the SQS messages with log entries in batches that failed since the last call
+        '''
+        failed_message_ids = self._failed_message_ids
+        self._failed_message_ids = set()
+        return failed_message_ids
+
+    def set_s3_source(self, bucket: str, key: str):
+        self._s3_source = f"{bucket}/{key}"
+
+    def push(self, message):
+        '''
+        Buffers a log message, already serialized with serialize_log_message() or a dict, which is
+        truncated to the Dynatrace limits and serialized here.
+        '''
+        if not isinstance(message, SerializedLogMessage):
+            self.stage_timer.start('Serialization')
+            message = serialize_log_message(message)
+            self.stage_timer.stop()
 
-        # If we'd exceed limits, flush before buffering
-        if ( new_num_of_buffered_messages > DYNATRACE_LOG_INGEST_MAX_ENTRIES_COUNT or
-             new_approx_size_of_buffered_messages > DYNATRACE_LOG_INGEST_PAYLOAD_MAX_SIZE ):
-            self.flush()
-            self._batch_num += 1
+        # If we'd exceed the (adaptive) batch limits, flush before buffering
+        if self.is_full(message):
+            self.flush_batch()
 
         # buffer log messages
         self._messages.append(message)
-        self._approx_buffered_messages_size += new_message_size + COMMA_SEPARATOR_LENGTH
+        self._approx_buffered_messages_size += message.size + COMMA_SEPARATOR_LENGTH
+        if self._current_message_id is not None:
+            self._buffered_message_ids.add(self._current_message_id)
+
+    def is_full(self, message: SerializedLogMessage) -> bool:
+        '''
+        Returns whether buffering the message would exceed the batch limits, so the buffered batch
+        must be flushed first
+        '''
+        batch_entries_limit, batch_bytes_limit = self.flow_control.get_batch_limits()
+        return (self.get_num_of_buffered_messages() + 1 > batch_entries_limit or
+                self._approx_buffered_messages_size + message.size + COMMA_SEPARATOR_LENGTH > batch_bytes_limit)
+
+    def flush_batch(self):
+        '''
+        Flushes the buffered batch and starts the next one
+        '''
+        self.flush()
+        self._batch_num += 1
 
     def flush(self):
         if not self.is_empty():
-            self.ingest_logs(self._messages, batch_num=self._batch_num,session=self.session)
+            batch_message_ids = self._buffered_message_ids
+            try:
+                acknowledged = self.ingest_logs(self._messages, batch_num=self._batch_num,session=self.session)
+            except Exception:
+                if not batch_message_ids:
+                    raise
+                # Fail the SQS messages with log entries in the batch. The processing of the current
+                # message only stops if it has entries in the batch.
+                self._failed_message_ids.update(batch_message_ids)
+                self._clear_buffer()
+                if self._current_message_id in batch_message_ids:
+                    raise
+                logger.exception("%s: Failed to post batch %d with log entries of SQS messages %s",
+                                 self._sink_id, self._batch_num, ', '.join(sorted(batch_message_ids)))
+                return
+
+            if acknowledged:
+                for message_id in batch_message_ids:
+                    first_ack_time, _ = self._message_ack_times.get(message_id, (None, None))
+                    self._message_ack_times[message_id] = (first_ack_time or self._last_ack_time, self._last_ack_time)
+
+        self._clear_buffer()
+
+    def _clear_buffer(self):
         self._messages = []
         self._approx_buffered_messages_size = LIST_BRACKETS_LENGTH
+        self._buffered_message_ids = set()
+        self._current_message_start = 0
+        self._current_message_start_size = LIST_BRACKETS_LENGTH
 
     def empty_sink(self):
         self._messages = []
         self._approx_buffered_messages_size = LIST_BRACKETS_LENGTH
         self._batch_num = 1
         self._s3_source = ""
+        self.stage_timer.reset()
+        self._first_ack_time = None
+        self._last_ack_time = None
+        self._current_message_id = None
+        self._buffered_message_ids = set()
+        self._failed_message_ids = set()
+        self._message_ack_times = {}
+        self._current_message_start = 0
+        self._current_message_start_size = LIST_BRACKETS_LENGTH
+
+    def emit_stage_timing_metrics(self, processing_rule_name: str):
+        '''
+        Emits the time spent on each stage (serialization, compression, HTTP POST) for the current
+        log object with the processing_rule and sink dimensions.
+        '''
+        self.stage_timer.emit_metrics({'processing_rule': processing_rule_name, 'sink': self._sink_id})
+
+    def _spool_batch(self, payload: bytes, batch_num: int) -> bool:
+        '''
+        Stores a throttled batch in the spool to replay it later. Returns False if there's no spool
+        or the batch couldn't be stored.
+        '''
+        if self.spool is None:
+            return False
+
+        try:
+            key = self.spool.put(self._sink_id, payload)
+        except Exception:
+            logger.exception("%s: Unable to spool batch %d. Source file: %s", self._sink_id, batch_num, self._s3_source)
+            return False
+
+        self._spool_empty_until = 0.0
+        logger.warning("%s: Spooled batch %d (%d bytes) to %s to replay it later. Source file: %s",
+                       self._sink_id, batch_num, len(payload), key, self._s3_source)
+        add_metric(name='DynatraceBatchesSpooled', unit=MetricUnit.Count, value=1)
+        return True
+
+    def replay_spooled_batches(self, lambda_context=None,
+                               max_batches: int = spool.SPOOL_MAX_REPLAYS_PER_INVOCATION) -> int:
+        '''
+        POSTs the batches in the spool of the sink, oldest first, claiming each one first so concurrent
+        execution environments don't POST it too, and deleting them once acknowledged. A batch that
+        fails is released and stops the replay, which also stops when the remaining execution time is
+        below SPOOL_REPLAY_REMAINING_TIME_LIMIT. Returns the number of batches replayed.
+        '''
+        if self.spool is None or not self.is_available():
+            return 0
+
+        # Listing the spool is a request per sink and invocation, skipped for a while once found empty
+        if time.monotonic() < self._spool_empty_until:
+            return 0
+
+        spooled_batches = self.spool.list(self._sink_id, max_batches)
+        if not spooled_batches:
+            self._spool_empty_until = time.monotonic() + spool.SPOOL_EMPTY_LIST_TTL
+            return 0
+
+        replayed_batches = 0
+        for spooled_batch in spooled_batches:
+            if (lambda_context is not None and
+                    lambda_context.get_remaining_time_in_millis() <= SPOOL_REPLAY_REMAINING_TIME_LIMIT):
+                break
+
+            # Dynatrace would drop all the records of the batch
+            if time.time() - spooled_batch.created_time > DYNATRACE_LOG_INGEST_MAX_RECORD_AGE:
+                logger.warning("%s: Discarding spooled batch %s, older than %d seconds",
+                               self._sink_id, spooled_batch.key, DYNATRACE_LOG_INGEST_MAX_RECORD_AGE)
+                add_metric(name='DynatraceSpooledBatchesExpired', unit=MetricUnit.Count, value=1)
+                self.spool.delete(spooled_batch.key)
+                continue
+
+            payload = self.spool.claim(spooled_batch.key)
+            if payload is None:
+                continue
+
+            try:
+                resp = self._send_payload(self.get_api_key(), payload, self.session)
+            except Exception:
+                self.spool.release(spooled_batch.key)
+                raise
+
+            if resp.status_code not in (200, 204, 400):
+                logger.warning("%s: Replaying spooled batch %s failed with HTTP %d, retrying later",
+                               self._sink_id, spooled_batch.key, resp.status_code)
+                self.spool.release(spooled_batch.key)
+                break
+
+            self.spool.delete(spooled_batch.key)
+            replayed_batches += 1
+            add_metric(name='DynatraceSpooledBatchesReplayed', unit=MetricUnit.Count, value=1)
+
+        if replayed_batches:
+            logger.info("%s: Replayed %d spooled batches", self._sink_id, replayed_batches)
+
+        return replayed_batches
+
+    def _record_unavailability(self):
+        if self.circuit_breaker.record_failure():
+            add_metric(name='DynatraceCircuitBreakerOpened', unit=MetricUnit.Count, value=1)
 
     def check_log_message_size_and_truncate(self, message: dict):
+        return truncate_log_message(message)
+
+    def compress_batch(self, data: bytes) -> bytes:
+        '''
+        Compresses a serialized batch with gzip
+        '''
+        self.stage_timer.start('Compression')
+        compressed_data = gzip.compress(data, compresslevel=6)
+        self.stage_timer.stop()
+        memory.sample('Compression')
+        return compressed_data
+
+    def _serialize_and_compress_batch(self, logs: list):
         '''
-        Gets a Dynatrace LogMessageJson object. If message size exceeds Dynatrace limit, returns
-        truncated message.
+        Returns the compressed batch and its uncompressed size
         '''
-        if len(message['content']) > DYNATRACE_LOG_INGEST_CONTENT_MAX_LENGTH:
-            trimmed_length = DYNATRACE_LOG_INGEST_CONTENT_MAX_LENGTH - \
-                len(DYNATRACE_LOG_INGEST_CONTENT_MARK_TRIMMED)
-            message['content'] = message['content'][0:trimmed_length] + \
-                DYNATRACE_LOG_INGEST_CONTENT_MARK_TRIMMED
-            metrics.add_metric(name='LogMessagesTrimmed',
-                               unit=MetricUnit.Count, value=1)
-        return message
+        self.stage_timer.start('Serialization')
+        data = serialize_batch(logs)
+        self.stage_timer.stop()
+        memory.sample('Serialization')
+        return self.compress_batch(data), len(data)
 
     def post_logsv2(self, dt_url, dt_api_key, data,
                     compress=True, session=None):
         '''
         Does an HTTP POST request to the Logs V2 API. Compresses data by default.
         '''
+        if compress:
+            data = self.compress_batch(data)
+
+        return self.post_payload(dt_url, dt_api_key, data, gzip_encoded=compress, session=session)
+
+    def post_payload(self, dt_url, dt_api_key, payload: bytes, gzip_encoded: bool = True, session=None):
+        '''
+        Does an HTTP POST request to the Logs V2 API with an already serialized (and compressed if
+        gzip_encoded) batch.
+        '''
 
         if session is None:
             session = requests.Session()
@@ -167,33 +582,70 @@ class DynatraceSink():
             'Content-Type': 'application/json; charset=utf-8'
         })
 
-
-        request_data = data
-
-        if compress:
-            request_data = gzip.compress(data, compresslevel=6)
+        if gzip_encoded:
             headers['Content-Encoding'] = 'gzip'
 
+        tracing.get_current_span().set_attribute('batch.compressed_bytes', len(payload))
+
+        self.stage_timer.start('HTTPPost')
         try:
-            resp = session.post(dt_url, data=request_data, headers=headers,
+            resp = session.post(dt_url, data=payload, headers=headers,
                                 timeout=(DYNATRACE_CONNECT_TIMEOUT, DYNATRACE_READ_TIMEOUT))
         except Exception:
             logger.exception('Error pushing logs to Dynatrace')
             raise
+        finally:
+            self.stage_timer.stop()
+
+        retries = getattr(resp.raw, 'retries', None)
+        if isinstance(retries, Retry):
+            tracing.get_current_span().set_attribute('http.retries', len(retries.history))
 
         return resp
 
+    def _send_payload(self, dt_api_key, payload: bytes, session):
+        '''
+        POSTs a compressed batch under the flow control and circuit breaker of the sink
+        '''
+        # Wait for the backoff after throttling
+        backoff_time = self.flow_control.wait_for_backoff()
+        if backoff_time > 0:
+            add_metric(name='DynatraceBackoffTime', unit=MetricUnit.Seconds, value=backoff_time)
+
+        post_start_time = time.perf_counter()
+        try:
+            # https://github.com/requests/requests-threads
+            resp = self.post_payload(self._environment_url + LOGV2_API_URL_SUFFIX,
+                                     dt_api_key, payload, session=session)
+        except Exception as exception:
+            self.flow_control.on_error()
+            if isinstance(exception, requests.exceptions.RequestException):
+                self._record_unavailability()
+            raise
+
+        if resp.status_code >= 500:
+            self._record_unavailability()
+        else:
+            self.circuit_breaker.record_success()
+
+        self.flow_control.on_response(resp.status_code, time.perf_counter() - post_start_time,
+                                      resp.headers.get('Retry-After'), get_throttled_retries(resp))
+        return resp
+
+    @tracing.traced('DynatraceIngest')
     def ingest_logs(self, logs: list, session=None,
                     batch_num: int = -1):
         '''
         POSTs list of messages to the generic log ingress Dynatrace API.
-        Creates batches if messages exceed LogV2 specifications.
-        Returns a list of failed batch numbers.
+        Returns True if Dynatrace acknowledged the batch, or False if it was throttled and stored in
+        the spool to replay it later. Raises an exception if it fails.
         '''
 
+        if not self.circuit_breaker.allow_request():
+            raise DynatraceSinkUnavailable(f"Circuit breaker of sink {self._sink_id} is open")
+
         # Pull API Key from SSM / Cache for 2 mins
-        dt_api_key = parameters.get_parameter(
-            self._api_key_parameter, max_age=120, decrypt=True)
+        dt_api_key = self.get_api_key()
 
         tenant_id = extract_tenant_id_from_url(self._environment_url)
 
@@ -203,59 +655,80 @@ class DynatraceSink():
         if session is None:
             session = self.session
 
-        data = json.dumps(logs).encode(ENCODING)
-
-        # POST to dynatrace
         start_time = time.time()
 
-        # https://github.com/requests/requests-threads
-        resp = self.post_logsv2(self._environment_url + LOGV2_API_URL_SUFFIX,
-                                dt_api_key, data, session=session)
+        # The same batch may have been compressed by another sink
+        payload, data_size, shared = compressed_batches.get_or_compress(
+            logs, lambda: self._serialize_and_compress_batch(logs))
+        if shared:
+            add_metric(name='DynatraceSharedCompressedBatches', unit=MetricUnit.Count, value=1)
+
+        ingest_span = tracing.get_current_span()
+        ingest_span.set_attribute('dynatrace.sink', self._sink_id)
+        ingest_span.set_attribute('batch.num', batch_num)
+        ingest_span.set_attribute('batch.records', len(logs))
+        ingest_span.set_attribute('batch.bytes', data_size)
+
+        resp = self._send_payload(dt_api_key, payload, session)
+        ingest_span.set_attribute('http.status_code', resp.status_code)
+
+        # Batches are acknowledged even if some of their log entries are invalid (200 and 400)
+        if resp.status_code in (200, 204, 400):
+            self._last_ack_time = time.time()
+            if self._first_ack_time is None:
+                self._first_ack_time = self._last_ack_time
 
         if resp.status_code == 204:
             logger.debug('%s: Successfully posted batch %d. Ingested %.2f KB of log data to Dynatrace',
-                         tenant_id, batch_num, (len(data) / 1024))
-            metrics.add_metric(name='DynatraceHTTP204Success',
-                               unit=MetricUnit.Count, value=1)
+                         tenant_id, batch_num, (data_size / 1024))
+            add_metric(name='DynatraceHTTP204Success',
+                       unit=MetricUnit.Count, value=1)
         elif resp.status_code == 200:
             logger.warning(
                 '%s: Parts of batch %s were not successfully posted: %s. Source file: %s',tenant_id, batch_num, resp.text, self._s3_source)
-            metrics.add_metric(
+            add_metric(
                 name='DynatraceHTTP200PartialSuccess', unit=MetricUnit.Count, value=1)
         elif resp.status_code == 400:
             logger.warning(
                 '%s: Parts of batch %s were not successfully posted: %s. Source file: %s',tenant_id, batch_num, resp.text, self._s3_source)
-            metrics.add_metric(
+            add_metric(
                 name='DynatraceHTTP400InvalidLogEntries', unit=MetricUnit.Count, value=1)
         elif resp.status_code == 429:
             logger.error("%s: Throttled by Dynatrace. Exhausted retry attempts... Source file: %s", tenant_id, self._s3_source)
-            metrics.add_metric(name='DynatraceHTTP429Throttled',unit=MetricUnit.Count, value=1)
-            metrics.add_metric(name='DynatraceHTTPErrors', unit=MetricUnit.Count, value=1)
+            add_metric(name='DynatraceHTTP429Throttled',unit=MetricUnit.Count, value=1)
+            add_metric(name='DynatraceHTTPErrors', unit=MetricUnit.Count, value=1)
+            if self._spool_batch(payload, batch_num):
+                return False
             raise DynatraceThrottlingException
         elif resp.status_code == 503:
             logger.error("%s: Usable space limit reached. Exhausted retry attempts... Source file: %s", tenant_id, self._s3_source)
-            metrics.add_metric(name='DynatraceHTTP503SpaceLimitReached',unit=MetricUnit.Count, value=1)
-            metrics.add_metric(name='DynatraceHTTPErrors', unit=MetricUnit.Count, value=1)
+            add_metric(name='DynatraceHTTP503SpaceLimitReached',unit=MetricUnit.Count, value=1)
+            add_metric(name='DynatraceHTTPErrors', unit=MetricUnit.Count, value=1)
+            if self._spool_batch(payload, batch_num):
+                return False
             raise DynatraceThrottlingException
         else:
             logger.error(
                 "%s: There was a HTTP %d error posting batch %d to Dynatrace. %s. Source file: %s",
                 tenant_id,resp.status_code, batch_num, resp.text, self._s3_source)
-            metrics.add_metric(name='DynatraceHTTPErrors',
-                               unit=MetricUnit.Count, value=1)
+            add_metric(name='DynatraceHTTPErrors',
+                       unit=MetricUnit.Count, value=1)
             raise DynatraceIngestionException
 
-        metrics.add_metric(name='UncompressedLogDTPayloadSize',
-                           unit=MetricUnit.Bytes, value=sys.getsizeof(data))
+        add_metric(name='UncompressedLogDTPayloadSize',
+                   unit=MetricUnit.Bytes, value=data_size)
 
         end_time = time.time()
-        metrics.add_metric(name='DTIngestionTime',
-                           unit=MetricUnit.Seconds, value=(end_time - start_time))
+        add_metric(name='DTIngestionTime',
+                   unit=MetricUnit.Seconds, value=(end_time - start_time))
 
+        return True
 
-def load_sinks():
+
+def load_sinks(warm_up: bool = False):
     '''
-    Loads all configured sinks on environment variables. Returns a dict of sinks:
+    Loads all configured sinks on environment variables. If warm_up is True, fetches the API Key and
+    opens a connection to each Dynatrace environment. Returns a dict of sinks:
     {
         'sink1': DynatraceSink,
         'sink2': DynatraceSink
@@ -273,18 +746,129 @@ def load_sinks():
             if os.environ.get(f'DYNATRACE_{sink_id}_API_KEY_PARAM'):
                 dt_url = v
                 dt_api_key_parameter = os.environ[f'DYNATRACE_{sink_id}_API_KEY_PARAM']
-                sinks[sink_id] = DynatraceSink(dt_url, dt_api_key_parameter, verify_ssl)
+                sinks[sink_id] = DynatraceSink(dt_url, dt_api_key_parameter, verify_ssl, sink_id=sink_id)
             else:
                 logging.warning("No API key configured for sink id %s", sink_id)
 
+    if warm_up:
+        for sink in sinks.values():
+            sink.warm_up()
+
     return sinks
 
+
+def set_spool(sinks: dict, batch_spool):
+    '''
+    Sets the spool of the batches throttled by Dynatrace (or None to disable it) on all the sinks
+    '''
+    for sink in sinks.values():
+        sink.spool = batch_spool
+        sink._spool_empty_until = 0.0
+
+
+def replay_spooled_batches(sinks: dict, lambda_context=None):
+    '''
+    Replays the spooled batches of all the sinks. Errors are logged, the batches are replayed later.
+    '''
+    for sink in sinks.values():
+        try:
+            sink.replay_spooled_batches(lambda_context)
+        except Exception:
+            logger.exception("%s: Unable to replay spooled batches", sink.get_sink_id())
+
+
+def start_message(sinks: dict, message_id: str):
+    '''
+    Tracks the log entries pushed to the sinks from now on as coming from the given SQS message
+    '''
+    for sink in sinks.values():
+        sink.start_message(message_id)
+
+
+def discard_message(sinks: dict, message_id: str):
+    '''
+    Drops the log entries of the given SQS message buffered in the sinks
+    '''
+    for sink in sinks.values():
+        sink.discard_message(message_id)
+
+
+def flush_sinks(sinks: dict) -> set:
+    '''
+    Flushes the batches buffered across log objects in all the sinks. Returns the SQS messages with
+    log entries in failed batches.
+    '''
+    for sink in sinks.values():
+        sink.start_message(None)
+    flush_sinks_concurrently(list(sinks.values()))
+
+    failed_message_ids = set()
+    for sink in sinks.values():
+        failed_message_ids.update(sink.pop_failed_message_ids())
+    return failed_message_ids
+
+
+_flush_executor = None
+
+
+def get_flush_executor() -> ThreadPoolExecutor:
+    '''
+    Returns the executor shared by all the sinks to flush them concurrently, created on first use
+    '''
+    global _flush_executor
+
+    if _flush_executor is None:
+        _flush_executor = ThreadPoolExecutor(max_workers=DYNATRACE_FLUSH_MAX_WORKERS,
+                                             thread_name_prefix='dynatrace-flush')
+    return _flush_executor
+
+
+def flush_sinks_concurrently(sinks: list, next_batch: bool = False):
+    '''
+    Flushes the given sinks concurrently in the flush executor (starting their next batch if
+    next_batch is True) and waits for all of them. Each sink handles the failures of its own
+    batches as if flushed alone. If a single sink fails, its exception is raised; if several fail,
+    a DynatraceFlushException with all of them.
+    '''
+    flushes = [(sink, sink.flush_batch if next_batch else sink.flush) for sink in sinks]
+
+    if len(sinks) <= 1 or DYNATRACE_FLUSH_MAX_WORKERS <= 1:
+        for _, flush in flushes:
+            flush()
+        return
+
+    # Run each flush in a copy of the current context, so its trace spans are children of the current span
+    futures = [(sink, get_flush_executor().submit(contextvars.copy_context().run, flush))
+               for sink, flush in flushes]
+
+    exceptions = {}
+    for sink, future in futures:
+        exception = future.exception()
+        if exception is not None:
+            exceptions[sink.get_sink_id()] = exception
+
+    if len(exceptions) == 1:
+        raise next(iter(exceptions.values()))
+    if exceptions:
+        raise DynatraceFlushException(exceptions) from next(iter(exceptions.values()))
+
 def empty_sinks(sinks:list):
     '''
     Gets a list of DynatraceSink objects and empties its contents
     '''
     for _ , sink in sinks.items():
         sink.empty_sink()
+    compressed_batches.clear()
+
+
+def get_throttled_retries(resp) -> int:
+    '''
+    Returns the number of attempts of the request throttled by Dynatrace and retried by urllib3
+    '''
+    retries = getattr(resp.raw, 'retries', None)
+    if not isinstance(retries, Retry):
+        return 0
+    return sum(1 for attempt in retries.history if attempt.status in THROTTLING_STATUS_CODES)
 
 
 def extract_tenant_id_from_url(environment_url: str):
@@ -301,3 +885,21 @@ class DynatraceThrottlingException(Exception):
 
 class DynatraceIngestionException(Exception):
     pass
+
+
+class DynatraceFlushException(DynatraceIngestionException):
+    '''
+    Raised when flushing several sinks concurrently fails in more than one of them. exceptions has
+    the exception raised by each failed sink id.
+    '''
+
+    def __init__(self, exceptions: dict):
+        super().__init__('Failed to flush sinks ' + ', '.join(
+            f'{sink_id} ({type(exception).__name__})' for sink_id, exception in exceptions.items()))
+        self.exceptions = exceptions
+
+
+class DynatraceSinkUnavailable(DynatraceIngestionException):
+    '''
+    Raised without sending the request while the circuit breaker of the sink is open
+    '''
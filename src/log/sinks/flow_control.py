@@ -0,0 +1,165 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+'''
+Client-side flow control of the POST requests of a Dynatrace sink. The batch size limits are adapted
+with AIMD (additive increase, multiplicative decrease): they grow on each fast, successful POST and are
+halved when Dynatrace throttles (429 / 503, including the ones retried by urllib3), a POST fails or is
+slower than the latency target. After a throttled POST, the next requests wait for the Retry-After
+returned by Dynatrace or an exponential backoff with full jitter, so the concurrent execution
+environments don't retry in lockstep.
+
+The state lives in the sink, so it's kept across invocations of a warm execution environment.
+'''
+
+import email.utils
+import logging
+import os
+import random
+import threading
+import time
+
+logger = logging.getLogger()
+
+THROTTLING_STATUS_CODES = (429, 503)
+
+ADAPTIVE_FLOW_CONTROL = os.getenv('DYNATRACE_ADAPTIVE_FLOW_CONTROL', 'true') != 'false'
+
+try:
+    POST_LATENCY_TARGET = int(os.getenv('DYNATRACE_POST_LATENCY_TARGET_MS')) / 1000
+except (ValueError, TypeError):
+    POST_LATENCY_TARGET = 8
+
+# Batches don't shrink below these limits
+MIN_BATCH_ENTRIES = 100
+MIN_BATCH_BYTES = 131072  # 128 KB
+
+# Fraction of the maximum limits added on each successful POST
+ADDITIVE_INCREASE_FRACTION = 0.1
+MULTIPLICATIVE_DECREASE_FACTOR = 0.5
+
+BACKOFF_BASE_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 10
+
+
+def parse_retry_after(retry_after):
+    '''
+    Returns the seconds to wait from a Retry-After header value (seconds or HTTP date), or None
+    '''
+    if not retry_after:
+        return None
+
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveFlowControl():
+    '''
+    Batch size limits and backoff of the POST requests of a sink
+    '''
+
+    def __init__(self, max_batch_entries: int, max_batch_bytes: int,
+                 adaptive: bool = ADAPTIVE_FLOW_CONTROL, latency_target: float = POST_LATENCY_TARGET):
+        self.max_batch_entries = max_batch_entries
+        self.max_batch_bytes = max_batch_bytes
+        self.adaptive = adaptive
+        self.latency_target = latency_target
+
+        self.batch_entries_limit = max_batch_entries
+        self.batch_bytes_limit = max_batch_bytes
+
+        self._consecutive_throttles = 0
+        self._backoff_until = 0.0
+        self._lock = threading.Lock()
+
+    def get_batch_limits(self):
+        '''
+        Returns the current maximum number of entries and bytes of a batch
+        '''
+        return self.batch_entries_limit, self.batch_bytes_limit
+
+    def wait_for_backoff(self) -> float:
+        '''
+        Waits until the backoff after a throttled request is over. Returns the seconds waited.
+        '''
+        with self._lock:
+            backoff = self._backoff_until - time.monotonic()
+        if backoff <= 0:
+            return 0.0
+
+        time.sleep(backoff)
+        return backoff
+
+    def on_response(self, status_code: int, latency: float, retry_after=None, throttled_retries: int = 0):
+        '''
+        Adapts the limits to the response of a POST request: status code, latency in seconds, Retry-After
+        header and number of throttled attempts retried by the HTTP adapter
+        '''
+        if not self.adaptive:
+            return
+
+        with self._lock:
+            if status_code in THROTTLING_STATUS_CODES:
+                self._consecutive_throttles += 1
+                self._decrease()
+                self._back_off(parse_retry_after(retry_after))
+            elif throttled_retries > 0 or latency > self.latency_target:
+                self._consecutive_throttles = 0
+                self._decrease()
+            else:
+                self._consecutive_throttles = 0
+                self._increase()
+
+    def on_error(self):
+        '''
+        Adapts the limits to a POST request that failed without a response (e.g. timeouts)
+        '''
+        if not self.adaptive:
+            return
+
+        with self._lock:
+            self._consecutive_throttles += 1
+            self._decrease()
+            self._back_off(None)
+
+    def _increase(self):
+        self.batch_entries_limit = min(
+            self.max_batch_entries,
+            self.batch_entries_limit + int(self.max_batch_entries * ADDITIVE_INCREASE_FRACTION))
+        self.batch_bytes_limit = min(
+            self.max_batch_bytes,
+            self.batch_bytes_limit + int(self.max_batch_bytes * ADDITIVE_INCREASE_FRACTION))
+
+    def _decrease(self):
+        self.batch_entries_limit = max(min(MIN_BATCH_ENTRIES, self.max_batch_entries),
+                                       int(self.batch_entries_limit * MULTIPLICATIVE_DECREASE_FACTOR))
+        self.batch_bytes_limit = max(min(MIN_BATCH_BYTES, self.max_batch_bytes),
+                                     int(self.batch_bytes_limit * MULTIPLICATIVE_DECREASE_FACTOR))
+        logger.debug("Decreased batch limits to %d entries / %d bytes",
+                     self.batch_entries_limit, self.batch_bytes_limit)
+
+    def _back_off(self, retry_after):
+        # Full jitter: a random wait up to the exponential backoff, or the Retry-After if longer
+        exponential_backoff = min(MAX_BACKOFF_SECONDS, BACKOFF_BASE_SECONDS * 2 ** self._consecutive_throttles)
+        backoff = random.uniform(0, exponential_backoff)
+        if retry_after is not None:
+            backoff = max(backoff, min(retry_after, MAX_BACKOFF_SECONDS))
+        self._backoff_until = max(self._backoff_until, time.monotonic() + backoff)
@@ -0,0 +1,314 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+'''
+Durable spool of the batches Dynatrace keeps throttling (HTTP 429 or 503 after retries). Instead of
+failing the log object, which would then be downloaded, processed and POST'ed again from the start,
+the compressed batch is stored in the spool and replayed by later invocations. Enabled with
+DYNATRACE_SPOOL_MODE:
+  - disabled (default): throttled batches fail the log object.
+  - s3: batches are stored in DYNATRACE_SPOOL_S3_BUCKET under DYNATRACE_SPOOL_S3_PREFIX.
+  - filesystem: batches are stored in DYNATRACE_SPOOL_DIRECTORY. Only durable while the execution
+    environment lives, meant for tests and local runs.
+
+Batches are stored under <sink id>/<creation time in ms>-<random id>.json.gz and replayed oldest
+first. Batches older than the maximum age of log records accepted by Dynatrace are discarded.
+
+A batch is claimed before replaying it, so concurrent execution environments don't POST it twice,
+and only deleted once Dynatrace acknowledges it. If the replay fails the claim is released; if the
+execution environment dies while holding it, the claim becomes stale after DYNATRACE_SPOOL_CLAIM_TTL
+seconds (default 900, the maximum Lambda timeout) and another execution environment takes it over.
+Execution environments don't list the spool of a sink again for DYNATRACE_SPOOL_EMPTY_LIST_TTL
+seconds after finding it empty, unless they spool a batch themselves.
+'''
+
+import abc
+import logging
+import os
+import time
+import uuid
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger()
+
+SPOOL_MODE_DISABLED = 'disabled'
+SPOOL_MODE_S3 = 's3'
+SPOOL_MODE_FILESYSTEM = 'filesystem'
+
+SPOOL_MODE = os.getenv('DYNATRACE_SPOOL_MODE', SPOOL_MODE_DISABLED)
+SPOOL_S3_BUCKET = os.getenv('DYNATRACE_SPOOL_S3_BUCKET') or None
+SPOOL_S3_PREFIX = os.getenv('DYNATRACE_SPOOL_S3_PREFIX', 'dynatrace-aws-s3-log-forwarder/spool/')
+SPOOL_DIRECTORY = os.getenv('DYNATRACE_SPOOL_DIRECTORY', '/tmp/spool')
+
+try:
+    SPOOL_MAX_REPLAYS_PER_INVOCATION = int(os.getenv('DYNATRACE_SPOOL_MAX_REPLAYS_PER_INVOCATION'))
+except (ValueError, TypeError):
+    SPOOL_MAX_REPLAYS_PER_INVOCATION = 20
+
+try:
+    SPOOL_EMPTY_LIST_TTL = int(os.getenv('DYNATRACE_SPOOL_EMPTY_LIST_TTL'))
+except (ValueError, TypeError):
+    SPOOL_EMPTY_LIST_TTL = 60
+
+try:
+    SPOOL_CLAIM_TTL = int(os.getenv('DYNATRACE_SPOOL_CLAIM_TTL'))
+except (ValueError, TypeError):
+    SPOOL_CLAIM_TTL = 900
+
+SPOOLED_BATCH_SUFFIX = '.json.gz'
+CLAIMED_BATCH_SUFFIX = '.claim'
+
+# S3 error codes of missing objects and of conditional writes that lost a race
+NOT_FOUND_ERROR_CODES = ('404', 'NoSuchKey')
+CONDITIONAL_WRITE_ERROR_CODES = ('PreconditionFailed', 'ConditionalRequestConflict', '412', '409')
+
+
+class SpooledBatch():
+    '''
+    Reference to a batch stored in the spool
+    '''
+
+    def __init__(self, key: str):
+        self.key = key
+        self.created_time = get_batch_created_time(key)
+
+
+def get_batch_name() -> str:
+    return f'{int(time.time() * 1000):013d}-{uuid.uuid4().hex}{SPOOLED_BATCH_SUFFIX}'
+
+
+def get_batch_created_time(key: str) -> float:
+    '''
+    Returns the creation time of a spooled batch as a POSIX timestamp from its name
+    '''
+    try:
+        return int(key.rsplit('/', 1)[-1].split('-', 1)[0]) / 1000
+    except ValueError:
+        return 0.0
+
+
+class BatchSpool(abc.ABC):
+    '''
+    Store of compressed batches per sink
+    '''
+
+    @abc.abstractmethod
+    def put(self, sink_id: str, payload: bytes) -> str:
+        '''
+        Stores a compressed batch of the sink, returns its key
+        '''
+
+    @abc.abstractmethod
+    def list(self, sink_id: str, max_batches: int) -> list:
+        '''
+        Returns up to max_batches SpooledBatch of the sink, oldest first
+        '''
+
+    @abc.abstractmethod
+    def get(self, key: str) -> bytes:
+        pass
+
+    @abc.abstractmethod
+    def claim(self, key: str):
+        '''
+        Claims a batch to replay it and returns its payload, or None if another execution environment
+        holds a claim that isn't stale or the batch doesn't exist anymore
+        '''
+
+    @abc.abstractmethod
+    def release(self, key: str):
+        '''
+        Releases the claim of a batch that failed to replay, so it's replayed later
+        '''
+
+    @abc.abstractmethod
+    def delete(self, key: str):
+        '''
+        Deletes a batch and its claim
+        '''
+
+
+class FileSystemBatchSpool(BatchSpool):
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def put(self, sink_id: str, payload: bytes) -> str:
+        sink_directory = os.path.join(self.directory, sink_id)
+        os.makedirs(sink_directory, exist_ok=True)
+        key = os.path.join(sink_directory, get_batch_name())
+
+        # Write to a temporary file first, so partially written batches are never replayed
+        with open(key + '.tmp', 'wb') as f:
+            f.write(payload)
+        os.replace(key + '.tmp', key)
+        return key
+
+    def list(self, sink_id: str, max_batches: int) -> list:
+        sink_directory = os.path.join(self.directory, sink_id)
+        if not os.path.isdir(sink_directory):
+            return []
+
+        names = sorted(name for name in os.listdir(sink_directory) if name.endswith(SPOOLED_BATCH_SUFFIX))
+        return [SpooledBatch(os.path.join(sink_directory, name)) for name in names[:max_batches]]
+
+    def get(self, key: str) -> bytes:
+        with open(key, 'rb') as f:
+            return f.read()
+
+    def claim(self, key: str):
+        if not self._take_claim(key + CLAIMED_BATCH_SUFFIX):
+            return None
+
+        try:
+            return self.get(key)
+        except FileNotFoundError:
+            # Already replayed by another execution environment
+            self.release(key)
+            return None
+
+    def _take_claim(self, claim_key: str) -> bool:
+        for _ in range(2):
+            # Creating the file exclusively is atomic, only one execution environment succeeds
+            try:
+                os.close(os.open(claim_key, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                pass
+
+            try:
+                if time.time() - os.path.getmtime(claim_key) <= SPOOL_CLAIM_TTL:
+                    return False
+                logger.warning("Taking over stale claim %s", claim_key)
+                os.remove(claim_key)
+            except FileNotFoundError:
+                pass
+        return False
+
+    def release(self, key: str):
+        remove_file(key + CLAIMED_BATCH_SUFFIX)
+
+    def delete(self, key: str):
+        remove_file(key)
+        remove_file(key + CLAIMED_BATCH_SUFFIX)
+
+
+class S3BatchSpool(BatchSpool):
+    '''
+    Spool in an S3 bucket. s3_client_getter returns the S3 client to use, so it's only created when needed.
+
+    Batches are claimed with a conditional write (If-None-Match) of a <key>.claim object, which only one
+    execution environment succeeds to create. Stale claims are taken over with a conditional write
+    (If-Match) on their ETag, which only one execution environment succeeds to replace.
+    '''
+
+    def __init__(self, bucket: str, prefix: str, s3_client_getter):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.s3_client_getter = s3_client_getter
+
+    def put(self, sink_id: str, payload: bytes) -> str:
+        key = f'{self.prefix}{sink_id}/{get_batch_name()}'
+        self.s3_client_getter().put_object(Bucket=self.bucket, Key=key, Body=payload)
+        return key
+
+    def list(self, sink_id: str, max_batches: int) -> list:
+        # Keys are listed in lexicographical order, which is the creation order of the batches. Claims
+        # are listed too, so pages are read until there are max_batches batches
+        batches = []
+        paginator = self.s3_client_getter().get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=f'{self.prefix}{sink_id}/'):
+            for s3_object in page.get('Contents', []):
+                if s3_object['Key'].endswith(SPOOLED_BATCH_SUFFIX):
+                    batches.append(SpooledBatch(s3_object['Key']))
+                    if len(batches) >= max_batches:
+                        return batches
+        return batches
+
+    def get(self, key: str) -> bytes:
+        return self.s3_client_getter().get_object(Bucket=self.bucket, Key=key)['Body'].read()
+
+    def claim(self, key: str):
+        if not self._take_claim(key + CLAIMED_BATCH_SUFFIX):
+            return None
+
+        try:
+            return self.get(key)
+        except ClientError as exception:
+            # Already replayed by another execution environment
+            if get_error_code(exception) in NOT_FOUND_ERROR_CODES:
+                self.release(key)
+                return None
+            raise
+
+    def _take_claim(self, claim_key: str) -> bool:
+        s3_client = self.s3_client_getter()
+        # Unique content, so the ETag of each claim is different
+        claim_id = uuid.uuid4().hex.encode('utf-8')
+
+        try:
+            s3_client.put_object(Bucket=self.bucket, Key=claim_key, Body=claim_id, IfNoneMatch='*')
+            return True
+        except ClientError as exception:
+            if get_error_code(exception) not in CONDITIONAL_WRITE_ERROR_CODES:
+                raise
+
+        try:
+            claim = s3_client.head_object(Bucket=self.bucket, Key=claim_key)
+            if time.time() - claim['LastModified'].timestamp() <= SPOOL_CLAIM_TTL:
+                return False
+            s3_client.put_object(Bucket=self.bucket, Key=claim_key, Body=claim_id, IfMatch=claim['ETag'])
+        except ClientError as exception:
+            # Released or taken over by another execution environment meanwhile
+            if get_error_code(exception) in NOT_FOUND_ERROR_CODES + CONDITIONAL_WRITE_ERROR_CODES:
+                return False
+            raise
+
+        logger.warning("Took over stale claim %s", claim_key)
+        return True
+
+    def release(self, key: str):
+        self.s3_client_getter().delete_object(Bucket=self.bucket, Key=key + CLAIMED_BATCH_SUFFIX)
+
+    def delete(self, key: str):
+        s3_client = self.s3_client_getter()
+        s3_client.delete_object(Bucket=self.bucket, Key=key)
+        s3_client.delete_object(Bucket=self.bucket, Key=key + CLAIMED_BATCH_SUFFIX)
+
+
+def get_error_code(exception: ClientError):
+    return exception.response.get('Error', {}).get('Code')
+
+
+def remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def create_spool(s3_client_getter=None):
+    '''
+    Returns the BatchSpool configured with DYNATRACE_SPOOL_MODE, or None if disabled
+    '''
+    if SPOOL_MODE == SPOOL_MODE_S3:
+        if SPOOL_S3_BUCKET is None or s3_client_getter is None:
+            logger.error("DYNATRACE_SPOOL_MODE is s3 but DYNATRACE_SPOOL_S3_BUCKET isn't set, spool disabled")
+            return None
+        return S3BatchSpool(SPOOL_S3_BUCKET, SPOOL_S3_PREFIX, s3_client_getter)
+
+    if SPOOL_MODE == SPOOL_MODE_FILESYSTEM:
+        return FileSystemBatchSpool(SPOOL_DIRECTORY)
+
+    return None
@@ -11,11 +11,16 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
+import functools
 import os
 import yaml
 
 ENCODING = 'utf-8'
 
+# Use the libyaml based loader when PyYAML was built with it, it's several times
+# faster parsing the rule files at cold start. Falls back to the pure Python loader.
+YamlSafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 # Collection of helper regular expressions to describe log key name patterns
 # and extract attributes from it
 
@@ -59,15 +64,17 @@ def get_string_found(params,name):
 
     return ''
 
+@functools.lru_cache(maxsize=None)
 def load_cloudwatch_logs_attribute_mappings() -> dict:
     '''
-    Loads the YAML file with attribute mappings for CloudWatch Logs services
+    Loads the YAML file with attribute mappings for CloudWatch Logs services. The file is
+    only read once per process, the returned dict is shared and must not be modified.
     '''
 
     file = os.path.dirname(__file__) + "/config/cloudwatch_logs_attribute_map.yaml"
 
     with open(file, encoding=ENCODING) as mappings_file:
-        cwl_mappings = yaml.load(mappings_file,Loader=yaml.loader.SafeLoader)
+        cwl_mappings = yaml.load(mappings_file,Loader=YamlSafeLoader)
 
     return cwl_mappings
 
@@ -0,0 +1,243 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+'''
+Idempotency cache of the log objects already forwarded, so duplicate S3 notifications (S3 and
+EventBridge deliver at least once, and SQS redelivers whole batches after timeouts) are skipped
+instead of downloading, processing and ingesting the object again. Objects are identified by bucket,
+key and version id (or ETag if the bucket isn't versioned), so new versions of an object are always
+processed. Enabled with IDEMPOTENCY_CACHE (default true).
+
+Completed objects are kept for IDEMPOTENCY_TTL seconds in an LRU cache of the execution environment
+(up to IDEMPOTENCY_CACHE_SIZE objects) and, optionally, in a store shared by all the execution
+environments configured with IDEMPOTENCY_STORE_MODE:
+  - disabled (default): only the LRU cache of each execution environment.
+  - s3: completed objects are stored in IDEMPOTENCY_S3_BUCKET under IDEMPOTENCY_S3_PREFIX.
+  - filesystem: completed objects are stored in IDEMPOTENCY_DIRECTORY. Only shared while the
+    execution environment lives, meant for tests and local runs.
+
+Errors accessing the store are logged and the object is processed, as forwarding a duplicate is
+better than dropping an object.
+'''
+
+import abc
+import collections
+import hashlib
+import logging
+import os
+import threading
+import time
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger()
+
+IDEMPOTENCY_CACHE = os.getenv('IDEMPOTENCY_CACHE', 'true') == 'true'
+
+STORE_MODE_DISABLED = 'disabled'
+STORE_MODE_S3 = 's3'
+STORE_MODE_FILESYSTEM = 'filesystem'
+
+IDEMPOTENCY_STORE_MODE = os.getenv('IDEMPOTENCY_STORE_MODE', STORE_MODE_DISABLED)
+IDEMPOTENCY_S3_BUCKET = os.getenv('IDEMPOTENCY_S3_BUCKET') or None
+IDEMPOTENCY_S3_PREFIX = os.getenv('IDEMPOTENCY_S3_PREFIX', 'dynatrace-aws-s3-log-forwarder/idempotency/')
+IDEMPOTENCY_DIRECTORY = os.getenv('IDEMPOTENCY_DIRECTORY', '/tmp/idempotency')
+
+try:
+    IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL'))
+except (ValueError, TypeError):
+    IDEMPOTENCY_TTL = 86400
+
+try:
+    IDEMPOTENCY_CACHE_SIZE = int(os.getenv('IDEMPOTENCY_CACHE_SIZE'))
+except (ValueError, TypeError):
+    IDEMPOTENCY_CACHE_SIZE = 10000
+
+
+def get_idempotency_key(s3_notification: dict):
+    '''
+    Returns the key identifying the object version of an S3 notification, or None if the notification
+    has neither a version id nor an ETag
+    '''
+    try:
+        bucket_name = s3_notification['detail']['bucket']['name']
+        s3_object = s3_notification['detail']['object']
+        key_name = s3_object['key']
+    except (KeyError, TypeError):
+        return None
+
+    version = s3_object.get('version-id') or s3_object.get('etag')
+    if not version:
+        return None
+
+    return f'{bucket_name}/{key_name}#{version}'
+
+
+def get_stored_name(idempotency_key: str) -> str:
+    '''
+    Returns the name of a completed object in the stores (object keys can be up to 1024 bytes long
+    and contain any character)
+    '''
+    return hashlib.sha256(idempotency_key.encode('utf-8')).hexdigest()
+
+
+class IdempotencyStore(abc.ABC):
+    '''
+    Store of the completed objects shared by the execution environments
+    '''
+
+    @abc.abstractmethod
+    def get_expiry_time(self, idempotency_key: str):
+        '''
+        Returns until when (POSIX timestamp) the object is completed, or None if not found
+        '''
+
+    @abc.abstractmethod
+    def put(self, idempotency_key: str, expiry_time: float):
+        pass
+
+
+class FileSystemIdempotencyStore(IdempotencyStore):
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def get_expiry_time(self, idempotency_key: str):
+        try:
+            with open(os.path.join(self.directory, get_stored_name(idempotency_key)), 'r', encoding='utf-8') as f:
+                return float(f.read())
+        except FileNotFoundError:
+            return None
+
+    def put(self, idempotency_key: str, expiry_time: float):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, get_stored_name(idempotency_key))
+
+        # Write to a temporary file first, so partially written entries are never read
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(str(expiry_time))
+        os.replace(path + '.tmp', path)
+
+
+class S3IdempotencyStore(IdempotencyStore):
+    '''
+    Store in an S3 bucket, with the expiry time as object metadata (configure a lifecycle rule on the
+    prefix to delete expired entries). s3_client_getter returns the S3 client to use, so it's only
+    created when needed. Without s3:ListBucket on the prefix, S3 answers HEAD requests of missing
+    entries with 403 instead of 404, which is also a miss.
+    '''
+
+    def __init__(self, bucket: str, prefix: str, s3_client_getter):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.s3_client_getter = s3_client_getter
+
+    def get_expiry_time(self, idempotency_key: str):
+        try:
+            response = self.s3_client_getter().head_object(
+                Bucket=self.bucket, Key=f'{self.prefix}{get_stored_name(idempotency_key)}')
+        except ClientError as exception:
+            if exception.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', '403'):
+                return None
+            raise
+        return float(response.get('Metadata', {}).get('expiry-time', 0))
+
+    def put(self, idempotency_key: str, expiry_time: float):
+        self.s3_client_getter().put_object(
+            Bucket=self.bucket, Key=f'{self.prefix}{get_stored_name(idempotency_key)}',
+            Body=idempotency_key.encode('utf-8'), Metadata={'expiry-time': str(expiry_time)})
+
+
+class IdempotencyCache():
+    '''
+    LRU cache of the completed objects of the execution environment, backed by an optional
+    IdempotencyStore
+    '''
+
+    def __init__(self, store: IdempotencyStore = None, ttl: int = IDEMPOTENCY_TTL,
+                 max_size: int = IDEMPOTENCY_CACHE_SIZE):
+        self.store = store
+        self.ttl = ttl
+        self.max_size = max_size
+        self._completed = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_cached_expiry_time(self, idempotency_key: str):
+        with self._lock:
+            expiry_time = self._completed.get(idempotency_key)
+            if expiry_time is not None:
+                self._completed.move_to_end(idempotency_key)
+            return expiry_time
+
+    def _cache(self, idempotency_key: str, expiry_time: float):
+        with self._lock:
+            self._completed[idempotency_key] = expiry_time
+            self._completed.move_to_end(idempotency_key)
+            while len(self._completed) > self.max_size:
+                self._completed.popitem(last=False)
+
+    def is_completed(self, idempotency_key: str) -> bool:
+        now = time.time()
+
+        expiry_time = self._get_cached_expiry_time(idempotency_key)
+        if expiry_time is not None:
+            return expiry_time > now
+
+        if self.store is None:
+            return False
+
+        try:
+            expiry_time = self.store.get_expiry_time(idempotency_key)
+        except Exception:
+            logger.warning("Unable to look up %s in the idempotency store", idempotency_key, exc_info=True)
+            return False
+
+        if expiry_time is None or expiry_time <= now:
+            return False
+
+        self._cache(idempotency_key, expiry_time)
+        return True
+
+    def mark_completed(self, idempotency_key: str):
+        expiry_time = time.time() + self.ttl
+        self._cache(idempotency_key, expiry_time)
+
+        if self.store is not None:
+            try:
+                self.store.put(idempotency_key, expiry_time)
+            except Exception:
+                logger.warning("Unable to store %s in the idempotency store", idempotency_key, exc_info=True)
+
+    def clear(self):
+        with self._lock:
+            self._completed.clear()
+
+
+def create_idempotency_cache(s3_client_getter=None):
+    '''
+    Returns the IdempotencyCache configured with IDEMPOTENCY_CACHE and IDEMPOTENCY_STORE_MODE, or
+    None if disabled
+    '''
+    if not IDEMPOTENCY_CACHE:
+        return None
+
+    store = None
+    if IDEMPOTENCY_STORE_MODE == STORE_MODE_S3:
+        if IDEMPOTENCY_S3_BUCKET is None or s3_client_getter is None:
+            logger.error("IDEMPOTENCY_STORE_MODE is s3 but IDEMPOTENCY_S3_BUCKET isn't set, shared store disabled")
+        else:
+            store = S3IdempotencyStore(IDEMPOTENCY_S3_BUCKET, IDEMPOTENCY_S3_PREFIX, s3_client_getter)
+    elif IDEMPOTENCY_STORE_MODE == STORE_MODE_FILESYSTEM:
+        store = FileSystemIdempotencyStore(IDEMPOTENCY_DIRECTORY)
+
+    return IdempotencyCache(store)
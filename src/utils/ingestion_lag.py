@@ -0,0 +1,107 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+'''
+End-to-end freshness of the forwarded logs: the lag from the creation of the log object in S3 (the
+time of the S3 event notification) until the SQS message is received by the function and until the
+first and last batches of the object are acknowledged by Dynatrace, and the time the message waited in
+the queue according to SQS.
+'''
+
+import logging
+import os
+from datetime import datetime
+from aws_lambda_powertools.metrics import EphemeralMetrics, MetricUnit
+
+logger = logging.getLogger()
+
+
+def get_object_created_time(s3_notification: dict):
+    '''
+    Returns the time of the S3 event notification as a POSIX timestamp, or None if it's missing or
+    invalid (e.g. notifications crafted to reprocess an object)
+    '''
+    try:
+        return datetime.fromisoformat(s3_notification['time']).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def get_receive_count(message: dict):
+    '''
+    Returns the number of times the SQS message has been received, or None if unknown
+    '''
+    try:
+        return int(message['attributes']['ApproximateReceiveCount'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def get_message_attribute_time(message: dict, attribute: str):
+    '''
+    Returns an SQS message timestamp attribute (epoch milliseconds, e.g. SentTimestamp) as a POSIX
+    timestamp, or None if it's missing or invalid
+    '''
+    try:
+        return int(message['attributes'][attribute]) / 1000
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def emit_ingestion_lag_metrics(s3_notification: dict, message: dict, received_time: float, sinks: list,
+                               bucket: str, processing_rule_name: str, message_id: str = None):
+    '''
+    Emits the ingestion lag metrics of a log object in seconds with the bucket and processing_rule
+    dimensions: ObjectReceivedLag (object created to SQS message received by the function),
+    FirstBatchIngestedLag and LastBatchIngestedLag (object created to first and last batch acknowledged
+    by any of the sinks), SQSQueuedTime (message sent to the queue to first received, as reported by
+    SQS) and the SQSApproximateReceiveCount of the message. When batches are coalesced across log
+    objects, message_id selects the batches with log entries of the object.
+    '''
+    created_time = get_object_created_time(s3_notification)
+    receive_count = get_receive_count(message)
+    sent_time = get_message_attribute_time(message, 'SentTimestamp')
+    first_received_time = get_message_attribute_time(message, 'ApproximateFirstReceiveTimestamp')
+
+    if created_time is None and receive_count is None and (sent_time is None or first_received_time is None):
+        logger.debug("No event time or receive count to compute the ingestion lag of s3://%s", bucket)
+        return
+
+    lag_metrics = EphemeralMetrics()
+    lag_metrics.add_dimension(name='deployment', value=os.environ.get('DEPLOYMENT_NAME', 'undefined'))
+    lag_metrics.add_dimension(name='bucket', value=bucket)
+    lag_metrics.add_dimension(name='processing_rule', value=processing_rule_name)
+
+    if created_time is not None:
+        lag_metrics.add_metric(name='ObjectReceivedLag', unit=MetricUnit.Seconds,
+                               value=received_time - created_time)
+
+        ack_times = [sink.get_ingestion_ack_times(message_id) for sink in sinks]
+        first_ack_times = [first_ack_time for first_ack_time, _ in ack_times if first_ack_time is not None]
+        last_ack_times = [last_ack_time for _, last_ack_time in ack_times if last_ack_time is not None]
+
+        if first_ack_times:
+            lag_metrics.add_metric(name='FirstBatchIngestedLag', unit=MetricUnit.Seconds,
+                                   value=min(first_ack_times) - created_time)
+            lag_metrics.add_metric(name='LastBatchIngestedLag', unit=MetricUnit.Seconds,
+                                   value=max(last_ack_times) - created_time)
+
+    if sent_time is not None and first_received_time is not None:
+        lag_metrics.add_metric(name='SQSQueuedTime', unit=MetricUnit.Seconds,
+                               value=max(first_received_time - sent_time, 0))
+
+    if receive_count is not None:
+        lag_metrics.add_metric(name='SQSApproximateReceiveCount', unit=MetricUnit.Count, value=receive_count)
+
+    lag_metrics.flush_metrics()
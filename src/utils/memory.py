@@ -0,0 +1,249 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+'''
+Optional accounting of the memory used to process each log object. Enabled with MEMORY_ACCOUNTING_MODE:
+  - disabled (default): no accounting.
+  - rss: the peak RSS of the process while processing the object is read from the kernel (VmHWM,
+    reset for each object), and the current RSS is sampled at stage boundaries.
+  - tracemalloc: Python allocations are traced with tracemalloc, which accounts the peak of each
+    stage exactly but slows down processing.
+
+Samples are taken after the S3 GetObject request, every 1000 log records, and when the sinks
+serialize and compress their batches. Per object, the peak memory, the peak of each stage and the
+messages and bytes buffered in the sinks at the peak are emitted as metrics. A warning with the S3 key
+is logged if the RSS exceeds MEMORY_WARNING_THRESHOLD_PERCENT of the memory of the function.
+'''
+
+import contextlib
+import logging
+import os
+import resource
+import tracemalloc
+from aws_lambda_powertools.metrics import EphemeralMetrics, MetricUnit
+
+logger = logging.getLogger()
+
+MEMORY_ACCOUNTING_DISABLED = 'disabled'
+MEMORY_ACCOUNTING_RSS = 'rss'
+MEMORY_ACCOUNTING_TRACEMALLOC = 'tracemalloc'
+
+MEMORY_ACCOUNTING_MODE = os.getenv('MEMORY_ACCOUNTING_MODE', MEMORY_ACCOUNTING_DISABLED)
+
+try:
+    MEMORY_WARNING_THRESHOLD_PERCENT = int(os.getenv('MEMORY_WARNING_THRESHOLD_PERCENT'))
+except (ValueError, TypeError):
+    MEMORY_WARNING_THRESHOLD_PERCENT = 80
+
+BYTES_PER_MB = 1048576
+
+# Account of the log object being processed, if memory accounting is enabled
+_current_account = None
+
+
+def get_rss_bytes() -> int:
+    '''
+    Returns the current RSS of the process, or its peak RSS if /proc isn't available
+    '''
+    try:
+        with open('/proc/self/statm', encoding='ascii') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def get_peak_rss_bytes():
+    '''
+    Returns the peak RSS of the process since it was last reset with reset_peak_rss(), or None if
+    it can't be read
+    '''
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def reset_peak_rss() -> bool:
+    '''
+    Resets the peak RSS of the process to its current RSS. Returns False if it isn't supported.
+    '''
+    try:
+        with open('/proc/self/clear_refs', 'w', encoding='ascii') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def get_memory_limit_bytes():
+    '''
+    Returns the memory configured for the Lambda function, or None if not running in AWS Lambda
+    '''
+    try:
+        return int(os.getenv('AWS_LAMBDA_FUNCTION_MEMORY_SIZE')) * BYTES_PER_MB
+    except (ValueError, TypeError):
+        return None
+
+
+class ObjectMemoryAccount():
+    '''
+    Memory used while processing a log object: the peak usage per stage (RSS or traced Python
+    allocations, depending on the mode) and the messages and bytes buffered in the sinks.
+    '''
+
+    def __init__(self, mode: str, bucket: str, key: str, sinks: list):
+        self.mode = mode
+        self.bucket = bucket
+        self.key = key
+        self.sinks = sinks
+        self.peak_bytes = 0
+        self.stage_peak_bytes = {}
+        self.buffered_messages_at_peak = 0
+        self.buffered_bytes_at_peak = 0
+        self.max_buffered_bytes = {sink.get_sink_id(): 0 for sink in sinks}
+        self._memory_limit_bytes = get_memory_limit_bytes()
+        self._warned = False
+        self._started_tracemalloc = False
+        self._peak_rss_reset = False
+
+        if mode == MEMORY_ACCOUNTING_TRACEMALLOC:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            tracemalloc.reset_peak()
+        else:
+            self._peak_rss_reset = reset_peak_rss()
+
+    def sample(self, stage: str):
+        '''
+        Accounts the memory used since the previous sample to stage
+        '''
+        rss_bytes = get_rss_bytes()
+
+        if self.mode == MEMORY_ACCOUNTING_TRACEMALLOC:
+            usage_bytes = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+        else:
+            usage_bytes = rss_bytes
+
+        self.stage_peak_bytes[stage] = max(self.stage_peak_bytes.get(stage, 0), usage_bytes)
+
+        buffered_messages = 0
+        buffered_bytes = 0
+        for sink in self.sinks:
+            sink_buffered_bytes = sink.get_size_of_buffered_messages()
+            buffered_messages += sink.get_num_of_buffered_messages()
+            buffered_bytes += sink_buffered_bytes
+            self.max_buffered_bytes[sink.get_sink_id()] = max(
+                self.max_buffered_bytes.get(sink.get_sink_id(), 0), sink_buffered_bytes)
+
+        if usage_bytes > self.peak_bytes:
+            self.peak_bytes = usage_bytes
+            self.buffered_messages_at_peak = buffered_messages
+            self.buffered_bytes_at_peak = buffered_bytes
+
+        self._check_memory_limit(rss_bytes, stage)
+
+    def _check_memory_limit(self, rss_bytes: int, stage: str):
+        if self._warned or not self._memory_limit_bytes:
+            return
+
+        if rss_bytes * 100 >= self._memory_limit_bytes * MEMORY_WARNING_THRESHOLD_PERCENT:
+            logger.warning("Memory usage of %.0f MB (%.0f%% of %.0f MB) processing s3://%s/%s during %s",
+                           rss_bytes / BYTES_PER_MB, rss_bytes * 100 / self._memory_limit_bytes,
+                           self._memory_limit_bytes / BYTES_PER_MB, self.bucket, self.key, stage)
+            self._warned = True
+
+    def finish(self):
+        '''
+        Takes the final sample and stops tracing if the account started it
+        '''
+        if self.mode == MEMORY_ACCOUNTING_TRACEMALLOC:
+            self.peak_bytes = max(self.peak_bytes, tracemalloc.get_traced_memory()[1])
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+        elif self._peak_rss_reset:
+            peak_rss_bytes = get_peak_rss_bytes()
+            if peak_rss_bytes is not None:
+                self.peak_bytes = max(self.peak_bytes, peak_rss_bytes)
+                self._check_memory_limit(peak_rss_bytes, 'processing')
+
+    def emit_metrics(self, processing_rule_name: str):
+        '''
+        Emits PeakMemory, <Stage>PeakMemory, BufferedMessagesAtPeakMemory and BufferedBytesAtPeakMemory
+        with the processing_rule dimension, and SinkMaxBufferedBytes with the processing_rule and sink
+        dimensions
+        '''
+        object_metrics = EphemeralMetrics()
+        object_metrics.add_dimension(name='deployment', value=os.environ.get('DEPLOYMENT_NAME', 'undefined'))
+        object_metrics.add_dimension(name='processing_rule', value=processing_rule_name)
+
+        object_metrics.add_metric(name='PeakMemory', unit=MetricUnit.Megabytes,
+                                  value=self.peak_bytes / BYTES_PER_MB)
+        for stage, peak_bytes in self.stage_peak_bytes.items():
+            object_metrics.add_metric(name=f'{stage}PeakMemory', unit=MetricUnit.Megabytes,
+                                      value=peak_bytes / BYTES_PER_MB)
+        object_metrics.add_metric(name='BufferedMessagesAtPeakMemory', unit=MetricUnit.Count,
+                                  value=self.buffered_messages_at_peak)
+        object_metrics.add_metric(name='BufferedBytesAtPeakMemory', unit=MetricUnit.Bytes,
+                                  value=self.buffered_bytes_at_peak)
+        object_metrics.flush_metrics()
+
+        for sink_id, max_buffered_bytes in self.max_buffered_bytes.items():
+            sink_metrics = EphemeralMetrics()
+            sink_metrics.add_dimension(name='deployment', value=os.environ.get('DEPLOYMENT_NAME', 'undefined'))
+            sink_metrics.add_dimension(name='processing_rule', value=processing_rule_name)
+            sink_metrics.add_dimension(name='sink', value=sink_id)
+            sink_metrics.add_metric(name='SinkMaxBufferedBytes', unit=MetricUnit.Bytes, value=max_buffered_bytes)
+            sink_metrics.flush_metrics()
+
+
+def sample(stage: str):
+    '''
+    Accounts the memory used since the previous sample to stage, if memory accounting is enabled
+    '''
+    if _current_account is not None:
+        _current_account.sample(stage)
+
+
+@contextlib.contextmanager
+def account_object(bucket: str, key: str, sinks: list, processing_rule_name: str):
+    '''
+    Accounts the memory used while processing (and flushing the sinks of) a log object if memory
+    accounting is enabled, and emits the memory metrics of the object at the end.
+    '''
+    global _current_account
+
+    if MEMORY_ACCOUNTING_MODE not in (MEMORY_ACCOUNTING_RSS, MEMORY_ACCOUNTING_TRACEMALLOC):
+        yield
+        return
+
+    _current_account = ObjectMemoryAccount(MEMORY_ACCOUNTING_MODE, bucket, key, sinks)
+    try:
+        yield
+    finally:
+        account = _current_account
+        _current_account = None
+        try:
+            account.finish()
+            logger.debug("Peak memory processing s3://%s/%s: %.1f MB, %d messages (%d bytes) buffered at the peak",
+                         bucket, key, account.peak_bytes / BYTES_PER_MB, account.buffered_messages_at_peak,
+                         account.buffered_bytes_at_peak)
+            account.emit_metrics(processing_rule_name)
+        except Exception:
+            logger.exception("Unable to account the memory used processing s3://%s/%s", bucket, key)
@@ -0,0 +1,172 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+'''
+On-demand profiling of the function with cProfile. Profiling is enabled with PROFILING_MODE:
+  - disabled (default): only log objects of SQS messages with the "profile" message attribute set
+    to "true" are profiled.
+  - object: each log object (matching PROFILING_KEY_PATTERN if set) is profiled.
+  - invocation: whole invocations are profiled.
+
+Profiles are written to PROFILING_DIRECTORY in pstats format (usable with pstats, snakeviz or
+flameprof to generate flame graphs), the top PROFILING_TOP_N functions by cumulative time are logged
+and, if PROFILING_S3_BUCKET is set, the profile is uploaded to it under PROFILING_S3_PREFIX.
+'''
+
+import cProfile
+import contextlib
+import functools
+import io
+import logging
+import os
+import pstats
+import re
+import time
+
+logger = logging.getLogger()
+
+PROFILING_MODE_DISABLED = 'disabled'
+PROFILING_MODE_OBJECT = 'object'
+PROFILING_MODE_INVOCATION = 'invocation'
+
+PROFILE_MESSAGE_ATTRIBUTE = 'profile'
+
+PROFILING_MODE = os.getenv('PROFILING_MODE', PROFILING_MODE_DISABLED)
+PROFILING_KEY_PATTERN = os.getenv('PROFILING_KEY_PATTERN') or None
+PROFILING_DIRECTORY = os.getenv('PROFILING_DIRECTORY', '/tmp/profiles')
+PROFILING_S3_BUCKET = os.getenv('PROFILING_S3_BUCKET') or None
+PROFILING_S3_PREFIX = os.getenv('PROFILING_S3_PREFIX', 'dynatrace-aws-s3-log-forwarder/profiles/')
+
+try:
+    PROFILING_TOP_N = int(os.getenv('PROFILING_TOP_N'))
+except (ValueError, TypeError):
+    PROFILING_TOP_N = 25
+
+# cProfile profilers can't be nested, track whether one is running
+_profiler_active = False
+
+
+def get_profile_file_name(profile_name: str) -> str:
+    '''
+    Returns a file name for the given profile name (e.g. an S3 key) with a timestamp
+    '''
+    sanitized_name = re.sub(r'[^A-Za-z0-9._-]', '_', profile_name)[-150:]
+    return f"{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}-{sanitized_name}.prof"
+
+
+def summarize_profile(profiler: cProfile.Profile, top_n: int) -> str:
+    '''
+    Returns the pstats report of the top_n functions by cumulative time
+    '''
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top_n)
+    return stream.getvalue()
+
+
+def save_profile(profiler: cProfile.Profile, profile_name: str, s3_client=None) -> str:
+    '''
+    Writes the profile to PROFILING_DIRECTORY, logs its summary and uploads it to S3 if
+    PROFILING_S3_BUCKET is set. Returns the path of the profile file.
+    '''
+    os.makedirs(PROFILING_DIRECTORY, exist_ok=True)
+    profile_file = os.path.join(PROFILING_DIRECTORY, get_profile_file_name(profile_name))
+    profiler.dump_stats(profile_file)
+
+    logger.info("Profile of %s written to %s. Top %d functions by cumulative time:\n%s",
+                profile_name, profile_file, PROFILING_TOP_N, summarize_profile(profiler, PROFILING_TOP_N))
+
+    if PROFILING_S3_BUCKET is not None and s3_client is not None:
+        s3_key = PROFILING_S3_PREFIX + os.path.basename(profile_file)
+        try:
+            s3_client.upload_file(profile_file, PROFILING_S3_BUCKET, s3_key)
+            logger.info("Uploaded profile of %s to s3://%s/%s", profile_name, PROFILING_S3_BUCKET, s3_key)
+        except Exception:
+            logger.exception("Unable to upload profile %s to s3://%s/%s", profile_file, PROFILING_S3_BUCKET, s3_key)
+
+    return profile_file
+
+
+@contextlib.contextmanager
+def profiled(profile_name: str, s3_client=None):
+    '''
+    Runs the enclosed code under cProfile and saves the profile. If a profile is already
+    running (e.g. the whole invocation is being profiled), the code runs without a new profile.
+    '''
+    global _profiler_active
+
+    if _profiler_active:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    _profiler_active = True
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _profiler_active = False
+        try:
+            save_profile(profiler, profile_name, s3_client)
+        except Exception:
+            logger.exception("Unable to save profile of %s", profile_name)
+
+
+def is_profiling_requested_by_message(message: dict) -> bool:
+    '''
+    Checks whether the SQS message has the "profile" message attribute set to "true"
+    '''
+    attribute = message.get('messageAttributes', {}).get(PROFILE_MESSAGE_ATTRIBUTE, {})
+    return str(attribute.get('stringValue', '')).lower() == 'true'
+
+
+def should_profile_object(key: str, message: dict) -> bool:
+    if is_profiling_requested_by_message(message):
+        return True
+
+    if PROFILING_MODE != PROFILING_MODE_OBJECT:
+        return False
+
+    return PROFILING_KEY_PATTERN is None or re.search(PROFILING_KEY_PATTERN, key) is not None
+
+
+def profile_object(bucket: str, key: str, message: dict, s3_client=None):
+    '''
+    Returns a context manager that profiles the processing of the given log object if profiling
+    is enabled for it, or does nothing otherwise.
+    '''
+    if should_profile_object(key, message):
+        return profiled(f"{bucket}/{key}", s3_client)
+
+    return contextlib.nullcontext()
+
+
+def profile_invocation(s3_client_getter=None):
+    '''
+    Decorator for the Lambda handler that profiles the whole invocation when PROFILING_MODE is
+    invocation. s3_client_getter returns the S3 client to upload the profile with.
+    '''
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            if PROFILING_MODE != PROFILING_MODE_INVOCATION:
+                return handler(event, context)
+
+            s3_client = s3_client_getter() if s3_client_getter is not None and PROFILING_S3_BUCKET else None
+            with profiled(f"invocation-{getattr(context, 'aws_request_id', 'unknown')}", s3_client):
+                return handler(event, context)
+
+        return wrapper
+
+    return decorator
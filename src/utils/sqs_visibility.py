@@ -0,0 +1,267 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+'''
+Heartbeat extending the visibility timeout of the SQS messages of an invocation while they're being
+processed, so SQS doesn't deliver them to another execution environment when a large log object takes
+longer than the visibility timeout of the queue. Enabled with SQS_VISIBILITY_HEARTBEAT (default true).
+
+A background thread sends a ChangeMessageVisibilityBatch request for all the messages of the batch
+shortly (VISIBILITY_HEARTBEAT_MARGIN) before their visibility timeout may expire. The messages are
+received by Lambda up to SQS_MAXIMUM_BATCHING_WINDOW seconds before the invocation starts, so their
+visibility timeout (SQS_VISIBILITY_TIMEOUT) is assumed to start then. Each extension is twice the
+remaining processing time estimated from the progress of the current log object (bytes read from S3),
+between MIN_VISIBILITY_EXTENSION and the remaining execution time of the invocation: the slower the
+progress, the longer the extensions and the fewer the requests. If no progress is reported for
+longer than the visibility timeout, the processing is considered stuck and the heartbeat stops, so SQS
+eventually delivers the messages again.
+
+The queue URLs are built from the ARNs of the messages, as the function isn't allowed to call
+GetQueueUrl. Powertools Metrics isn't thread-safe, so the metrics of the heartbeat are counted in the
+background thread and added from the handler thread when the heartbeat stops.
+'''
+
+import collections
+import functools
+import logging
+import math
+import os
+import threading
+import time
+from aws_lambda_powertools import Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+
+logger = logging.getLogger()
+metrics = Metrics()
+
+SQS_VISIBILITY_HEARTBEAT = os.getenv('SQS_VISIBILITY_HEARTBEAT', 'true') == 'true'
+
+try:
+    SQS_VISIBILITY_TIMEOUT = int(os.getenv('SQS_VISIBILITY_TIMEOUT'))
+except (ValueError, TypeError):
+    SQS_VISIBILITY_TIMEOUT = 420
+
+try:
+    SQS_MAXIMUM_BATCHING_WINDOW = int(os.getenv('SQS_MAXIMUM_BATCHING_WINDOW'))
+except (ValueError, TypeError):
+    SQS_MAXIMUM_BATCHING_WINDOW = 20
+
+# Seconds before the visibility timeout may expire to extend it
+VISIBILITY_HEARTBEAT_MARGIN = 30
+MIN_VISIBILITY_EXTENSION = 2 * VISIBILITY_HEARTBEAT_MARGIN
+# Maximum visibility timeout accepted by SQS
+MAX_VISIBILITY_TIMEOUT = 43200
+# Maximum number of entries of a ChangeMessageVisibilityBatch request
+MAX_BATCH_ENTRIES = 10
+
+# Heartbeat of the current invocation, if enabled
+_current_heartbeat = None
+
+
+def get_queue_url(event_source_arn: str):
+    '''
+    Returns the URL of an SQS queue from its ARN, or None if invalid
+    '''
+    arn_parts = event_source_arn.split(':') if isinstance(event_source_arn, str) else []
+    if len(arn_parts) != 6 or arn_parts[2] != 'sqs':
+        return None
+    _, partition, _, region, account_id, queue_name = arn_parts
+    domain = 'amazonaws.com.cn' if partition == 'aws-cn' else 'amazonaws.com'
+    return f'https://sqs.{region}.{domain}/{account_id}/{queue_name}'
+
+
+class VisibilityHeartbeat():
+    '''
+    Extends the visibility timeout of the given SQS messages (records of the Lambda event) from a
+    background thread until stopped. queue_client_getter returns a boto3 SQS client (or any object
+    with its change_message_visibility_batch method), called on the first extension so invocations
+    that finish before the visibility timeout don't create it.
+    '''
+
+    def __init__(self, queue_client_getter, messages: list, lambda_context, received_time: float = None,
+                 visibility_timeout: int = SQS_VISIBILITY_TIMEOUT,
+                 batching_window: int = SQS_MAXIMUM_BATCHING_WINDOW):
+        self.queue_client_getter = queue_client_getter
+        self.messages = [message for message in messages
+                         if isinstance(message, dict) and message.get('receiptHandle') and message.get('eventSourceARN')]
+        self.lambda_context = lambda_context
+        self.visibility_timeout = visibility_timeout
+        received_time = time.time() if received_time is None else received_time
+        # Worst case: the messages were received when the batching window started
+        self.visible_until = received_time - batching_window + visibility_timeout
+        self.extensions = 0
+
+        self._metric_values = collections.Counter()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._object_start_time = None
+        self._object_size = 0
+        self._object_bytes_read = 0
+        self._last_progress_time = time.time()
+
+    def start(self):
+        if not self.messages:
+            return
+        self._thread = threading.Thread(target=self._run, name='sqs-visibility-heartbeat', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        for name, value in self._metric_values.items():
+            metrics.add_metric(name=name, unit=MetricUnit.Count, value=value)
+        self._metric_values.clear()
+
+    def object_started(self, object_size: int):
+        with self._lock:
+            self._object_start_time = time.time()
+            self._object_size = object_size or 0
+            self._object_bytes_read = 0
+            self._last_progress_time = self._object_start_time
+
+    def report_progress(self, bytes_read: int):
+        with self._lock:
+            self._object_bytes_read = bytes_read
+            self._last_progress_time = time.time()
+
+    def get_estimated_remaining_time(self, now: float):
+        '''
+        Returns the remaining processing time of the current log object estimated from the bytes
+        read so far, or None if unknown
+        '''
+        with self._lock:
+            if self._object_start_time is None or self._object_size <= 0 or self._object_bytes_read <= 0:
+                return None
+            progress = min(self._object_bytes_read / self._object_size, 1.0)
+            return (now - self._object_start_time) * (1 - progress) / progress
+
+    def get_extension(self, now: float) -> int:
+        '''
+        Returns for how long from now the messages must stay invisible
+        '''
+        estimated_remaining_time = self.get_estimated_remaining_time(now)
+        if estimated_remaining_time is None:
+            extension = self.visibility_timeout
+        else:
+            extension = max(2 * estimated_remaining_time, MIN_VISIBILITY_EXTENSION)
+
+        # No need to keep the messages invisible after the invocation ends (e.g. times out)
+        remaining_execution_time = self.lambda_context.get_remaining_time_in_millis() / 1000
+        extension = min(extension, remaining_execution_time + VISIBILITY_HEARTBEAT_MARGIN, MAX_VISIBILITY_TIMEOUT)
+        return max(math.ceil(extension), 1)
+
+    def is_stalled(self, now: float) -> bool:
+        with self._lock:
+            return now - self._last_progress_time > self.visibility_timeout
+
+    def _run(self):
+        while not self._stop_event.wait(max(self.visible_until - VISIBILITY_HEARTBEAT_MARGIN - time.time(), 1)):
+            now = time.time()
+            if self.is_stalled(now):
+                logger.warning("No progress processing SQS messages for %d seconds, not extending their visibility",
+                               self.visibility_timeout)
+                self._metric_values['SQSVisibilityHeartbeatStalled'] += 1
+                return
+
+            extension = self.get_extension(now)
+            self.extend_visibility(extension)
+            self.visible_until = now + extension
+
+            # The messages stay invisible until the invocation ends
+            if extension >= self.lambda_context.get_remaining_time_in_millis() / 1000 + VISIBILITY_HEARTBEAT_MARGIN:
+                return
+
+    def extend_visibility(self, extension: int):
+        '''
+        Sets the visibility timeout of all the messages to extension seconds from now
+        '''
+        messages_by_queue = {}
+        for message in self.messages:
+            messages_by_queue.setdefault(message['eventSourceARN'], []).append(message)
+
+        extended_messages = 0
+        for event_source_arn, messages in messages_by_queue.items():
+            try:
+                queue_url = get_queue_url(event_source_arn)
+                if queue_url is None:
+                    raise ValueError(f"Invalid SQS queue ARN {event_source_arn}")
+                queue_client = self.queue_client_getter()
+                for index in range(0, len(messages), MAX_BATCH_ENTRIES):
+                    entries = [{'Id': str(entry_id), 'ReceiptHandle': message['receiptHandle'],
+                                'VisibilityTimeout': extension}
+                               for entry_id, message in enumerate(messages[index:index + MAX_BATCH_ENTRIES])]
+                    response = queue_client.change_message_visibility_batch(QueueUrl=queue_url, Entries=entries)
+                    failed_entries = response.get('Failed', [])
+                    for failed_entry in failed_entries:
+                        logger.warning("Unable to extend the visibility of an SQS message of %s: %s",
+                                       event_source_arn, failed_entry.get('Message', failed_entry.get('Code')))
+                    extended_messages += len(entries) - len(failed_entries)
+            except Exception:
+                logger.warning("Unable to extend the visibility of the SQS messages of %s", event_source_arn,
+                               exc_info=True)
+                self._metric_values['SQSVisibilityExtensionErrors'] += 1
+
+        self.extensions += 1
+        logger.info("Extended the visibility timeout of %d SQS messages by %d seconds", extended_messages, extension)
+        self._metric_values['SQSVisibilityExtendedMessages'] += extended_messages
+
+
+def object_started(object_size: int):
+    '''
+    Reports that a log object of object_size bytes (as stored in S3) started being processed
+    '''
+    if _current_heartbeat is not None:
+        _current_heartbeat.object_started(object_size)
+
+
+def report_progress(bytes_read: int):
+    '''
+    Reports the bytes of the current log object read from S3 so far
+    '''
+    if _current_heartbeat is not None:
+        _current_heartbeat.report_progress(bytes_read)
+
+
+def heartbeat_invocation(queue_client_getter):
+    '''
+    Decorator for the Lambda handler that extends the visibility of the SQS messages of the event
+    while the handler runs, if SQS_VISIBILITY_HEARTBEAT is enabled. queue_client_getter returns the
+    SQS client to use, so it's only created when needed.
+    '''
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            global _current_heartbeat
+
+            records = event.get('Records') if isinstance(event, dict) else None
+            if not SQS_VISIBILITY_HEARTBEAT or not isinstance(records, list) or not any(
+                    isinstance(record, dict) and record.get('receiptHandle') for record in records):
+                return handler(event, context)
+
+            heartbeat = VisibilityHeartbeat(queue_client_getter, records, context)
+            _current_heartbeat = heartbeat
+            heartbeat.start()
+            try:
+                return handler(event, context)
+            finally:
+                heartbeat.stop()
+                _current_heartbeat = None
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,139 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import io
+import os
+from time import perf_counter_ns
+from aws_lambda_powertools.metrics import EphemeralMetrics, MetricUnit
+
+
+class StageTimer():
+    '''
+    Accumulates the time spent in each processing stage with perf_counter_ns. Stages nest: starting
+    a stage pauses the current one, so each stage only accounts for its own (exclusive) time. E.g.
+    time spent reading from S3 while decompressing is accounted to S3Read, not to Decompression.
+    Timings are accumulated in memory and emitted once per log object with emit_metrics().
+    '''
+
+    def __init__(self):
+        self._elapsed_ns = {}
+        self._stack = []
+        self._last_mark_ns = 0
+
+    def start(self, stage: str):
+        now = perf_counter_ns()
+        if self._stack:
+            current_stage = self._stack[-1]
+            self._elapsed_ns[current_stage] = self._elapsed_ns.get(current_stage, 0) + now - self._last_mark_ns
+        self._stack.append(stage)
+        self._last_mark_ns = now
+
+    def stop(self):
+        now = perf_counter_ns()
+        stage = self._stack.pop()
+        self._elapsed_ns[stage] = self._elapsed_ns.get(stage, 0) + now - self._last_mark_ns
+        self._last_mark_ns = now
+
+    def iterate(self, iterable, stage: str):
+        '''
+        Yields the items of iterable, accounting the time spent producing each item to stage
+        '''
+        iterator = iter(iterable)
+        while True:
+            self.start(stage)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.stop()
+            yield item
+
+    def get_timings(self) -> dict:
+        '''
+        Returns the accumulated time in nanoseconds per stage
+        '''
+        return dict(self._elapsed_ns)
+
+    def reset(self):
+        self._elapsed_ns = {}
+        self._stack = []
+
+    def emit_metrics(self, dimensions: dict):
+        '''
+        Emits the accumulated time of each stage as a <Stage>Time metric in milliseconds, in a
+        single EMF blob with the deployment dimension plus the given dimensions.
+        '''
+        if not self._elapsed_ns:
+            return
+
+        stage_metrics = EphemeralMetrics()
+        stage_metrics.add_dimension(name='deployment', value=os.environ.get('DEPLOYMENT_NAME', 'undefined'))
+        for name, value in dimensions.items():
+            stage_metrics.add_dimension(name=name, value=value)
+
+        for stage, elapsed_ns in self._elapsed_ns.items():
+            stage_metrics.add_metric(name=f'{stage}Time', unit=MetricUnit.Milliseconds,
+                                     value=elapsed_ns / 1000000)
+
+        stage_metrics.flush_metrics()
+
+
+class NullStageTimer(StageTimer):
+    '''
+    StageTimer that doesn't measure anything, used when no timer is given
+    '''
+
+    def start(self, stage: str):
+        pass
+
+    def stop(self):
+        pass
+
+    def iterate(self, iterable, stage: str):
+        return iterable
+
+
+NULL_STAGE_TIMER = NullStageTimer()
+
+
+class TimedReader(io.RawIOBase):
+    '''
+    Wraps a binary file-like object (e.g. a botocore StreamingBody or a GzipFile) accounting the time
+    spent in read() to the given stage. As a RawIOBase it can be wrapped in an io.BufferedReader to
+    iterate lines.
+    '''
+
+    def __init__(self, fileobj, stage_timer: StageTimer, stage: str):
+        super().__init__()
+        self._fileobj = fileobj
+        self._stage_timer = stage_timer
+        self._stage = stage
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        self._stage_timer.start(self._stage)
+        try:
+            if size is None or size < 0:
+                return self._fileobj.read()
+            return self._fileobj.read(size)
+        finally:
+            self._stage_timer.stop()
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
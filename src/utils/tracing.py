@@ -0,0 +1,264 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+'''
+Optional tracing of the processing of each SQS message. Enabled with TRACING_MODE:
+  - disabled (default): no spans are recorded.
+  - xray: spans are sent as subsegments of the Lambda function segment to the AWS X-Ray daemon
+    (requires active tracing on the function). Spans are only sent for sampled invocations.
+  - file: spans are appended as JSON lines in OpenTelemetry format to TRACING_FILE, e.g. for tests
+    and local runs.
+
+Spans are recorded for each SQS record, the S3 GetObject request, the parsing of the log object and
+each batch POST'ed to Dynatrace. Scalar attributes are exported as X-Ray annotations.
+'''
+
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import re
+import secrets
+import socket
+import time
+
+logger = logging.getLogger()
+
+TRACING_MODE_DISABLED = 'disabled'
+TRACING_MODE_XRAY = 'xray'
+TRACING_MODE_FILE = 'file'
+
+TRACING_MODE = os.getenv('TRACING_MODE', TRACING_MODE_DISABLED)
+TRACING_FILE = os.getenv('TRACING_FILE', '/tmp/traces.jsonl')
+
+XRAY_DAEMON_DEFAULT_ADDRESS = '127.0.0.1:2000'
+XRAY_DAEMON_HEADER = '{"format": "json", "version": 1}\n'
+
+# Span of the current thread, the parent of new spans
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+def generate_trace_id() -> str:
+    '''
+    Returns a new trace id in X-Ray format (1-<epoch in hex>-<96 random bits>)
+    '''
+    return f'1-{int(time.time()):08x}-{secrets.token_hex(12)}'
+
+
+def generate_span_id() -> str:
+    return secrets.token_hex(8)
+
+
+def get_lambda_trace_context():
+    '''
+    Returns the trace id, parent id and sampling decision of the current invocation from the
+    _X_AMZN_TRACE_ID environment variable set by AWS Lambda, or (None, None, True) outside Lambda
+    '''
+    trace_header = os.getenv('_X_AMZN_TRACE_ID', '')
+    fields = dict(field.split('=', 1) for field in trace_header.split(';') if '=' in field)
+    return fields.get('Root'), fields.get('Parent'), fields.get('Sampled', '1') != '0'
+
+
+def to_xray_annotation_key(key: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_]', '_', key)
+
+
+class Span():
+    '''
+    A timed operation with attributes. Spans started while another one is current are its children.
+    '''
+
+    def __init__(self, name: str, trace_id: str, parent_id: str = None, sampled: bool = True,
+                 attributes: dict = None, parent=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = generate_span_id()
+        self.parent_id = parent_id
+        self.parent = parent
+        self.sampled = sampled
+        self.attributes = dict(attributes) if attributes else {}
+        self.start_time = time.time()
+        self.end_time = None
+        self.error = None
+        self._context_token = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exception: BaseException):
+        self.error = f'{type(exception).__name__}: {exception}'
+
+    def is_descendant_of(self, span) -> bool:
+        parent = self.parent
+        while parent is not None:
+            if parent is span:
+                return True
+            parent = parent.parent
+        return False
+
+    def end(self):
+        '''
+        Ends the span, restores its parent as current span and exports it. Child spans left open
+        (e.g. because an exception interrupted them) are ended first.
+        '''
+        if self.end_time is not None:
+            return
+
+        open_span = _current_span.get()
+        while open_span is not None and open_span is not self and open_span.is_descendant_of(self):
+            open_span.end()
+            open_span = _current_span.get()
+
+        self.end_time = time.time()
+        if self._context_token is not None:
+            _current_span.reset(self._context_token)
+            self._context_token = None
+
+        try:
+            export_span(self)
+        except Exception:
+            logger.debug("Unable to export span %s", self.name, exc_info=True)
+
+    def to_otel(self) -> dict:
+        '''
+        Returns the span in OpenTelemetry JSON format (trace ids are X-Ray trace ids without dashes)
+        '''
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id[2:].replace('-', ''),
+            'span_id': self.span_id,
+            'parent_span_id': self.parent_id,
+            'start_time_unix_nano': int(self.start_time * 1e9),
+            'end_time_unix_nano': int(self.end_time * 1e9),
+            'attributes': self.attributes,
+            'status': {'code': 'ERROR', 'message': self.error} if self.error else {'code': 'OK'}
+        }
+
+    def to_xray(self) -> dict:
+        '''
+        Returns the span as an X-Ray (sub)segment document
+        '''
+        document = {
+            'name': self.name,
+            'id': self.span_id,
+            'trace_id': self.trace_id,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'annotations': {to_xray_annotation_key(key): value for key, value in self.attributes.items()
+                            if isinstance(value, (str, int, float, bool))}
+        }
+        if self.parent_id is not None:
+            document['type'] = 'subsegment'
+            document['parent_id'] = self.parent_id
+        if self.error:
+            document['fault'] = True
+            document['cause'] = {'exceptions': [{'id': generate_span_id(), 'message': self.error}]}
+        return document
+
+
+class NoopSpan():
+    '''
+    Span returned when tracing is disabled
+    '''
+
+    def set_attribute(self, key: str, value):
+        pass
+
+    def record_exception(self, exception: BaseException):
+        pass
+
+    def end(self):
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+def export_span(span: Span):
+    if TRACING_MODE == TRACING_MODE_FILE:
+        with open(TRACING_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(span.to_otel(), default=str) + '\n')
+
+    elif TRACING_MODE == TRACING_MODE_XRAY and span.sampled:
+        host, port = os.getenv('AWS_XRAY_DAEMON_ADDRESS', XRAY_DAEMON_DEFAULT_ADDRESS).split(' ')[0].rsplit(':', 1)
+        document = XRAY_DAEMON_HEADER + json.dumps(span.to_xray(), default=str)
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(document.encode('utf-8'), (host, int(port)))
+
+
+def is_tracing_enabled() -> bool:
+    return TRACING_MODE in (TRACING_MODE_XRAY, TRACING_MODE_FILE)
+
+
+def get_current_span():
+    '''
+    Returns the current span, or a no-op span if there's none
+    '''
+    current_span = _current_span.get()
+    return current_span if current_span is not None else NOOP_SPAN
+
+
+def start_span(name: str, attributes: dict = None):
+    '''
+    Starts a span as child of the current span (or of the Lambda function segment if there's none)
+    and makes it the current span until it's ended. Returns a no-op span if tracing is disabled.
+    '''
+    if not is_tracing_enabled():
+        return NOOP_SPAN
+
+    parent = _current_span.get()
+    if parent is not None:
+        span = Span(name, parent.trace_id, parent.span_id, parent.sampled, attributes, parent)
+    else:
+        trace_id, parent_id, sampled = get_lambda_trace_context()
+        span = Span(name, trace_id or generate_trace_id(), parent_id, sampled, attributes)
+
+    span._context_token = _current_span.set(span)
+    return span
+
+
+@contextlib.contextmanager
+def span(name: str, attributes: dict = None):
+    '''
+    Records the enclosed code as a span, marking it as failed if it raises an exception
+    '''
+    current_span = start_span(name, attributes)
+    try:
+        yield current_span
+    except BaseException as exception:
+        current_span.record_exception(exception)
+        raise
+    finally:
+        current_span.end()
+
+
+def traced(name: str):
+    '''
+    Decorator that records each call of the function as a span. The function can add attributes to
+    the span with get_current_span().set_attribute().
+    '''
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not is_tracing_enabled():
+                return function(*args, **kwargs)
+
+            with span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
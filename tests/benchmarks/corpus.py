@@ -0,0 +1,844 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Seeded synthetic log records for the built-in log processing rules, following the formats AWS
+documents for each service. The same seed always produces the same records, so results of
+benchmarks run on different versions of the forwarder are comparable.
+
+Each generator receives a random.Random and a datetime and returns one log record as the
+processing code sees it: a str line for text rules, a dict for JSON rules. Generators of formats
+with free-form fields (URLs, messages...) also take a padding string, inserted in one of those
+fields to produce records following a given line length distribution.
+
+Complete log objects are generated with generate_log_object: records are serialized as the AWS
+service writes them (header lines, JSON documents, CloudWatch Logs subscription messages...) with
+a key name matching the known_key_path_pattern of the rule. Run this module to write log objects
+to a local directory, e.g. to upload them to a bucket:
+
+  python tests/benchmarks/corpus.py --output-dir /tmp/corpus                      # all rules
+  python tests/benchmarks/corpus.py --output-dir /tmp/corpus --rules 'aws\.(ALB|cloudfront)' \
+      --objects 5 --size 10MB --line-length 400 --line-length-sigma 0.8
+"""
+
+import argparse
+import gzip
+import itertools
+import json
+import math
+import os
+import random
+import re
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+DEFAULT_SEED = 20220101
+DEFAULT_START_TIME = datetime(2022, 1, 1, tzinfo=timezone.utc)
+
+AWS_ACCOUNT_ID = '012345678910'
+AWS_REGIONS = ['us-east-1', 'us-west-2', 'eu-west-1', 'ap-northeast-1']
+
+HTTP_METHODS = ['GET', 'GET', 'GET', 'POST', 'PUT', 'DELETE']
+HTTP_STATUS_CODES = [200] * 16 + [201, 204, 301, 304, 400, 403, 404, 500, 502, 503]
+URL_PATHS = ['/', '/index.html', '/api/v1/orders', '/api/v1/users/42', '/static/app.js', '/favicon.ico',
+             '/login', '/search']
+URL_QUERIES = ['', '', '', 'q=shoes&page=2', 'id=1234', 'utm_source=newsletter&utm_medium=email']
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.2 Safari/605.1.15',
+    'curl/7.79.1',
+    'aws-sdk-java/1.12.128 Linux/5.10.82-83.359.amzn2.x86_64 OpenJDK_64-Bit_Server_VM/11.0.13+8-LTS java/11.0.13',
+    'python-requests/2.27.1',
+]
+TLS_CIPHERS = ['ECDHE-RSA-AES128-GCM-SHA256', 'ECDHE-RSA-AES256-GCM-SHA384', 'TLS_AES_128_GCM_SHA256']
+TLS_PROTOCOLS = ['TLSv1.2', 'TLSv1.3']
+
+CLOUDTRAIL_EVENTS = [
+    ('dynamodb.amazonaws.com', 'ListTables', 'true'),
+    ('s3.amazonaws.com', 'GetObject', 'true'),
+    ('s3.amazonaws.com', 'PutObject', 'false'),
+    ('ec2.amazonaws.com', 'DescribeInstances', 'true'),
+    ('sts.amazonaws.com', 'AssumeRole', 'true'),
+    ('iam.amazonaws.com', 'CreateRole', 'false'),
+    ('lambda.amazonaws.com', 'Invoke', 'false'),
+]
+CLOUDTRAIL_ERROR_CODES = ['AccessDenied', 'ThrottlingException', 'ResourceNotFoundException']
+
+KAFKA_MESSAGES = [
+    ('INFO', '[GroupCoordinator 1]: Preparing to rebalance group consumer-group-{n} in state PreparingRebalance '
+             'with old generation {n} (__consumer_offsets-{p}) (reason: Adding new member) '
+             '(kafka.coordinator.group.GroupCoordinator)'),
+    ('INFO', '[Log partition=orders-{p}, dir=/kafka/datalogs] Rolled new log segment at offset {n} in 1 ms. '
+             '(kafka.log.Log)'),
+    ('WARN', '[SocketServer listenerType=ZK_BROKER, nodeId=1] Unexpected error from /10.0.{p}.{n}; closing connection '
+             '(org.apache.kafka.common.network.Selector)'),
+    ('ERROR', '[ReplicaFetcher replicaId=1, leaderId=2, fetcherId=0] Error for partition orders-{p} at offset {n} '
+              '(kafka.server.ReplicaFetcherThread)'),
+]
+
+DNS_QUERY_NAMES = ['example.com.', 'api.internal.example.com.', 'sqs.us-east-1.amazonaws.com.',
+                   's3.amazonaws.com.', 'nonexistent.example.org.']
+DNS_RCODES = ['NOERROR'] * 8 + ['NXDOMAIN', 'SERVFAIL']
+
+# Words padding is made of, so padded records compress like real ones rather than random bytes
+PADDING_WORDS = ['order', 'customer', 'session', 'region', 'cart', 'item', 'token', 'checkout', 'payment',
+                 'search', 'result', 'page', 'user', 'profile', 'settings', 'static', 'asset', 'v1', 'v2',
+                 'id', 'ref', 'campaign', 'source', 'medium', 'content', 'locale', 'en', 'de', 'es', 'ja']
+
+
+def random_ip(rng: random.Random, private: bool = False) -> str:
+    if private:
+        return f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+    return f"{rng.randrange(1, 224)}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+
+
+def random_hex(rng: random.Random, length: int) -> str:
+    return ''.join(rng.choice('0123456789abcdef') for _ in range(length))
+
+
+def random_uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def iso_timestamp(timestamp: datetime) -> str:
+    return timestamp.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def random_padding(rng: random.Random, length: int) -> str:
+    words = []
+    padding_length = -1
+    while padding_length < length:
+        words.append(rng.choice(PADDING_WORDS))
+        padding_length += len(words[-1]) + 1
+    return '-'.join(words)[:length]
+
+
+def padded_query(query: str, padding: str) -> str:
+    if not padding:
+        return query
+    return f"{query}&ref={padding}" if query else f"ref={padding}"
+
+
+def alb_record(rng: random.Random, timestamp: datetime, padding: str = '') -> str:
+    status_code = rng.choice(HTTP_STATUS_CODES)
+    query = padded_query(rng.choice(URL_QUERIES), padding)
+    url = f"https://www.example.com:443{rng.choice(URL_PATHS)}" + (f"?{query}" if query else '')
+    return (
+        f'https {iso_timestamp(timestamp)} app/my-loadbalancer/50dc6c495c0c9188 '
+        f'{random_ip(rng)}:{rng.randrange(1024, 65535)} {random_ip(rng, True)}:80 '
+        f'0.{rng.randrange(1000):03d} 0.{rng.randrange(1000):03d} 0.{rng.randrange(1000):03d} '
+        f'{status_code} {status_code} {rng.randrange(100, 2000)} {rng.randrange(100, 100000)} '
+        f'"{rng.choice(HTTP_METHODS)} {url} HTTP/1.1" "{rng.choice(USER_AGENTS)}" '
+        f'{rng.choice(TLS_CIPHERS)} TLSv1.2 '
+        f'arn:aws:elasticloadbalancing:us-east-1:{AWS_ACCOUNT_ID}:targetgroup/my-targets/73e2d6bc24d8a067 '
+        f'"Root=1-{random_hex(rng, 8)}-{random_hex(rng, 24)}" "www.example.com" '
+        f'"arn:aws:acm:us-east-1:{AWS_ACCOUNT_ID}:certificate/{random_uuid(rng)}" 0 {iso_timestamp(timestamp)} '
+        f'"forward" "-" "-" "{random_ip(rng, True)}:80" "{status_code}" "-" "-"'
+    )
+
+
+def classic_elb_record(rng: random.Random, timestamp: datetime, padding: str = '') -> str:
+    status_code = rng.choice(HTTP_STATUS_CODES)
+    query = padded_query('', padding)
+    return (
+        f'{iso_timestamp(timestamp)} my-loadbalancer {random_ip(rng)}:{rng.randrange(1024, 65535)} '
+        f'{random_ip(rng, True)}:80 0.000{rng.randrange(100):02d} 0.00{rng.randrange(1000):03d} 0.000{rng.randrange(100):02d} '
+        f'{status_code} {status_code} 0 {rng.randrange(100, 100000)} '
+        f'"{rng.choice(HTTP_METHODS)} https://www.example.com:443{rng.choice(URL_PATHS)}{"?" if query else ""}{query} HTTP/1.1" '
+        f'"{rng.choice(USER_AGENTS)}" {rng.choice(TLS_CIPHERS)} TLSv1.2'
+    )
+
+
+def nlb_record(rng: random.Random, timestamp: datetime) -> str:
+    return (
+        f'tls 2.0 {timestamp.strftime("%Y-%m-%dT%H:%M:%S")} net/my-network-loadbalancer/c6e77e28c25b2234 '
+        f'g3d4b5e8bb8464cd {random_ip(rng)}:{rng.randrange(1024, 65535)} {random_ip(rng, True)}:443 '
+        f'{rng.randrange(1, 1000)} {rng.randrange(1, 100)} {rng.randrange(100, 10000)} {rng.randrange(100, 100000)} - '
+        f'arn:aws:acm:us-east-1:{AWS_ACCOUNT_ID}:certificate/{random_uuid(rng)} - {rng.choice(TLS_CIPHERS)} tlsv12 - '
+        f'my-network-loadbalancer-c6e77e28c25b2234.elb.us-east-1.amazonaws.com h2 h2 "h2","http/1.1" - -'
+    )
+
+
+def cloudfront_record(rng: random.Random, timestamp: datetime, padding: str = '') -> str:
+    status_code = rng.choice(HTTP_STATUS_CODES)
+    result_type = rng.choice(['Hit', 'Hit', 'Miss', 'RefreshHit', 'Error'])
+    fields = [
+        timestamp.strftime('%Y-%m-%d'), timestamp.strftime('%H:%M:%S'), rng.choice(['LAX1', 'IAD89-C1', 'FRA56-P1']),
+        str(rng.randrange(200, 200000)), random_ip(rng), rng.choice(HTTP_METHODS), 'd111111abcdef8.cloudfront.net',
+        rng.choice(URL_PATHS), str(status_code), '-', rng.choice(USER_AGENTS).replace(' ', '%20'),
+        padded_query(rng.choice(URL_QUERIES), padding) or '-', '-', result_type, random_hex(rng, 56), 'www.example.com', 'https',
+        str(rng.randrange(100, 2000)), f'0.{rng.randrange(1000):03d}', '-', rng.choice(TLS_PROTOCOLS),
+        rng.choice(TLS_CIPHERS), result_type, 'HTTP/2.0', '-', '-', str(rng.randrange(1024, 65535)),
+        f'0.{rng.randrange(1000):03d}', result_type, 'text/html', str(rng.randrange(200, 200000)), '-', '-'
+    ]
+    return '\t'.join(fields)
+
+
+def cloudtrail_record(rng: random.Random, timestamp: datetime, padding: str = '') -> dict:
+    event_source, event_name, read_only = rng.choice(CLOUDTRAIL_EVENTS)
+    region = rng.choice(AWS_REGIONS)
+    record = {
+        'eventVersion': '1.08',
+        'userIdentity': {
+            'type': 'AssumedRole',
+            'principalId': f'AROATESTABCDEFGHIJQLM:session-{rng.randrange(1000)}',
+            'arn': f'arn:aws:sts::{AWS_ACCOUNT_ID}:assumed-role/my-role/session-{rng.randrange(1000)}',
+            'accountId': AWS_ACCOUNT_ID,
+            'accessKeyId': 'ASIA' + random_hex(rng, 16).upper(),
+            'sessionContext': {
+                'sessionIssuer': {
+                    'type': 'Role',
+                    'principalId': 'AROATESTABCDEFGHIJQLM',
+                    'arn': f'arn:aws:iam::{AWS_ACCOUNT_ID}:role/my-role',
+                    'accountId': AWS_ACCOUNT_ID,
+                    'userName': 'my-role'
+                },
+                'attributes': {
+                    'creationDate': timestamp.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                    'mfaAuthenticated': 'false'
+                }
+            }
+        },
+        'eventTime': timestamp.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'eventSource': event_source,
+        'eventName': event_name,
+        'awsRegion': region,
+        'sourceIPAddress': random_ip(rng),
+        'userAgent': rng.choice(USER_AGENTS),
+        'requestParameters': {'description': padding} if padding else None,
+        'responseElements': None,
+        'requestID': random_hex(rng, 32).upper(),
+        'eventID': random_uuid(rng),
+        'readOnly': read_only == 'true',
+        'eventType': 'AwsApiCall',
+        'managementEvent': True,
+        'recipientAccountId': AWS_ACCOUNT_ID,
+        'eventCategory': 'Management',
+        'tlsDetails': {
+            'tlsVersion': rng.choice(TLS_PROTOCOLS),
+            'cipherSuite': rng.choice(TLS_CIPHERS),
+            'clientProvidedHostHeader': f"{event_source.split('.')[0]}.{region}.amazonaws.com"
+        }
+    }
+    if rng.random() < 0.1:
+        record['errorCode'] = rng.choice(CLOUDTRAIL_ERROR_CODES)
+        record['errorMessage'] = f"User is not authorized to perform: {event_name}"
+    return record
+
+
+def global_accelerator_record(rng: random.Random, timestamp: datetime) -> str:
+    start_time = int(timestamp.timestamp())
+    return (
+        f'1.0 {AWS_ACCOUNT_ID} {random_uuid(rng)} {random_ip(rng)} {rng.randrange(1024, 65535)} '
+        f'{random_ip(rng)} 443 {random_ip(rng, True)} 443 TCP IPV4 {rng.randrange(1, 100)} {rng.randrange(100, 100000)} '
+        f'{start_time} {start_time + 60} {rng.choice(["ACCEPT", "ACCEPT", "REJECT"])} OK {random_ip(rng, True)} '
+        f'{rng.randrange(1024, 65535)} us-east-1 us-west-2 INGRESS vpc-{random_hex(rng, 17)}'
+    )
+
+
+def msk_record(rng: random.Random, timestamp: datetime, padding: str = '') -> str:
+    severity, message = rng.choice(KAFKA_MESSAGES)
+    return (f"[{timestamp.strftime('%Y-%m-%d %H:%M:%S')},{timestamp.microsecond // 1000:03d}] {severity} "
+            + message.format(n=rng.randrange(10000), p=rng.randrange(64)) + (f" {padding}" if padding else ''))
+
+
+def network_firewall_record(rng: random.Random, timestamp: datetime) -> dict:
+    start = iso_timestamp(timestamp).replace('Z', '+0000')
+    return {
+        'firewall_name': 'my-firewall',
+        'availability_zone': 'us-east-1a',
+        'event_timestamp': str(int(timestamp.timestamp())),
+        'event': {
+            'timestamp': start,
+            'flow_id': rng.getrandbits(50),
+            'event_type': 'netflow',
+            'src_ip': random_ip(rng, True),
+            'src_port': rng.randrange(1024, 65535),
+            'dest_ip': random_ip(rng),
+            'dest_port': rng.choice([53, 80, 443, 8080]),
+            'proto': rng.choice(['TCP', 'UDP']),
+            'app_proto': rng.choice(['tls', 'http', 'dns', 'unknown']),
+            'netflow': {
+                'pkts': rng.randrange(1, 100),
+                'bytes': rng.randrange(60, 100000),
+                'start': start,
+                'end': start,
+                'age': 0,
+                'min_ttl': 63,
+                'max_ttl': 63
+            },
+            'tcp': {
+                'tcp_flags': '13',
+                'syn': True,
+                'ack': True,
+                'fin': True
+            }
+        }
+    }
+
+
+def redshift_record(rng: random.Random, timestamp: datetime) -> str:
+    event = rng.choice(['authenticated', 'initiating session', 'disconnecting session'])
+    return (f"{event} |{timestamp.strftime('%a, %d %b %Y %H:%M:%S')}:{timestamp.microsecond // 1000:03d}"
+            f"|{random_ip(rng, True)} |{rng.randrange(1024, 65535)} |{rng.randrange(1000, 100000)} |dev "
+            f"|user{rng.randrange(10)} |password |0 |TLSv1.2 |{rng.choice(TLS_CIPHERS)} |0 | | | |")
+
+
+def s3_access_record(rng: random.Random, timestamp: datetime, padding: str = '') -> str:
+    canonical_user_id = random_hex(rng, 64)
+    operation, method = rng.choice([('REST.GET.OBJECT', 'GET'), ('REST.PUT.OBJECT', 'PUT'),
+                                     ('REST.HEAD.OBJECT', 'HEAD'), ('REST.GET.BUCKET', 'GET')])
+    key = f"data/{timestamp.strftime('%Y/%m/%d')}/object-{rng.randrange(100000)}{f'-{padding}' if padding else ''}.json"
+    return (
+        f'{canonical_user_id} my-bucket [{timestamp.strftime("%d/%b/%Y:%H:%M:%S +0000")}] {random_ip(rng)} '
+        f'{canonical_user_id} {random_hex(rng, 16).upper()} {operation} {key} "{method} /my-bucket/{key} HTTP/1.1" '
+        f'{rng.choice(HTTP_STATUS_CODES)} - {rng.randrange(100, 100000)} {rng.randrange(100, 100000)} '
+        f'{rng.randrange(1, 200)} {rng.randrange(1, 100)} "-" "{rng.choice(USER_AGENTS)}" - '
+        f'{random_hex(rng, 76)}= SigV4 {rng.choice(TLS_CIPHERS)} AuthHeader my-bucket.s3.us-east-1.amazonaws.com '
+        f'TLSv1.2 - -'
+    )
+
+
+def vpc_dns_query_record(rng: random.Random, timestamp: datetime, padding: str = '') -> dict:
+    rcode = rng.choice(DNS_RCODES)
+    return {
+        'version': '1.100000',
+        'account_id': AWS_ACCOUNT_ID,
+        'region': 'us-east-1',
+        'vpc_id': 'vpc-0123456789abcdef0',
+        'query_timestamp': timestamp.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'query_name': (f'{padding}.' if padding else '') + rng.choice(DNS_QUERY_NAMES),
+        'query_type': rng.choice(['A', 'AAAA', 'CNAME', 'TXT']),
+        'query_class': 'IN',
+        'rcode': rcode,
+        'answers': [{'Rdata': random_ip(rng), 'Type': 'A', 'Class': 'IN'}] if rcode == 'NOERROR' else [],
+        'srcaddr': random_ip(rng, True),
+        'srcport': str(rng.randrange(1024, 65535)),
+        'transport': 'UDP',
+        'srcids': {'instance': f'i-{random_hex(rng, 17)}'}
+    }
+
+
+def vpc_flow_record(rng: random.Random, timestamp: datetime) -> str:
+    start_time = int(timestamp.timestamp())
+    return (
+        f'2 {AWS_ACCOUNT_ID} eni-{random_hex(rng, 17)} {random_ip(rng, True)} {random_ip(rng)} '
+        f'{rng.randrange(1024, 65535)} {rng.choice([22, 80, 443, 3306, 5432])} {rng.choice([6, 17])} '
+        f'{rng.randrange(1, 100)} {rng.randrange(60, 100000)} {start_time} {start_time + 60} '
+        f'{rng.choice(["ACCEPT", "ACCEPT", "ACCEPT", "REJECT"])} OK'
+    )
+
+
+def waf_record(rng: random.Random, timestamp: datetime, padding: str = '') -> dict:
+    query = padded_query(rng.choice(URL_QUERIES), padding)
+    return {
+        'timestamp': int(timestamp.timestamp() * 1000),
+        'formatVersion': 1,
+        'webaclId': f'arn:aws:wafv2:us-east-1:{AWS_ACCOUNT_ID}:regional/webacl/my-web-acl/{random_uuid(rng)}',
+        'terminatingRuleId': 'Default_Action',
+        'terminatingRuleType': 'REGULAR',
+        'action': rng.choice(['ALLOW', 'ALLOW', 'ALLOW', 'BLOCK']),
+        'terminatingRuleMatchDetails': [],
+        'httpSourceName': 'ALB',
+        'httpSourceId': f'{AWS_ACCOUNT_ID}-app/my-loadbalancer/50dc6c495c0c9188',
+        'ruleGroupList': [],
+        'rateBasedRuleList': [],
+        'nonTerminatingMatchingRules': [],
+        'requestHeadersInserted': None,
+        'responseCodeSent': None,
+        'httpRequest': {
+            'clientIp': random_ip(rng),
+            'country': rng.choice(['US', 'DE', 'ES', 'JP']),
+            'headers': [
+                {'name': 'Host', 'value': 'www.example.com'},
+                {'name': 'User-Agent', 'value': rng.choice(USER_AGENTS)},
+                {'name': 'Accept', 'value': '*/*'}
+            ],
+            'uri': rng.choice(URL_PATHS),
+            'args': query,
+            'httpVersion': 'HTTP/1.1',
+            'httpMethod': rng.choice(HTTP_METHODS),
+            'requestId': f'1-{random_hex(rng, 8)}-{random_hex(rng, 24)}'
+        }
+    }
+
+
+def appfabric_record(rng: random.Random, timestamp: datetime, padding: str = '') -> dict:
+    return {
+        'activity_id': 99,
+        'activity_name': 'Other',
+        'actor': {
+            'user': {
+                'uid': random_hex(rng, 24),
+                'email_addr': f'user{rng.randrange(100)}@example.com',
+                'name': f'User {rng.randrange(100)}'
+            },
+            'session': {'created_time': int(timestamp.timestamp() * 1000)}
+        },
+        'category_name': 'Audit Activity',
+        'category_uid': 3,
+        'class_name': 'Account Change',
+        'class_uid': 3001,
+        'device': {'ip': random_ip(rng), 'type': 'Unknown', 'type_id': 0},
+        'http_request': {'user_agent': rng.choice(USER_AGENTS) + (f' {padding}' if padding else '')},
+        'metadata': {
+            'product': {'uid': 'slack', 'vendor_name': 'Slack', 'name': 'Slack'},
+            'processed_time': int(timestamp.timestamp() * 1000),
+            'version': '1.0.0-rc.3',
+            'event_code': 'user_login'
+        },
+        'severity': 'Informational',
+        'severity_id': 1,
+        'status': 'Success',
+        'time': int(timestamp.timestamp() * 1000),
+        'type_name': 'Account Change: Other',
+        'type_uid': 300199
+    }
+
+
+def cwl_to_fh_record(rng: random.Random, timestamp: datetime, padding: str = '') -> dict:
+    '''
+    Log event of a CloudWatch Logs subscription, with the attributes of the enclosing
+    DATA_MESSAGE already inherited, as the processing code passes it to the rule
+    '''
+    return {
+        'id': str(rng.getrandbits(120)),
+        'timestamp': int(timestamp.timestamp() * 1000),
+        'message': (f"{iso_timestamp(timestamp)}\t{random_uuid(rng)}\t"
+                    f"{rng.choice(['INFO', 'INFO', 'WARN', 'ERROR'])}\tProcessed order {rng.randrange(100000)} "
+                    f"in {rng.randrange(1, 500)} ms" + (f" {padding}" if padding else '')),
+        'aws.account.id': AWS_ACCOUNT_ID,
+        'aws.log_group': '/aws/lambda/my-function',
+        'aws.log_stream': f"{timestamp.strftime('%Y/%m/%d')}/[$LATEST]{random_hex(rng, 32)}"
+    }
+
+
+def generic_text_record(rng: random.Random, timestamp: datetime, padding: str = '') -> str:
+    return (f"{iso_timestamp(timestamp)} {rng.choice(['INFO', 'INFO', 'WARN', 'ERROR'])} "
+            f"[worker-{rng.randrange(8)}] Processed request {random_uuid(rng)} in {rng.randrange(1, 500)} ms"
+            + (f" {padding}" if padding else ''))
+
+
+def generic_json_record(rng: random.Random, timestamp: datetime, padding: str = '') -> dict:
+    return {
+        'timestamp': iso_timestamp(timestamp),
+        'level': rng.choice(['INFO', 'INFO', 'WARN', 'ERROR']),
+        'logger': f'worker-{rng.randrange(8)}',
+        'message': f'Processed request {random_uuid(rng)}' + (f' {padding}' if padding else ''),
+        'duration_ms': rng.randrange(1, 500)
+    }
+
+
+# (source, rule name) -> record generator
+RECORD_GENERATORS = {
+    ('aws', 'ALB'): alb_record,
+    ('aws', 'appfabric-ocsf-json'): appfabric_record,
+    ('aws', 'Classic-ELB'): classic_elb_record,
+    ('aws', 'cloudfront'): cloudfront_record,
+    ('aws', 'CloudTrail'): cloudtrail_record,
+    ('aws', 'global-accelerator'): global_accelerator_record,
+    ('aws', 'msk'): msk_record,
+    ('aws', 'network-firewall'): network_firewall_record,
+    ('aws', 'NLB'): nlb_record,
+    ('aws', 'redshift'): redshift_record,
+    ('aws', 's3'): s3_access_record,
+    ('aws', 'vpcdnsquerylogs'): vpc_dns_query_record,
+    ('aws', 'vpcflowlogs'): vpc_flow_record,
+    ('aws', 'waf'): waf_record,
+    ('custom', 'cwl_to_fh'): cwl_to_fh_record,
+    ('generic', 'generic'): generic_text_record,
+    ('generic', 'generic_json_stream'): generic_json_record,
+}
+
+# Generators of fixed format records, without a field to insert padding in
+FIXED_LENGTH_RECORD_GENERATORS = {global_accelerator_record, network_firewall_record, nlb_record, redshift_record,
+                                  vpc_flow_record}
+
+
+def lognormal_line_lengths(median: int, sigma: float = 0.5, maximum: int = None):
+    '''
+    Returns a function drawing record lengths from a log-normal distribution, the usual shape of
+    log line lengths: most lines are close to the median, with a long tail of longer lines
+    '''
+    def line_length(rng: random.Random) -> int:
+        length = int(rng.lognormvariate(math.log(median), sigma))
+        return min(length, maximum) if maximum else length
+
+    return line_length
+
+
+def get_record_length(record) -> int:
+    return len(record) if isinstance(record, str) else len(json.dumps(record))
+
+
+def generate_record(generator, rng: random.Random, timestamp: datetime, target_length: int = None,
+                    padding_rng: random.Random = None):
+    '''
+    Returns a record of the generator, padded to approximately target_length if it's shorter
+    '''
+    if target_length is None or generator in FIXED_LENGTH_RECORD_GENERATORS:
+        return generator(rng, timestamp)
+
+    state = rng.getstate()
+    record = generator(rng, timestamp)
+    length = get_record_length(record)
+    if length >= target_length:
+        return record
+
+    # Padding may appear in more than one field (or add separators): adjust it with a second attempt
+    padding_length = target_length - length
+    for _ in range(2):
+        rng.setstate(state)
+        record = generator(rng, timestamp, padding=random_padding(padding_rng, padding_length))
+        growth = get_record_length(record) - length
+        if abs(growth - (target_length - length)) <= 1:
+            break
+        padding_length = max(int(padding_length * (target_length - length) / growth), 1)
+
+    return record
+
+
+def iter_records(source: str, rule_name: str, seed: int = DEFAULT_SEED, start_time: datetime = DEFAULT_START_TIME,
+                 line_lengths=None):
+    '''
+    Yields records for the given rule with increasing timestamps. line_lengths is a function returning
+    the length of each record (see lognormal_line_lengths): records of formats with free-form fields
+    are padded to it.
+    '''
+    generator = RECORD_GENERATORS[(source, rule_name)]
+    rng = random.Random(f"{seed}-{source}-{rule_name}")
+    padding_rng = random.Random(f"{seed}-{source}-{rule_name}-padding")
+
+    timestamp = start_time
+    while True:
+        timestamp += timedelta(microseconds=rng.randrange(1, 5000))
+        target_length = line_lengths(padding_rng) if line_lengths else None
+        yield generate_record(generator, rng, timestamp, target_length, padding_rng)
+
+
+def generate_records(source: str, rule_name: str, num_records: int, seed: int = DEFAULT_SEED,
+                     start_time: datetime = DEFAULT_START_TIME, line_lengths=None) -> list:
+    '''
+    Returns num_records records for the given rule with increasing timestamps
+    '''
+    return list(itertools.islice(iter_records(source, rule_name, seed, start_time, line_lengths), num_records))
+
+
+# Key names of the log objects, as written by each AWS service (see the known_key_path_pattern of each rule)
+
+def elb_key_prefix(timestamp: datetime) -> str:
+    return (f"AWSLogs/{AWS_ACCOUNT_ID}/elasticloadbalancing/us-east-1/{timestamp:%Y/%m/%d}/"
+            f"{AWS_ACCOUNT_ID}_elasticloadbalancing_us-east-1")
+
+
+def alb_key(rng: random.Random, timestamp: datetime) -> str:
+    return (f"{elb_key_prefix(timestamp)}_app.my-loadbalancer.50dc6c495c0c9188_{timestamp:%Y%m%dT%H%M}Z_"
+            f"{random_ip(rng)}_{random_hex(rng, 8)}.log.gz")
+
+
+def classic_elb_key(rng: random.Random, timestamp: datetime) -> str:
+    return (f"{elb_key_prefix(timestamp)}_my-loadbalancer_{timestamp:%Y%m%dT%H%M}Z_{random_ip(rng)}_"
+            f"{random_hex(rng, 8)}.log")
+
+
+def nlb_key(rng: random.Random, timestamp: datetime) -> str:
+    return (f"{elb_key_prefix(timestamp)}_net.my-network-loadbalancer.c6e77e28c25b2234_{timestamp:%Y%m%dT%H%M}Z_"
+            f"{random_hex(rng, 8)}.log.gz")
+
+
+def cloudfront_key(rng: random.Random, timestamp: datetime) -> str:
+    return f"cloudfront/E1SFLUZKKLSP61.{timestamp:%Y-%m-%d-%H}.{random_hex(rng, 8)}.gz"
+
+
+def cloudtrail_key(rng: random.Random, timestamp: datetime) -> str:
+    return (f"AWSLogs/{AWS_ACCOUNT_ID}/CloudTrail/us-east-1/{timestamp:%Y/%m/%d}/"
+            f"{AWS_ACCOUNT_ID}_CloudTrail_us-east-1_{timestamp:%Y%m%dT%H%M}Z_{random_hex(rng, 16)}.json.gz")
+
+
+def global_accelerator_key(rng: random.Random, timestamp: datetime) -> str:
+    return (f"AWSLogs/{AWS_ACCOUNT_ID}/globalaccelerator/us-west-2/{timestamp:%Y/%m/%d}/"
+            f"{AWS_ACCOUNT_ID}_globalaccelerator_1234abcd-abcd-1234-abcd-1234abcdef12_{timestamp:%Y%m%dT%H%M}Z_"
+            f"{random_hex(rng, 8)}.log.gz")
+
+
+def msk_key(rng: random.Random, timestamp: datetime) -> str:
+    return (f"AWSLogs/{AWS_ACCOUNT_ID}/KafkaBrokerLogs/us-east-1/my-cluster-043b6d76-352c-494a-9eee-fbff5cc1687d-20/"
+            f"{timestamp:%Y-%m-%d-%H}/Broker-{rng.randrange(1, 4)}_{timestamp:%H-%M}_{random_hex(rng, 8)}.log.gz")
+
+
+def network_firewall_key(rng: random.Random, timestamp: datetime) -> str:
+    return (f"AWSLogs/{AWS_ACCOUNT_ID}/network-firewall/flow/us-east-1/my-firewall/{timestamp:%Y/%m/%d/%H}/"
+            f"{AWS_ACCOUNT_ID}_network-firewall_flow_us-east-1_my-firewall_{timestamp:%Y%m%d%H%M}_"
+            f"{random_hex(rng, 8)}.log.gz")
+
+
+def redshift_key(rng: random.Random, timestamp: datetime) -> str:
+    return (f"AWSLogs/{AWS_ACCOUNT_ID}/redshift/us-east-1/{timestamp:%Y/%m/%d}/"
+            f"{AWS_ACCOUNT_ID}_redshift_us-east-1_my-cluster_connectionlog_{timestamp:%Y-%m-%dT%H:%M}.gz")
+
+
+def s3_access_key(rng: random.Random, timestamp: datetime) -> str:
+    return f"s3-access-logs/{timestamp:%Y-%m-%d-%H-%M-%S}-{random_hex(rng, 16).upper()}"
+
+
+def vpc_dns_query_key(rng: random.Random, timestamp: datetime) -> str:
+    return (f"AWSLogs/{AWS_ACCOUNT_ID}/vpcdnsquerylogs/vpc-0123456789abcdef0/{timestamp:%Y/%m/%d}/"
+            f"vpc-0123456789abcdef0_vpcdnsquerylogs_{AWS_ACCOUNT_ID}_{timestamp:%Y%m%dT%H%M}Z_"
+            f"{random_hex(rng, 8)}.log.gz")
+
+
+def vpc_flow_key(rng: random.Random, timestamp: datetime) -> str:
+    return (f"AWSLogs/{AWS_ACCOUNT_ID}/vpcflowlogs/us-east-1/{timestamp:%Y/%m/%d}/"
+            f"{AWS_ACCOUNT_ID}_vpcflowlogs_us-east-1_fl-07f38b767c7cd46e3_{timestamp:%Y%m%dT%H%M}Z_"
+            f"{random_hex(rng, 8)}.log.gz")
+
+
+def waf_key(rng: random.Random, timestamp: datetime) -> str:
+    return (f"AWSLogs/{AWS_ACCOUNT_ID}/WAFLogs/us-east-1/my-web-acl/{timestamp:%Y/%m/%d/%H/%M}/"
+            f"{AWS_ACCOUNT_ID}_waflogs_us-east-1_my-web-acl_{timestamp:%Y%m%dT%H%M}Z_{random_hex(rng, 8)}.log.gz")
+
+
+def appfabric_key(rng: random.Random, timestamp: datetime) -> str:
+    return (f"AWSAppFabric/AuditLog/OCSF/JSON/SLACK/{random_uuid(rng)}/{random_uuid(rng)}/{timestamp:%Y%m%d}/"
+            f"AuditLog-{int(timestamp.timestamp() * 1000)}-{random_uuid(rng)}")
+
+
+def cwl_to_fh_key(rng: random.Random, timestamp: datetime) -> str:
+    return (f"cwl-to-firehose/{timestamp:%Y/%m/%d/%H}/my-delivery-stream-1-{timestamp:%Y-%m-%d-%H-%M-%S}-"
+            f"{random_uuid(rng)}.gz")
+
+
+def generic_text_key(rng: random.Random, timestamp: datetime) -> str:
+    return f"logs/my-app/{timestamp:%Y/%m/%d}/my-app-{timestamp:%Y%m%dT%H%M}-{random_hex(rng, 8)}.log.gz"
+
+
+def generic_json_key(rng: random.Random, timestamp: datetime) -> str:
+    return f"logs/my-app/{timestamp:%Y/%m/%d}/my-app-{timestamp:%Y%m%dT%H%M}-{random_hex(rng, 8)}.json.gz"
+
+
+class LogObjectFormat():
+    '''
+    How a service writes log objects: the key names, the serialization of the records (text lines,
+    a JSON document with a Records list, a stream of JSON objects or CloudWatch Logs subscription
+    messages) and the header lines of text objects. Objects are gzipped if the key ends with .gz.
+    '''
+
+    def __init__(self, key_name, serialization: str, header_lines: list = None):
+        self.key_name = key_name
+        self.serialization = serialization
+        self.header_lines = header_lines or []
+
+
+CLOUDFRONT_HEADER_LINES = [
+    '#Version: 1.0',
+    '#Fields: date time x-edge-location sc-bytes c-ip cs-method cs(Host) cs-uri-stem sc-status cs(Referer) '
+    'cs(User-Agent) cs-uri-query cs(Cookie) x-edge-result-type x-edge-request-id x-host-header cs-protocol cs-bytes '
+    'time-taken x-forwarded-for ssl-protocol ssl-cipher x-edge-response-result-type cs-protocol-version fle-status '
+    'fle-encrypted-fields c-port time-to-first-byte x-edge-detailed-result-type sc-content-type sc-content-len '
+    'sc-range-start sc-range-end'
+]
+
+GLOBAL_ACCELERATOR_HEADER_LINES = [
+    'version aws_account_id accelerator_id client_ip client_port gip gip_port endpoint_ip endpoint_port protocol '
+    'ip_address_type packets bytes start_time end_time action log-status globalaccelerator_source_ip '
+    'globalaccelerator_source_port endpoint_region globalaccelerator_region direction vpc_id'
+]
+
+VPC_FLOW_HEADER_LINES = [
+    'version account-id interface-id srcaddr dstaddr srcport dstport protocol packets bytes start end action log-status'
+]
+
+# (source, rule name) -> LogObjectFormat
+LOG_OBJECT_FORMATS = {
+    ('aws', 'ALB'): LogObjectFormat(alb_key, 'text'),
+    ('aws', 'appfabric-ocsf-json'): LogObjectFormat(appfabric_key, 'json_stream'),
+    ('aws', 'Classic-ELB'): LogObjectFormat(classic_elb_key, 'text'),
+    ('aws', 'cloudfront'): LogObjectFormat(cloudfront_key, 'text', CLOUDFRONT_HEADER_LINES),
+    ('aws', 'CloudTrail'): LogObjectFormat(cloudtrail_key, 'json_records'),
+    ('aws', 'global-accelerator'): LogObjectFormat(global_accelerator_key, 'text', GLOBAL_ACCELERATOR_HEADER_LINES),
+    ('aws', 'msk'): LogObjectFormat(msk_key, 'text'),
+    ('aws', 'network-firewall'): LogObjectFormat(network_firewall_key, 'json_stream'),
+    ('aws', 'NLB'): LogObjectFormat(nlb_key, 'text'),
+    ('aws', 'redshift'): LogObjectFormat(redshift_key, 'text'),
+    ('aws', 's3'): LogObjectFormat(s3_access_key, 'text'),
+    ('aws', 'vpcdnsquerylogs'): LogObjectFormat(vpc_dns_query_key, 'json_stream'),
+    ('aws', 'vpcflowlogs'): LogObjectFormat(vpc_flow_key, 'text', VPC_FLOW_HEADER_LINES),
+    ('aws', 'waf'): LogObjectFormat(waf_key, 'json_stream'),
+    ('custom', 'cwl_to_fh'): LogObjectFormat(cwl_to_fh_key, 'cwl_subscription'),
+    ('generic', 'generic'): LogObjectFormat(generic_text_key, 'text'),
+    ('generic', 'generic_json_stream'): LogObjectFormat(generic_json_key, 'json_stream'),
+}
+
+
+class LogObject():
+    '''
+    A generated log object: its key name, content as stored in S3, number of records and size
+    before compression
+    '''
+
+    def __init__(self, key: str, body: bytes, num_records: int, uncompressed_size: int):
+        self.key = key
+        self.body = body
+        self.num_records = num_records
+        self.uncompressed_size = uncompressed_size
+
+
+def get_cwl_subscription_messages(records: list, rng: random.Random) -> list:
+    '''
+    Groups log events into CloudWatch Logs subscription messages, as Amazon Data Firehose receives
+    them (gzipped one by one by CloudWatch Logs). The first message is the CONTROL_MESSAGE
+    CloudWatch Logs sends to check the destination.
+    '''
+    messages = [{
+        'messageType': 'CONTROL_MESSAGE',
+        'owner': 'CloudwatchLogs',
+        'logGroup': '',
+        'logStream': '',
+        'subscriptionFilters': [],
+        'logEvents': [{'id': '', 'timestamp': records[0]['timestamp'] if records else 0,
+                       'message': 'CWL CONTROL MESSAGE: Checking health of destination Firehose.'}]
+    }]
+
+    position = 0
+    while position < len(records):
+        events = records[position:position + rng.randrange(1, 100)]
+        position += len(events)
+        messages.append({
+            'messageType': 'DATA_MESSAGE',
+            'owner': events[0]['aws.account.id'],
+            'logGroup': events[0]['aws.log_group'],
+            'logStream': events[0]['aws.log_stream'],
+            'subscriptionFilters': ['my-subscription-filter'],
+            'logEvents': [{k: event[k] for k in ('id', 'timestamp', 'message')} for event in events]
+        })
+
+    return messages
+
+
+def serialize_records(log_object_format: LogObjectFormat, records: list, rng: random.Random) -> tuple:
+    '''
+    Returns the content of a log object with the given records and its size before any compression
+    '''
+    if log_object_format.serialization == 'text':
+        body = ''.join(f"{line}\n" for line in log_object_format.header_lines + records).encode('utf-8')
+    elif log_object_format.serialization == 'json_records':
+        body = json.dumps({'Records': records}).encode('utf-8')
+    elif log_object_format.serialization == 'json_stream':
+        body = ''.join(f"{json.dumps(record)}\n" for record in records).encode('utf-8')
+    elif log_object_format.serialization == 'cwl_subscription':
+        messages = [json.dumps(message).encode('utf-8') for message in get_cwl_subscription_messages(records, rng)]
+        return b''.join(gzip.compress(message) for message in messages), sum(len(message) for message in messages)
+    else:
+        raise ValueError(f"Unknown serialization {log_object_format.serialization}")
+
+    return body, len(body)
+
+
+def generate_log_object(source: str, rule_name: str, num_records: int = None, size: int = None,
+                        seed: int = DEFAULT_SEED, start_time: datetime = DEFAULT_START_TIME,
+                        line_lengths=None) -> LogObject:
+    '''
+    Returns a log object for the given rule with num_records records, or with as many records as
+    needed to reach approximately size bytes before compression
+    '''
+    if (num_records is None) == (size is None):
+        raise ValueError("Either num_records or size is required")
+
+    log_object_format = LOG_OBJECT_FORMATS[(source, rule_name)]
+    records_iterator = iter_records(source, rule_name, seed, start_time, line_lengths)
+
+    if num_records is not None:
+        records = list(itertools.islice(records_iterator, num_records))
+    else:
+        records = []
+        records_size = 0
+        while records_size < size:
+            records.append(next(records_iterator))
+            records_size += get_record_length(records[-1]) + 1
+
+    rng = random.Random(f"{seed}-{source}-{rule_name}-object")
+    key = log_object_format.key_name(rng, start_time)
+    body, uncompressed_size = serialize_records(log_object_format, records, rng)
+    if key.endswith('.gz'):
+        body = gzip.compress(body)
+
+    return LogObject(key, body, len(records), uncompressed_size)
+
+
+def generate_log_objects(source: str, rule_name: str, num_objects: int, num_records: int = None, size: int = None,
+                         seed: int = DEFAULT_SEED, start_time: datetime = DEFAULT_START_TIME,
+                         line_lengths=None, interval: timedelta = timedelta(minutes=5)):
+    '''
+    Yields num_objects log objects for the given rule, delivered by the service every interval
+    '''
+    for i in range(num_objects):
+        yield generate_log_object(source, rule_name, num_records, size, seed + i, start_time + i * interval,
+                                  line_lengths)
+
+
+def parse_size(value: str) -> int:
+    '''
+    Parses a size in bytes with an optional KB, MB or GB suffix, e.g. 10MB
+    '''
+    match = re.match(r'^(\d+(?:\.\d+)?)\s*([KMG]?)B?$', value.strip(), re.IGNORECASE)
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid size {value}")
+    multiplier = {'': 1, 'K': 1024, 'M': 1048576, 'G': 1073741824}[match.group(2).upper()]
+    return int(float(match.group(1)) * multiplier)
+
+
+def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Generates synthetic log objects for the built-in log processing rules.')
+    parser.add_argument('--output-dir', required=True,
+                        help='Directory to write the log objects to, under <source>/<rule name>/<key name>')
+    parser.add_argument('--rules', default='.*',
+                        help='Only generate objects for rules (source.name) matching this regular expression')
+    parser.add_argument('--objects', type=int, default=1, help='Log objects per rule (default: 1)')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--records', type=int, default=None, help='Records per log object (default: 1000)')
+    group.add_argument('--size', type=parse_size, default=None,
+                       help='Approximate size of each log object before compression, e.g. 10MB')
+    parser.add_argument('--line-length', type=int, default=None,
+                        help='Median record length. Records of formats with free-form fields are padded to '
+                             'lengths following a log-normal distribution')
+    parser.add_argument('--line-length-sigma', type=float, default=0.5,
+                        help='Sigma of the log-normal distribution of record lengths (default: 0.5)')
+    parser.add_argument('--max-line-length', type=int, default=None, help='Maximum record length')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Seed of the synthetic corpora')
+    args = parser.parse_args()
+
+    if args.records is None and args.size is None:
+        args.records = 1000
+
+    line_lengths = None
+    if args.line_length:
+        line_lengths = lognormal_line_lengths(args.line_length, args.line_length_sigma, args.max_line_length)
+
+    for source, rule_name in sorted(LOG_OBJECT_FORMATS):
+        if not re.search(args.rules, f"{source}.{rule_name}"):
+            continue
+        for log_object in generate_log_objects(source, rule_name, args.objects, args.records, args.size, args.seed,
+                                               line_lengths=line_lengths):
+            path = os.path.join(args.output_dir, source, rule_name, log_object.key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(log_object.body)
+            print(f"{source}.{rule_name}: {log_object.key} ({log_object.num_records} records, "
+                  f"{log_object.uncompressed_size / 1024:.0f} KB, {len(log_object.body) / 1024:.0f} KB stored)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Differential testing of processing engines against a golden corpus: log objects for every
+built-in rule (tests/test_data/golden) paired with the exact log records the reference
+implementation (process_log_object and DynatraceSink) posts to Dynatrace for them.
+
+An engine is a function with the signature of process_log_object. Its output is captured at the
+HTTP transport of the Dynatrace sinks it pushes to, so batching, serialization and compression
+changes are covered. Records are compared one by one in order, including the order of their
+attributes and the JSON types of their values (e.g. 1 vs 1.0), and the throughput of each engine
+is measured on the same corpus.
+
+Run it from the repository root:
+  python tests/benchmarks/differential.py                                 # reference engine only
+  python tests/benchmarks/differential.py --engine fast=my_module:process_log_object --repeat 5
+  python tests/benchmarks/differential.py --update                        # regenerate the golden corpus
+
+Regenerate the golden corpus only for intended output changes, and review its diff.
+"""
+
+import argparse
+import contextlib
+import gzip
+import importlib
+import io
+import json
+import logging
+import os
+import re
+import statistics
+import sys
+import time
+from unittest.mock import patch
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+sys.path.insert(0, os.path.join(REPO_ROOT, 'src'))
+sys.path.insert(0, REPO_ROOT)
+
+import requests
+from tests.benchmarks import corpus
+from tests.benchmarks.load_test import InMemoryS3Client, FakeLambdaContext
+from log.processing import log_processing_rules, processing
+from log.sinks import dynatrace
+
+GOLDEN_DIRECTORY = os.path.join(REPO_ROOT, 'tests', 'test_data', 'golden')
+GOLDEN_MANIFEST = 'manifest.json'
+
+GOLDEN_BUCKET = 'golden-corpus-bucket'
+GOLDEN_BUCKET_REGION = 'eu-west-1'
+GOLDEN_FUNCTION_ARN = 'arn:aws:lambda:eu-west-1:012345678910:function:golden-corpus'
+GOLDEN_ANNOTATIONS = {'team': 'log-forwarding', 'environment': 'golden'}
+
+# Records of the golden objects follow a log-normal line length distribution
+GOLDEN_NUM_RECORDS = 25
+GOLDEN_LINE_LENGTH = 300
+GOLDEN_LINE_LENGTH_SIGMA = 1.0
+
+# Additional cases with long lines, to cover attribute extraction being skipped (lines longer than
+# LOG_PROCESSING_MAX_EXTRACTION_LINE_LENGTH) and content being trimmed by the sink (longer than
+# DYNATRACE_LOG_INGEST_CONTENT_MAX_LENGTH): (source, rule name) -> line lengths
+GOLDEN_LONG_LINE_CASES = {
+    ('generic', 'generic'): [200, 40000, 70000],
+    ('aws', 'CloudTrail'): [1000, 70000],
+}
+
+
+class CapturingTransportAdapter(requests.adapters.BaseAdapter):
+    '''
+    requests transport adapter that stores the decompressed body of each request and answers it
+    with an HTTP 204 without any I/O
+    '''
+
+    def __init__(self):
+        super().__init__()
+        self.payloads = []
+
+    def send(self, request, **kwargs):
+        body = request.body
+        if request.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        self.payloads.append(body)
+
+        response = requests.Response()
+        response.status_code = 204
+        response.request = request
+        response.url = request.url
+        response._content = b''
+        return response
+
+    def close(self):
+        pass
+
+
+class CapturingDynatraceSink(dynatrace.DynatraceSink):
+    '''
+    DynatraceSink capturing the log records it posts instead of sending them
+    '''
+
+    def __init__(self):
+        self.transport = CapturingTransportAdapter()
+        super().__init__('https://abc12345.live.dynatrace.com', '/dynatrace/golden/api-key', sink_id='golden')
+
+    def _create_session(self):
+        session = requests.Session()
+        session.mount('https://', self.transport)
+        return session
+
+    def get_api_key(self, force_fetch: bool = False):
+        return 'golden-api-key'
+
+    def get_posted_records(self) -> list:
+        '''
+        Returns each posted log record serialized with json.dumps, which keeps the order of the
+        attributes and the JSON types of the values as posted
+        '''
+        return [json.dumps(record) for payload in self.transport.payloads for record in json.loads(payload)]
+
+
+class GoldenCase():
+    '''
+    A log object of the golden corpus and the log records expected for it
+    '''
+
+    def __init__(self, name: str, source: str, rule_name: str, key: str, object_file: str, expected_file: str,
+                 directory: str = GOLDEN_DIRECTORY):
+        self.name = name
+        self.source = source
+        self.rule_name = rule_name
+        self.key = key
+        self.object_file = object_file
+        self.expected_file = expected_file
+        self.directory = directory
+
+    def get_body(self) -> bytes:
+        with open(os.path.join(self.directory, self.object_file), 'rb') as f:
+            return f.read()
+
+    def get_expected_records(self) -> list:
+        with open(os.path.join(self.directory, self.expected_file), encoding='utf-8') as f:
+            return f.read().splitlines()
+
+    def to_dict(self) -> dict:
+        return {'name': self.name, 'source': self.source, 'rule': self.rule_name, 'key': self.key,
+                'object': self.object_file, 'expected': self.expected_file}
+
+
+def load_golden_cases(directory: str = GOLDEN_DIRECTORY) -> list:
+    with open(os.path.join(directory, GOLDEN_MANIFEST), encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    return [GoldenCase(case['name'], case['source'], case['rule'], case['key'], case['object'], case['expected'],
+                       directory) for case in manifest['cases']]
+
+
+def load_engine(engine: str):
+    '''
+    Imports an engine given as module:function
+    '''
+    module_name, _, function_name = engine.partition(':')
+    return getattr(importlib.import_module(module_name), function_name or 'process_log_object')
+
+
+def run_engine(engine, case: GoldenCase, body: bytes = None, rule=None) -> tuple:
+    '''
+    Processes the log object of a golden case with the engine. Returns the posted log records and
+    the time taken in seconds.
+    '''
+    if body is None:
+        body = case.get_body()
+    if rule is None:
+        rule = log_processing_rules.load_built_in_rules()[case.source][case.rule_name]
+
+    s3_client = InMemoryS3Client()
+    s3_client.put_object(Bucket=GOLDEN_BUCKET, Key=case.key, Body=body)
+    sink = CapturingDynatraceSink()
+
+    # Context attributes include the function ARN. The sink flushes its metrics to stdout.
+    with patch.dict(os.environ, {'FORWARDER_FUNCTION_ARN': GOLDEN_FUNCTION_ARN}), \
+            contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        engine(rule, GOLDEN_BUCKET, case.key, GOLDEN_BUCKET_REGION, [sink], FakeLambdaContext(3600000),
+               user_defined_annotations=dict(GOLDEN_ANNOTATIONS), s3_client=s3_client)
+        sink.flush()
+        seconds = time.perf_counter() - start
+
+    return sink.get_posted_records(), seconds
+
+
+def describe_difference(expected: str, actual: str) -> str:
+    '''
+    Describes how a log record differs from the expected one
+    '''
+    expected_record = json.loads(expected)
+    actual_record = json.loads(actual)
+
+    differences = []
+    missing = [key for key in expected_record if key not in actual_record]
+    extra = [key for key in actual_record if key not in expected_record]
+    changed = [key for key in expected_record if key in actual_record and
+               json.dumps(expected_record[key]) != json.dumps(actual_record[key])]
+
+    if missing:
+        differences.append(f"missing attributes {missing}")
+    if extra:
+        differences.append(f"extra attributes {extra}")
+    for key in changed:
+        differences.append(f"{key}: expected {json.dumps(expected_record[key])[:80]}, "
+                           f"got {json.dumps(actual_record[key])[:80]}")
+    if not differences:
+        differences.append(f"attribute order: expected {list(expected_record)}, got {list(actual_record)}")
+
+    return '; '.join(differences)
+
+
+def compare_records(expected: list, actual: list, max_differences: int = 5) -> list:
+    '''
+    Compares the log records posted by an engine with the expected ones, in order. Returns the
+    descriptions of the first max_differences differences.
+    '''
+    differences = []
+
+    if len(expected) != len(actual):
+        differences.append(f"expected {len(expected)} records, got {len(actual)}")
+
+    for i, (expected_record, actual_record) in enumerate(zip(expected, actual)):
+        if len(differences) >= max_differences:
+            break
+        if expected_record != actual_record:
+            differences.append(f"record {i}: {describe_difference(expected_record, actual_record)}")
+
+    return differences
+
+
+def generate_golden_corpus(directory: str = GOLDEN_DIRECTORY, num_records: int = GOLDEN_NUM_RECORDS,
+                           seed: int = corpus.DEFAULT_SEED) -> list:
+    '''
+    Writes a log object for every rule with a corpus format and the records the reference engine
+    posts for it, plus the manifest. Returns the golden cases.
+    '''
+    cases = []
+    objects = []
+
+    for source, rule_name in sorted(corpus.LOG_OBJECT_FORMATS):
+        line_lengths = corpus.lognormal_line_lengths(GOLDEN_LINE_LENGTH, GOLDEN_LINE_LENGTH_SIGMA)
+        objects.append((f"{source}.{rule_name}", source, rule_name, corpus.generate_log_object(
+            source, rule_name, num_records, seed=seed, line_lengths=line_lengths)))
+
+    for (source, rule_name), lengths in sorted(GOLDEN_LONG_LINE_CASES.items()):
+        lengths_iterator = iter(lengths)
+        objects.append((f"{source}.{rule_name}.long_lines", source, rule_name, corpus.generate_log_object(
+            source, rule_name, len(lengths), seed=seed, line_lengths=lambda rng: next(lengths_iterator))))
+
+    for name, source, rule_name, log_object in objects:
+        case = GoldenCase(name, source, rule_name, log_object.key, f"{name}/{os.path.basename(log_object.key)}",
+                          f"{name}/expected.jsonl", directory)
+        os.makedirs(os.path.join(directory, name), exist_ok=True)
+        with open(os.path.join(directory, case.object_file), 'wb') as f:
+            f.write(log_object.body)
+
+        records, _ = run_engine(processing.process_log_object, case, log_object.body)
+        with open(os.path.join(directory, case.expected_file), 'w', encoding='utf-8') as f:
+            f.writelines(f"{record}\n" for record in records)
+
+        cases.append(case)
+
+    with open(os.path.join(directory, GOLDEN_MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump({'seed': seed, 'records': num_records, 'cases': [case.to_dict() for case in cases]}, f, indent=2)
+        f.write('\n')
+
+    return cases
+
+
+def print_results(engines: dict, results: dict) -> None:
+    reference_records_per_s = results['reference']['records_per_s']
+
+    print("{:<20} {:>9} {:>13} {:>9} {:>11}".format('engine', 'records', 'records/s', 'speedup', 'mismatches'))
+    for name in engines:
+        result = results[name]
+        speedup = result['records_per_s'] / reference_records_per_s if reference_records_per_s else 0
+        print("{:<20} {:>9} {:>13.0f} {:>8.2f}x {:>11}".format(
+            name, result['records'], result['records_per_s'], speedup, len(result['mismatches'])))
+
+    for name in engines:
+        for case_name, differences in results[name]['mismatches'].items():
+            print(f"\n{name} differs from the golden output on {case_name}:")
+            for difference in differences:
+                print(f"  {difference}")
+
+
+def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Compares processing engines against the golden corpus.')
+    parser.add_argument('--engine', action='append', default=[], metavar='NAME=MODULE:FUNCTION',
+                        help='Engine to compare, with the signature of process_log_object (repeatable)')
+    parser.add_argument('--filter', help='Only run golden cases whose name matches this regular expression')
+    parser.add_argument('--repeat', type=int, default=3, help='Measured repetitions per case (default: 3)')
+    parser.add_argument('--max-differences', type=int, default=5, help='Differences reported per case (default: 5)')
+    parser.add_argument('--directory', default=GOLDEN_DIRECTORY, help='Golden corpus directory')
+    parser.add_argument('--update', action='store_true',
+                        help='Regenerate the golden corpus with the reference engine instead of comparing')
+    args = parser.parse_args()
+
+    # Rules log errors for records they can't parse (e.g. timestamps), keep the output readable
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    if args.update:
+        cases = generate_golden_corpus(args.directory)
+        print(f"Wrote {len(cases)} golden cases to {args.directory}")
+        return
+
+    engines = {'reference': processing.process_log_object}
+    for engine in args.engine:
+        name, _, engine_path = engine.rpartition('=')
+        engines[name or engine_path] = load_engine(engine_path)
+
+    built_in_rules = log_processing_rules.load_built_in_rules()
+    cases = [case for case in load_golden_cases(args.directory)
+             if not args.filter or re.search(args.filter, case.name)]
+
+    results = {}
+    for name, engine in engines.items():
+        result = {'records': 0, 'seconds': 0, 'mismatches': {}}
+        for case in cases:
+            body = case.get_body()
+            rule = built_in_rules[case.source][case.rule_name]
+            records, _ = run_engine(engine, case, body, rule)
+            differences = compare_records(case.get_expected_records(), records, args.max_differences)
+            if differences:
+                result['mismatches'][case.name] = differences
+
+            result['records'] += len(records)
+            result['seconds'] += statistics.median(
+                run_engine(engine, case, body, rule)[1] for _ in range(args.repeat))
+
+        result['records_per_s'] = result['records'] / result['seconds'] if result['seconds'] else 0
+        results[name] = result
+
+    print_results(engines, results)
+
+    if any(result['mismatches'] for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
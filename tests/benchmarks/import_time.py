@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Measure the cold start of the forwarder (importing app.py, which also loads rules and sinks)
+with `python -X importtime` and check it against the budget in import_time_budget.json.
+
+Each run is a fresh interpreter. A first warm-up run is discarded so that bytecode compilation
+doesn't count. The median of the remaining runs is reported per module, and the script exits
+with status 1 if the median exceeds the budget or a forbidden module was imported.
+
+Run it from the repository root:
+  python tests/benchmarks/import_time.py                          # 5 runs, check budget
+  python tests/benchmarks/import_time.py --runs 10 --top 30       # more runs, longer report
+  python tests/benchmarks/import_time.py --output import_time.json
+  python tests/benchmarks/import_time.py --budget-scale 1.5       # slower machine than the baseline
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+DEFAULT_BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'import_time_budget.json')
+
+# Minimum configuration app.py needs at import time. Values already in the environment win.
+DEFAULT_ENVIRONMENT = {
+    'DEPLOYMENT_NAME': 'import-time-benchmark',
+    'POWERTOOLS_METRICS_NAMESPACE': 'local',
+    'LOG_FORWARDER_CONFIGURATION_LOCATION': 'local',
+    'VERIFY_DT_SSL_CERT': 'true',
+    'DYNATRACE_1_ENV_URL': 'https://abc12345.live.dynatrace.com',
+    'DYNATRACE_1_API_KEY_PARAM': '/dynatrace/s3-log-forwarder/benchmark/api-key',
+    'AWS_DEFAULT_REGION': 'us-east-1',
+}
+
+
+def parse_importtime_output(stderr: str) -> dict:
+    """
+    Parse the output of `python -X importtime`.
+
+    Args:
+        stderr: stderr of the interpreter.
+
+    Returns:
+        A dict of module name to (self_us, cumulative_us).
+    """
+    modules = {}
+
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        # skip the header line
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        modules[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+
+    return modules
+
+
+def run_once(module: str) -> dict:
+    """
+    Import the given module in a fresh interpreter and return its parsed import times.
+    """
+    env = dict(os.environ)
+    for k, v in DEFAULT_ENVIRONMENT.items():
+        env.setdefault(k, v)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [os.path.join(REPO_ROOT, 'src')] + ([env['PYTHONPATH']] if env.get('PYTHONPATH') else []))
+
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=False)
+
+    if result.returncode != 0:
+        print(result.stderr[-4000:], file=sys.stderr)
+        raise RuntimeError(f"Importing {module} failed with exit code {result.returncode}")
+
+    return parse_importtime_output(result.stderr)
+
+
+def build_report(runs: list, module: str, top: int) -> dict:
+    """
+    Aggregate several runs into a report with the median self and cumulative time per module.
+    """
+    module_names = set()
+    for run in runs:
+        module_names.update(run.keys())
+
+    medians = {}
+    for name in module_names:
+        samples = [run[name] for run in runs if name in run]
+        medians[name] = {
+            'self_us': int(statistics.median(s[0] for s in samples)),
+            'cumulative_us': int(statistics.median(s[1] for s in samples))
+        }
+
+    top_modules = sorted(medians.items(), key=lambda i: i[1]['cumulative_us'], reverse=True)[:top]
+
+    return {
+        'module': module,
+        'runs': len(runs),
+        'python': sys.version.split()[0],
+        'cumulative_import_us': medians.get(module, {}).get('cumulative_us', 0),
+        'self_import_us': medians.get(module, {}).get('self_us', 0),
+        'imported_modules': sorted(module_names),
+        'top_modules': [{'name': name, **times} for name, times in top_modules]
+    }
+
+
+def check_budget(report: dict, budget: dict, scale: float) -> list:
+    """
+    Returns a list of budget violations (empty if within budget).
+    """
+    violations = []
+
+    max_cumulative = budget['max_cumulative_import_us'] * scale
+    if report['cumulative_import_us'] > max_cumulative:
+        violations.append("{} cumulative import time {} us exceeds budget of {:.0f} us".format(
+            report['module'], report['cumulative_import_us'], max_cumulative))
+
+    max_self = budget['max_self_import_us'] * scale
+    if report['self_import_us'] > max_self:
+        violations.append("{} module initialization time {} us exceeds budget of {:.0f} us".format(
+            report['module'], report['self_import_us'], max_self))
+
+    for forbidden_module in budget.get('forbidden_modules', []):
+        if forbidden_module in report['imported_modules']:
+            violations.append("{} is imported at cold start".format(forbidden_module))
+
+    return violations
+
+
+def print_report(report: dict) -> None:
+    """Print a human readable summary of the report."""
+    print("Cold start of '{}' (median of {} runs, Python {})".format(
+        report['module'], report['runs'], report['python']))
+    print("  cumulative: {:>10} us".format(report['cumulative_import_us']))
+    print("  self:       {:>10} us".format(report['self_import_us']))
+    print("")
+    print("{:>12} {:>12}  {}".format('self [us]', 'cumul. [us]', 'module'))
+    for entry in report['top_modules']:
+        print("{:>12} {:>12}  {}".format(entry['self_us'], entry['cumulative_us'], entry['name']))
+
+
+def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Measure the cold start import time of the forwarder.')
+    parser.add_argument('--module', default='app', help='Module to import (default: app)')
+    parser.add_argument('--runs', type=int, default=5, help='Number of measured runs (default: 5)')
+    parser.add_argument('--top', type=int, default=20, help='Number of modules to show (default: 20)')
+    parser.add_argument('--budget', default=DEFAULT_BUDGET_FILE, help='Budget file')
+    parser.add_argument('--budget-scale', type=float, default=float(os.getenv('IMPORT_TIME_BUDGET_SCALE', '1')),
+                        help='Multiplier applied to the time budgets to account for slower machines')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    # warm-up run to generate bytecode caches
+    run_once(args.module)
+    runs = [run_once(args.module) for _ in range(args.runs)]
+
+    report = build_report(runs, args.module, args.top)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    with open(args.budget, encoding='utf-8') as f:
+        budget = json.load(f)
+
+    violations = check_budget(report, budget, args.budget_scale)
+    if violations:
+        print("")
+        for violation in violations:
+            print("BUDGET EXCEEDED: {}".format(violation))
+        sys.exit(1)
+
+    print("")
+    print("Within budget.")
+
+
+if __name__ == "__main__":
+    main()
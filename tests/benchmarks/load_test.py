@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Offline load test of the whole forwarder: replays synthetic SQS batches through app.lambda_handler
+at a target rate, without any AWS or Dynatrace dependency:
+
+  - log objects of any built-in rule, generated by corpus.py, are served by an in-memory S3 stand-in
+    (ContentLength, ContentEncoding and range requests are supported)
+  - logs are posted to a local HTTP server imitating the Dynatrace /api/v2/logs/ingest endpoint,
+    with configurable latency and a configurable mix of 204, 200, 400, 429 and 503 responses
+  - each batch is processed with a fake Lambda context whose remaining time is driven by --timeout
+
+It reports the throughput, the p50 and p99 processing latency of log objects, the peak RSS of the
+process and the number of timeouts, which helps sizing LambdaSQSMessageBatchSize and the memory of
+the function for a given log volume.
+
+Run it from the repository root:
+  python tests/benchmarks/load_test.py                                  # default scenario
+  python tests/benchmarks/load_test.py --batch-size 10 --rate 20 --messages 500
+  python tests/benchmarks/load_test.py --latency-ms 200 --responses 204=90,429=8,503=2 --timeout 60
+"""
+
+import argparse
+import http.server
+import io
+import json
+import logging
+import os
+import platform
+import random
+import re
+import resource
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Minimum configuration the forwarder needs. Values already in the environment win, except the
+# Dynatrace environment URL, which points to the local server once it's started.
+DEFAULT_ENVIRONMENT = {
+    'DEPLOYMENT_NAME': 'load-test',
+    'POWERTOOLS_METRICS_NAMESPACE': 'local',
+    'POWERTOOLS_METRICS_DISABLED': 'true',
+    'LOG_FORWARDER_CONFIGURATION_LOCATION': 'local',
+    'FORWARDER_FUNCTION_ARN': 'arn:aws:lambda:us-east-1:012345678910:function:load-test',
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'LOGGING_LEVEL': 'WARNING',
+    'VERIFY_DT_SSL_CERT': 'false',
+    'DYNATRACE_1_API_KEY_PARAM': '/dynatrace/load-test/api-key',
+}
+
+for _k, _v in DEFAULT_ENVIRONMENT.items():
+    os.environ.setdefault(_k, _v)
+
+sys.path.insert(0, os.path.join(REPO_ROOT, 'src'))
+sys.path.insert(0, REPO_ROOT)
+
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+from tests.benchmarks import corpus
+
+LOGV2_API_PATH = '/api/v2/logs/ingest'
+
+LOAD_TEST_BUCKET = 'load-test-bucket'
+LOAD_TEST_API_KEY = 'load-test-api-key'
+
+DEFAULT_RESPONSES = '204=100'
+
+class InMemoryS3Client():
+    '''
+    Stand-in for the boto3 S3 client operations used by the forwarder, serving objects from memory.
+    latency_ms is added to each request as time to first byte.
+    '''
+
+    def __init__(self, latency_ms: float = 0):
+        self._objects = {}
+        self._latency_ms = latency_ms
+        self.num_requests = 0
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, ContentEncoding: str = None):
+        self._objects[(Bucket, Key)] = (Body, ContentEncoding)
+
+    def _get(self, bucket: str, key: str, operation: str):
+        self.num_requests += 1
+        if self._latency_ms:
+            time.sleep(self._latency_ms / 1000)
+        try:
+            return self._objects[(bucket, key)]
+        except KeyError:
+            raise ClientError({'Error': {'Code': 'NoSuchKey', 'Message': 'The specified key does not exist.'}},
+                              operation)
+
+    def get_object(self, Bucket: str, Key: str, Range: str = None, **kwargs):
+        body, content_encoding = self._get(Bucket, Key, 'GetObject')
+        response = {'ContentLength': len(body)}
+
+        if Range is not None:
+            match = re.match(r'^bytes=(\d*)-(\d*)$', Range)
+            if not match or match.groups() == ('', ''):
+                raise ClientError({'Error': {'Code': 'InvalidRange', 'Message': 'Invalid range'}}, 'GetObject')
+            first, last = match.groups()
+            if first == '':
+                first, last = max(len(body) - int(last), 0), len(body) - 1
+            else:
+                first, last = int(first), min(int(last), len(body) - 1) if last else len(body) - 1
+            response['ContentRange'] = f'bytes {first}-{last}/{len(body)}'
+            body = body[first:last + 1]
+            response['ContentLength'] = len(body)
+
+        if content_encoding:
+            response['ContentEncoding'] = content_encoding
+        response['Body'] = StreamingBody(io.BytesIO(body), len(body))
+
+        return response
+
+    def head_object(self, Bucket: str, Key: str, **kwargs):
+        body, content_encoding = self._get(Bucket, Key, 'HeadObject')
+        response = {'ContentLength': len(body)}
+        if content_encoding:
+            response['ContentEncoding'] = content_encoding
+        return response
+
+    def head_bucket(self, Bucket: str, **kwargs):
+        return {}
+
+
+class IngestServerStats():
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes = 0
+        self.responses = {}
+
+
+class IngestRequestHandler(http.server.BaseHTTPRequestHandler):
+    '''
+    Imitates the Dynatrace Logs V2 ingest API, answering after a random latency with a status code
+    picked from the configured weights
+    '''
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        if self.path != LOGV2_API_PATH:
+            self._respond(404, b'')
+            return
+
+        with server.stats.lock:
+            latency_ms = max(server.rng.gauss(server.latency_ms, server.latency_jitter_ms), 0)
+            status = server.rng.choices(server.status_codes, weights=server.status_weights)[0]
+            server.stats.requests += 1
+            server.stats.bytes += len(body)
+            server.stats.responses[status] = server.stats.responses.get(status, 0) + 1
+
+        time.sleep(latency_ms / 1000)
+
+        if status == 200:
+            response = {'details': {'message': 'Partial success', 'invalidEventsCount': 1}}
+        elif status == 400:
+            response = {'error': {'code': 400, 'message': 'Invalid log events'}}
+        elif status in (429, 503):
+            response = {'error': {'code': status, 'message': 'Throttled'}}
+        else:
+            response = None
+
+        self._respond(status, json.dumps(response).encode('utf-8') if response is not None else b'')
+
+    def do_HEAD(self):
+        # connection warm-up requests carry no credentials
+        self._respond(401, b'')
+
+    def _respond(self, status: int, body: bytes):
+        self.send_response(status)
+        if body:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_ingest_server(latency_ms: float, latency_jitter_ms: float, responses: dict, seed: int):
+    '''
+    Starts the Dynatrace ingest stand-in on an ephemeral local port in a background thread
+    '''
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), IngestRequestHandler)
+    server.daemon_threads = True
+    server.latency_ms = latency_ms
+    server.latency_jitter_ms = latency_jitter_ms
+    server.status_codes = list(responses)
+    server.status_weights = list(responses.values())
+    server.rng = random.Random(seed)
+    server.stats = IngestServerStats()
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+def parse_responses(value: str) -> dict:
+    '''
+    Parses status code weights, e.g. "204=95,429=4,503=1"
+    '''
+    responses = {}
+    for item in value.split(','):
+        status, _, weight = item.partition('=')
+        if int(status) not in (200, 204, 400, 429, 503):
+            raise argparse.ArgumentTypeError(f'unsupported status code {status}')
+        responses[int(status)] = float(weight or 1)
+    return responses
+
+
+class FakeLambdaContext():
+    '''
+    Lambda context whose remaining time counts down from timeout_ms since it was created
+    '''
+
+    def __init__(self, timeout_ms: int, memory_limit_in_mb: int = 1024):
+        self.function_name = 'load-test'
+        self.memory_limit_in_mb = memory_limit_in_mb
+        self.invoked_function_arn = os.environ['FORWARDER_FUNCTION_ARN']
+        self.aws_request_id = str(uuid.uuid4())
+        self._deadline = time.monotonic() + timeout_ms / 1000
+
+    def get_remaining_time_in_millis(self) -> int:
+        return max(int((self._deadline - time.monotonic()) * 1000), 0)
+
+
+def create_log_objects(s3_client: InMemoryS3Client, rule: str, num_objects: int, records_per_object: int,
+                       seed: int, line_lengths=None) -> list:
+    '''
+    Stores num_objects log objects of the given rule (source.name) in the S3 stand-in. Returns their keys.
+    '''
+    source, rule_name = rule.split('.', 1)
+    keys = []
+
+    for log_object in corpus.generate_log_objects(source, rule_name, num_objects, records_per_object, seed=seed,
+                                                  line_lengths=line_lengths):
+        s3_client.put_object(Bucket=LOAD_TEST_BUCKET, Key=log_object.key, Body=log_object.body)
+        keys.append(log_object.key)
+
+    return keys
+
+
+def get_log_forwarding_rules_yaml(rule: str) -> str:
+    '''
+    Returns the log forwarding rules sending all objects of the load test bucket to the given rule
+    '''
+    source, rule_name = rule.split('.', 1)
+    source_name = f"\n    source_name: {rule_name}" if source != 'aws' else ''
+    return (f"bucket_name: {LOAD_TEST_BUCKET}\n"
+            f"log_forwarding_rules:\n"
+            f"  - name: load_test\n"
+            f"    prefix: '.*'\n"
+            f"    source: {source}{source_name}\n")
+
+
+def sqs_message(bucket: str, key: str) -> dict:
+    '''
+    Returns an SQS message with the EventBridge notification of an S3 Object Created event
+    '''
+    notification = {
+        'version': '0',
+        'id': str(uuid.uuid4()),
+        'detail-type': 'Object Created',
+        'source': 'aws.s3',
+        'account': corpus.AWS_ACCOUNT_ID,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'region': 'us-east-1',
+        'detail': {
+            'bucket': {'name': bucket},
+            'object': {'key': key},
+            'requester': corpus.AWS_ACCOUNT_ID
+        }
+    }
+    return {'messageId': str(uuid.uuid4()), 'body': json.dumps(notification)}
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[int(pct) - 1]
+
+
+def get_peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss / (1048576 if sys.platform == 'darwin' else 1024)
+
+
+def run_load_test(args) -> dict:
+    server = start_ingest_server(args.latency_ms, args.latency_jitter_ms, args.responses, args.seed)
+    os.environ['DYNATRACE_1_ENV_URL'] = f'http://127.0.0.1:{server.server_address[1]}'
+
+    # The forwarder loads the local configuration relative to the working directory
+    os.chdir(REPO_ROOT)
+
+    import app
+    from log.forwarding import log_forwarding_rules
+    from log.processing import processing
+    from utils import profiling
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.CRITICAL)
+
+    s3_client = InMemoryS3Client(args.s3_latency_ms)
+    app.s3_client = s3_client
+
+    for sink in app.dynatrace_sinks.values():
+        sink.get_api_key = lambda force_fetch=False: LOAD_TEST_API_KEY
+        # send plain HTTP requests through the same retry policy the sink uses for HTTPS
+        sink.session.mount('http://', sink.session.get_adapter('https://'))
+
+    app.defined_log_forwarding_rules.update(
+        log_forwarding_rules.load_forwarding_rules_yaml(get_log_forwarding_rules_yaml(args.rule)))
+
+    line_lengths = None
+    if args.line_length:
+        line_lengths = corpus.lognormal_line_lengths(args.line_length, args.line_length_sigma)
+
+    keys = create_log_objects(s3_client, args.rule, args.objects, args.records_per_object, args.seed, line_lengths)
+    object_bytes = sum(s3_client.head_object(Bucket=LOAD_TEST_BUCKET, Key=key)['ContentLength'] for key in keys)
+    s3_client.num_requests = 0
+
+    object_latencies = []
+    object_timeouts = [0]
+    profile_object = profiling.profile_object
+
+    class TimedObject():
+        '''
+        profile_object encloses the download, processing and flush of each log object in the handler
+        '''
+        def __init__(self, *args, **kwargs):
+            self._profile_object = profile_object(*args, **kwargs)
+
+        def __enter__(self):
+            self._start = time.perf_counter()
+            return self._profile_object.__enter__()
+
+        def __exit__(self, exc_type, exc, tb):
+            object_latencies.append(time.perf_counter() - self._start)
+            if exc_type is processing.NotEnoughExecutionTimeRemaining:
+                object_timeouts[0] += 1
+            return self._profile_object.__exit__(exc_type, exc, tb)
+
+    profiling.profile_object = TimedObject
+
+    rss_before_mb = get_peak_rss_mb()
+    num_batches = -(-args.messages // args.batch_size)
+    batch_interval = args.batch_size / args.rate if args.rate else 0
+    batch_durations = []
+    invocation_timeouts = 0
+    failed_messages = 0
+    lagging_batches = 0
+
+    start = time.perf_counter()
+    for batch_num in range(num_batches):
+        scheduled = start + batch_num * batch_interval
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        elif batch_interval and delay < -batch_interval:
+            lagging_batches += 1
+
+        first_message = batch_num * args.batch_size
+        messages = [sqs_message(LOAD_TEST_BUCKET, keys[i % len(keys)])
+                    for i in range(first_message, min(first_message + args.batch_size, args.messages))]
+
+        context = FakeLambdaContext(args.timeout * 1000, args.memory)
+        batch_start = time.perf_counter()
+        result = app.lambda_handler({'Records': messages}, context)
+        batch_durations.append(time.perf_counter() - batch_start)
+
+        failed_messages += len(result['batchItemFailures'])
+        if context.get_remaining_time_in_millis() == 0:
+            invocation_timeouts += 1
+
+    elapsed = time.perf_counter() - start
+    profiling.profile_object = profile_object
+    server.shutdown()
+
+    return {
+        'objects_per_s': args.messages / elapsed,
+        'records_per_s': args.messages * args.records_per_object / elapsed,
+        'compressed_mb_per_s': object_bytes / len(keys) * args.messages / 1048576 / elapsed,
+        'elapsed_s': elapsed,
+        'object_latency_p50_s': percentile(object_latencies, 50),
+        'object_latency_p99_s': percentile(object_latencies, 99),
+        'batch_duration_p50_s': percentile(batch_durations, 50),
+        'batch_duration_p99_s': percentile(batch_durations, 99),
+        'batches': num_batches,
+        'batches_behind_target_rate': lagging_batches,
+        'peak_rss_mb': get_peak_rss_mb(),
+        'rss_before_replay_mb': rss_before_mb,
+        'invocation_timeouts': invocation_timeouts,
+        'object_timeouts': object_timeouts[0],
+        'failed_messages': failed_messages,
+        'ingest_requests': server.stats.requests,
+        'ingest_mb': server.stats.bytes / 1048576,
+        'ingest_responses': {str(status): count for status, count in sorted(server.stats.responses.items())},
+        's3_requests': s3_client.num_requests,
+    }
+
+
+def print_results(results: dict) -> None:
+    print(f"throughput:        {results['objects_per_s']:.1f} objects/s, {results['records_per_s']:.0f} records/s, "
+          f"{results['compressed_mb_per_s']:.2f} MB/s (compressed)")
+    print(f"object latency:    p50 {results['object_latency_p50_s'] * 1000:.0f} ms, "
+          f"p99 {results['object_latency_p99_s'] * 1000:.0f} ms")
+    print(f"batch duration:    p50 {results['batch_duration_p50_s'] * 1000:.0f} ms, "
+          f"p99 {results['batch_duration_p99_s'] * 1000:.0f} ms "
+          f"({results['batches_behind_target_rate']} of {results['batches']} batches behind the target rate)")
+    print(f"peak RSS:          {results['peak_rss_mb']:.0f} MB ({results['rss_before_replay_mb']:.0f} MB before replay)")
+    print(f"timeouts:          {results['invocation_timeouts']} invocations, {results['object_timeouts']} objects "
+          f"with not enough execution time remaining, {results['failed_messages']} failed messages")
+    print(f"Dynatrace ingest:  {results['ingest_requests']} requests, {results['ingest_mb']:.1f} MB, "
+          f"responses {results['ingest_responses']}")
+
+
+def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Offline load test of the forwarder.')
+    parser.add_argument('--rule', choices=sorted(f'{source}.{name}' for source, name in corpus.LOG_OBJECT_FORMATS),
+                        default='aws.ALB',
+                        help='Log processing rule of the generated log objects (default: aws.ALB)')
+    parser.add_argument('--objects', type=int, default=20, help='Distinct log objects (default: 20)')
+    parser.add_argument('--records-per-object', type=int, default=2000, help='Records per log object (default: 2000)')
+    parser.add_argument('--line-length', type=int, default=None,
+                        help='Median record length, padding records to a log-normal distribution (see corpus.py)')
+    parser.add_argument('--line-length-sigma', type=float, default=0.5,
+                        help='Sigma of the log-normal distribution of record lengths (default: 0.5)')
+    parser.add_argument('--messages', type=int, default=100,
+                        help='SQS messages to replay, log objects are reused (default: 100)')
+    parser.add_argument('--batch-size', type=int, default=4,
+                        help='SQS messages per invocation, as LambdaSQSMessageBatchSize (default: 4)')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='Target rate in messages/s, 0 to replay as fast as possible (default: 0)')
+    parser.add_argument('--timeout', type=int, default=300, help='Lambda function timeout in seconds (default: 300)')
+    parser.add_argument('--memory', type=int, default=1024,
+                        help='Memory size reported by the Lambda context in MB (default: 1024)')
+    parser.add_argument('--latency-ms', type=float, default=50,
+                        help='Mean latency of the Dynatrace ingest stand-in (default: 50)')
+    parser.add_argument('--latency-jitter-ms', type=float, default=10,
+                        help='Standard deviation of the Dynatrace ingest latency (default: 10)')
+    parser.add_argument('--responses', type=parse_responses, default=parse_responses(DEFAULT_RESPONSES),
+                        help='Weights of the ingest response status codes, e.g. 204=95,429=4,503=1 '
+                             f'(default: {DEFAULT_RESPONSES})')
+    parser.add_argument('--s3-latency-ms', type=float, default=0,
+                        help='Time to first byte of the S3 stand-in (default: 0)')
+    parser.add_argument('--seed', type=int, default=corpus.DEFAULT_SEED, help='Seed of the synthetic corpora')
+    parser.add_argument('--output', help='Write the JSON results to this file')
+    parser.add_argument('--verbose', action='store_true', help="Keep the forwarder's log output")
+    args = parser.parse_args()
+
+    results = run_load_test(args)
+    print_results(results)
+
+    from version import get_version
+
+    report = {
+        'forwarder_version': get_version(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'parameters': {k: v for k, v in vars(args).items() if k not in ('output', 'verbose')},
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
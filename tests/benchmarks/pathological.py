@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Worst-case input benchmark: processes pathological log objects with process_log_object, with the
+guard rails (see src/log/processing/guard_rails.py) enabled as configured and with all of them
+disabled, and reports the processing time, the peak memory allocated, the records pushed to the
+sink and the guard rails triggered (their metrics):
+
+  - text.backtracking_lines: ALB object with malformed lines causing catastrophic backtracking
+    on the ALB Grok expression
+  - text.long_lines: generic text object with multi-MB lines
+  - text.huge_line: generic text object made of a single --size line (of random hex digits, so
+    it doesn't compress like a gzip bomb)
+  - json.huge_record: CloudTrail object with a --size record (of random hex digits) between
+    regular records
+  - json.deep_nesting: CloudTrail object with a record nested 10000 levels deep
+  - gzip.bomb: generic text object of 1 MB lines decompressing to --bomb-size bytes from a few
+    hundred KB
+
+Some cases take minutes and a lot of memory with the guard rails disabled, which is the point.
+
+Run it from the repository root:
+  python tests/benchmarks/pathological.py                         # all cases
+  python tests/benchmarks/pathological.py --filter json --size 64MB
+  python tests/benchmarks/pathological.py --guard-rails on --output pathological.json
+"""
+
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from tests.benchmarks.stages import BenchmarkDynatraceSink
+from tests.benchmarks.load_test import InMemoryS3Client, FakeLambdaContext
+from tests.benchmarks import corpus
+from log.processing import guard_rails, log_processing_rules, processing
+
+BENCHMARK_BUCKET = 'pathological-benchmark'
+
+GUARD_RAIL_SETTINGS = ['MAX_EXTRACTION_LINE_LENGTH', 'MAX_RECORD_SIZE', 'MAX_DECOMPRESSION_RATIO',
+                       'EXTRACTION_TIME_BUDGET_MS']
+
+GUARD_RAIL_METRICS = ['LogRecordsExtractionSkipped', 'LogRecordsExtractionTimeouts', 'LogRecordsTruncated',
+                      'LogRecordsNestingTruncated', 'LogFilesRecordTooLarge', 'LogFilesDecompressionRatioExceeded']
+
+
+class PathologicalCase():
+    '''
+    A pathological log object for a built-in rule. build(size, bomb_size) returns its key and content.
+    '''
+
+    def __init__(self, name: str, source: str, rule_name: str, build):
+        self.name = name
+        self.source = source
+        self.rule_name = rule_name
+        self.build = build
+
+
+def to_text_object(key: str, lines: list) -> tuple:
+    body = ''.join(f"{line}\n" for line in lines).encode('utf-8')
+    return key, gzip.compress(body, compresslevel=1) if key.endswith('.gz') else body
+
+
+def backtracking_lines(size: int, bomb_size: int) -> tuple:
+    rng = random.Random(corpus.DEFAULT_SEED)
+    records = corpus.generate_records('aws', 'ALB', 1000)
+    # ALB lines with the quotes removed backtrack on the request, user agent... groups
+    for i in range(0, len(records), 200):
+        records[i] = records[i].replace('"', '')[:200] + ' x' * 1500
+    return to_text_object(corpus.alb_key(rng, corpus.DEFAULT_START_TIME), records)
+
+
+def long_lines(size: int, bomb_size: int) -> tuple:
+    rng = random.Random(corpus.DEFAULT_SEED)
+    records = corpus.generate_records('generic', 'generic', 100)
+    for i in range(0, len(records), 10):
+        records[i] += ' ' + corpus.random_padding(rng, 4 * 1024 * 1024)
+    return to_text_object(corpus.generic_text_key(rng, corpus.DEFAULT_START_TIME), records)
+
+
+def huge_line(size: int, bomb_size: int) -> tuple:
+    rng = random.Random(corpus.DEFAULT_SEED)
+    record = corpus.generate_records('generic', 'generic', 1)[0]
+    return to_text_object(corpus.generic_text_key(rng, corpus.DEFAULT_START_TIME),
+                          [record + ' ' + rng.randbytes(size // 2).hex()])
+
+
+def huge_json_record(size: int, bomb_size: int) -> tuple:
+    rng = random.Random(corpus.DEFAULT_SEED)
+    records = corpus.generate_records('aws', 'CloudTrail', 20)
+    records[10]['requestParameters'] = {'policyDocument': rng.randbytes(size // 2).hex()}
+    body = json.dumps({'Records': records}).encode('utf-8')
+    return corpus.cloudtrail_key(rng, corpus.DEFAULT_START_TIME), gzip.compress(body, compresslevel=1)
+
+
+def deep_nesting(size: int, bomb_size: int) -> tuple:
+    rng = random.Random(corpus.DEFAULT_SEED)
+    records = corpus.generate_records('aws', 'CloudTrail', 20)
+    depth = 10000
+    nested = '{"a":' * depth + '1' + '}' * depth
+    records_json = [json.dumps(record) for record in records]
+    records_json[10] = records_json[10][:-1] + ', "requestParameters": ' + nested + '}'
+    body = ('{"Records": [' + ', '.join(records_json) + ']}').encode('utf-8')
+    return corpus.cloudtrail_key(rng, corpus.DEFAULT_START_TIME), gzip.compress(body, compresslevel=1)
+
+
+def gzip_bomb(size: int, bomb_size: int) -> tuple:
+    rng = random.Random(corpus.DEFAULT_SEED)
+    block = (corpus.generate_records('generic', 'generic', 1)[0] + ' ' + 'x' * 1048576 + '\n').encode('utf-8')
+    compressed = io.BytesIO()
+    with gzip.GzipFile(mode='wb', fileobj=compressed, compresslevel=9) as gzip_file:
+        written = 0
+        while written < bomb_size:
+            gzip_file.write(block)
+            written += len(block)
+    return corpus.generic_text_key(rng, corpus.DEFAULT_START_TIME), compressed.getvalue()
+
+
+PATHOLOGICAL_CASES = [
+    PathologicalCase('text.backtracking_lines', 'aws', 'ALB', backtracking_lines),
+    PathologicalCase('text.long_lines', 'generic', 'generic', long_lines),
+    PathologicalCase('text.huge_line', 'generic', 'generic', huge_line),
+    PathologicalCase('json.huge_record', 'aws', 'CloudTrail', huge_json_record),
+    PathologicalCase('json.deep_nesting', 'aws', 'CloudTrail', deep_nesting),
+    PathologicalCase('gzip.bomb', 'generic', 'generic', gzip_bomb),
+]
+
+
+def run_case(case: PathologicalCase, rule, key: str, body: bytes, guard_rails_enabled: bool,
+             trace_allocations: bool) -> dict:
+    s3_client = InMemoryS3Client()
+    s3_client.put_object(Bucket=BENCHMARK_BUCKET, Key=key, Body=body)
+    sink = BenchmarkDynatraceSink()
+
+    settings = {} if guard_rails_enabled else {setting: 0 for setting in GUARD_RAIL_SETTINGS}
+    patches = [patch.object(guard_rails, setting, value) for setting, value in settings.items()]
+
+    processing.metrics.clear_metrics()
+    result = {'name': case.name, 'guard_rails': 'on' if guard_rails_enabled else 'off', 'object_bytes': len(body)}
+
+    for patcher in patches:
+        patcher.start()
+    if trace_allocations:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    try:
+        # the sink flushes its metrics to stdout, keep the output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            result['records'] = processing.process_log_object(
+                rule, BENCHMARK_BUCKET, key, 'us-east-1', [sink], FakeLambdaContext(3600000), s3_client=s3_client)
+            sink.flush()
+    except Exception as ex:
+        result['error'] = f"{type(ex).__name__}: {str(ex)[:100]}"
+    finally:
+        result['seconds'] = time.perf_counter() - start
+        if trace_allocations:
+            result['peak_alloc_bytes'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        for patcher in patches:
+            patcher.stop()
+
+    result['guard_rails_triggered'] = {
+        name: int(sum(metric['Value'])) for name, metric in processing.metrics.metric_set.items()
+        if name in GUARD_RAIL_METRICS}
+    processing.metrics.clear_metrics()
+
+    return result
+
+
+def print_results(results: list) -> None:
+    print("{:<26} {:>6} {:>10} {:>9} {:>12}  {}".format(
+        'case', 'guards', 'seconds', 'records', 'peak alloc', 'guard rails triggered / error'))
+    for result in results:
+        peak = f"{result['peak_alloc_bytes'] / 1048576:.0f} MB" if 'peak_alloc_bytes' in result else '-'
+        outcome = result.get('error') or ', '.join(
+            f"{name}={count}" for name, count in result['guard_rails_triggered'].items()) or '-'
+        print("{:<26} {:>6} {:>10.2f} {:>9} {:>12}  {}".format(
+            result['name'], result['guard_rails'], result['seconds'], result.get('records', '-'), peak, outcome))
+
+
+def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Worst-case input benchmark of the log processing guard rails.')
+    parser.add_argument('--filter', help='Only run cases whose name matches this regular expression')
+    parser.add_argument('--guard-rails', choices=['on', 'off', 'both'], default='both',
+                        help='Run with the guard rails enabled, disabled or both (default: both)')
+    parser.add_argument('--size', type=corpus.parse_size, default=corpus.parse_size('32MB'),
+                        help='Size of huge lines and records (default: 32MB)')
+    parser.add_argument('--bomb-size', type=corpus.parse_size, default=corpus.parse_size('256MB'),
+                        help='Decompressed size of the gzip bomb (default: 256MB)')
+    parser.add_argument('--no-allocations', action='store_true', help="Don't trace memory allocations")
+    parser.add_argument('--output', help='Write the JSON results to this file')
+    args = parser.parse_args()
+
+    # Rules and the sink log errors for the records they can't handle, keep the output readable
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    built_in_rules = log_processing_rules.load_built_in_rules()
+    modes = {'on': [True], 'off': [False], 'both': [True, False]}[args.guard_rails]
+
+    results = []
+    for case in PATHOLOGICAL_CASES:
+        if args.filter and not re.search(args.filter, case.name):
+            continue
+        key, body = case.build(args.size, args.bomb_size)
+        for guard_rails_enabled in modes:
+            results.append(run_case(case, built_in_rules[case.source][case.rule_name], key, body,
+                                    guard_rails_enabled, not args.no_allocations))
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'size': args.size, 'bomb_size': args.bomb_size, 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
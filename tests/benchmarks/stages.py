@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Microbenchmarks for each stage of the processing and ingestion hot paths, measured in isolation
+on seeded synthetic corpora (see corpus.py):
+
+  - decompression: gzip decoding of text and JSON objects
+  - parsing: ijson items for JSON arrays, nested lists and streams; text line iteration
+  - extraction: LogProcessingRule.get_extracted_log_attributes for every built-in rule
+  - timestamps: parse_date_from_string for the timestamp formats of the built-in rules
+  - sink: DynatraceSink.push, batch serialization, compression and flush with a null transport
+
+Each benchmark reports the median time of several repetitions as records/s and MB/s, plus the
+peak memory allocated and the number of memory blocks still allocated after a run, measured with
+tracemalloc in a separate repetition. Results are written as JSON so they can be compared across
+versions with --baseline.
+
+Run it from the repository root:
+  python tests/benchmarks/stages.py                                   # all benchmarks
+  python tests/benchmarks/stages.py --filter extraction               # only benchmarks matching a regex
+  python tests/benchmarks/stages.py --records 20000 --repeat 7 --output stages.json
+  python tests/benchmarks/stages.py --baseline stages.json --max-regression 10
+"""
+
+import argparse
+import gzip
+import io
+import json
+import logging
+import os
+import platform
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Minimum configuration the forwarder modules need. Values already in the environment win.
+DEFAULT_ENVIRONMENT = {
+    'DEPLOYMENT_NAME': 'stages-benchmark',
+    'POWERTOOLS_METRICS_NAMESPACE': 'local',
+    'POWERTOOLS_METRICS_DISABLED': 'true',
+    'LOG_FORWARDER_CONFIGURATION_LOCATION': 'local',
+    'FORWARDER_FUNCTION_ARN': 'arn:aws:lambda:us-east-1:012345678910:function:stages-benchmark',
+    'AWS_DEFAULT_REGION': 'us-east-1',
+}
+
+for _k, _v in DEFAULT_ENVIRONMENT.items():
+    os.environ.setdefault(_k, _v)
+
+sys.path.insert(0, os.path.join(REPO_ROOT, 'src'))
+sys.path.insert(0, REPO_ROOT)
+
+import requests
+from botocore.response import StreamingBody
+from log.processing import guard_rails, log_processing_rules
+from log.processing.log_processing_rule import parse_date_from_string
+from log.processing.processing import ijson_backend
+from log.sinks import dynatrace
+from tests.benchmarks import corpus
+from version import get_version
+
+
+class NullTransportAdapter(requests.adapters.BaseAdapter):
+    '''
+    requests transport adapter that answers every request with an HTTP 204 without any I/O
+    '''
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 204
+        response.request = request
+        response.url = request.url
+        response._content = b''
+        return response
+
+    def close(self):
+        pass
+
+
+class BenchmarkDynatraceSink(dynatrace.DynatraceSink):
+    '''
+    DynatraceSink posting to the null transport with a fixed API key
+    '''
+
+    def __init__(self):
+        super().__init__('https://abc12345.live.dynatrace.com', '/dynatrace/benchmark/api-key', sink_id='benchmark')
+
+    def _create_session(self):
+        session = requests.Session()
+        session.mount('https://', NullTransportAdapter())
+        return session
+
+    def get_api_key(self, force_fetch: bool = False):
+        return 'benchmark-api-key'
+
+
+class Benchmark():
+    '''
+    A benchmark has a setup function, run once and not measured, returning the input of the
+    measured function. The measured function returns the number of records processed; num_bytes
+    is the size of the input used to calculate MB/s.
+    '''
+
+    def __init__(self, name: str, setup, run, num_bytes=None):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.num_bytes = num_bytes
+
+
+def measure(benchmark: Benchmark, repeat: int, trace_allocations: bool) -> dict:
+    data = benchmark.setup()
+    num_bytes = benchmark.num_bytes(data) if benchmark.num_bytes else 0
+
+    # warm-up, e.g. to compile rules
+    num_records = benchmark.run(data)
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        benchmark.run(data)
+        timings.append(time.perf_counter() - start)
+
+    seconds = statistics.median(timings)
+
+    result = {
+        'name': benchmark.name,
+        'records': num_records,
+        'bytes': num_bytes,
+        'seconds': seconds,
+        'records_per_s': num_records / seconds if seconds else 0,
+        'mb_per_s': num_bytes / 1048576 / seconds if seconds and num_bytes else None,
+    }
+
+    if trace_allocations:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        benchmark.run(data)
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['peak_alloc_bytes'] = peak
+        result['retained_alloc_blocks'] = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+
+    return result
+
+
+def to_lines(records: list) -> bytes:
+    return '\n'.join(records).encode('utf-8')
+
+
+def to_json_array(records: list) -> bytes:
+    return json.dumps(records).encode('utf-8')
+
+
+def to_json_stream(records: list) -> bytes:
+    return '\n'.join(json.dumps(record) for record in records).encode('utf-8')
+
+
+def build_benchmarks(num_records: int, seed: int) -> list:
+    benchmarks = []
+
+    def text_records():
+        return corpus.generate_records('aws', 'ALB', num_records, seed)
+
+    def json_records():
+        return corpus.generate_records('aws', 'CloudTrail', num_records, seed)
+
+    def decompressed_size(data):
+        return len(gzip.decompress(data))
+
+    def decompress(data):
+        gzip.GzipFile(mode='rb', fileobj=io.BytesIO(data)).read()
+        return num_records
+
+    # decompression
+    benchmarks.append(Benchmark(
+        'decompression.gzip_text', lambda: gzip.compress(to_lines(text_records())), decompress, decompressed_size))
+    benchmarks.append(Benchmark(
+        'decompression.gzip_json', lambda: gzip.compress(to_json_array(json_records())), decompress, decompressed_size))
+
+    # parsing
+    benchmarks.append(Benchmark(
+        'parsing.ijson_items_array',
+        lambda: to_json_array(json_records()),
+        lambda data: sum(1 for _ in ijson_backend.items(io.BytesIO(data), 'item', use_float=True)),
+        len))
+    benchmarks.append(Benchmark(
+        'parsing.ijson_items_nested_key',
+        lambda: json.dumps({'Records': json_records()}).encode('utf-8'),
+        lambda data: sum(1 for _ in ijson_backend.items(io.BytesIO(data), 'Records.item', use_float=True)),
+        len))
+    benchmarks.append(Benchmark(
+        'parsing.ijson_items_json_stream',
+        lambda: to_json_stream(corpus.generate_records('aws', 'waf', num_records, seed)),
+        lambda data: sum(1 for _ in ijson_backend.items(io.BytesIO(data), '', multiple_values=True, use_float=True)),
+        len))
+    benchmarks.append(Benchmark(
+        'parsing.text_lines_plain',
+        lambda: to_lines(text_records()),
+        lambda data: sum(1 for _ in guard_rails.iter_lines(
+            io.BufferedReader(StreamingBody(io.BytesIO(data), len(data)), buffer_size=65536),
+            guard_rails.MAX_RECORD_SIZE, keep_line_endings=False)),
+        len))
+    benchmarks.append(Benchmark(
+        'parsing.text_lines_gzip',
+        lambda: gzip.compress(to_lines(text_records())),
+        lambda data: sum(1 for _ in guard_rails.iter_lines(
+            io.BufferedReader(gzip.GzipFile(mode='rb', fileobj=io.BytesIO(data)), buffer_size=65536),
+            guard_rails.MAX_RECORD_SIZE)),
+        decompressed_size))
+
+    # attribute extraction for every built-in rule
+    built_in_rules = log_processing_rules.load_built_in_rules()
+    for source, rules in sorted(built_in_rules.items()):
+        for rule_name, rule in sorted(rules.items()):
+            if (source, rule_name) not in corpus.RECORD_GENERATORS:
+                print(f"WARNING: no synthetic records for rule {source}.{rule_name}", file=sys.stderr)
+                continue
+
+            def setup(source=source, rule_name=rule_name):
+                return corpus.generate_records(source, rule_name, num_records, seed)
+
+            def run(records, rule=rule):
+                for record in records:
+                    rule.get_extracted_log_attributes(record)
+                return len(records)
+
+            benchmarks.append(Benchmark(
+                f'extraction.{source}.{rule_name}', setup, run,
+                lambda records: sum(len(r) if isinstance(r, str) else len(json.dumps(r)) for r in records)))
+
+    # timestamp parsing, for each timestamp format extracted as timestamp_to_transform
+    timestamp_formats = {
+        'iso8601': '2022-01-01T00:00:00.123456Z',
+        'cloudfront': '2022-01-01\t00:00:00',
+        's3_access': '01/Jan/2022:00:00:00 +0000',
+        'msk': '2022-01-01 00:00:00,123',
+        'redshift': 'Sat, 01 Jan 2022 00:00:00:123',
+        'syslog': 'Jan  1 00:00:00',
+    }
+    for format_name, timestamp in timestamp_formats.items():
+        benchmarks.append(Benchmark(
+            f'timestamps.{format_name}',
+            lambda timestamp=timestamp: [timestamp] * num_records,
+            lambda timestamps: sum(1 for t in timestamps if parse_date_from_string(t)),
+            lambda timestamps: sum(len(t) for t in timestamps)))
+
+    # sink
+    def sink_messages():
+        return [{'content': line, 'log.source': 'aws.alb', 'aws.region': 'us-east-1',
+                 'timestamp': '2022-01-01T00:00:00Z'} for line in text_records()]
+
+    def push_and_flush(messages):
+        sink = BenchmarkDynatraceSink()
+        for message in messages:
+            sink.push(dict(message))
+        sink.flush()
+        return len(messages)
+
+    def fan_out_push_and_flush(messages):
+        # log messages serialized once and pushed to two sinks, as done by process_log_object
+        sinks = [BenchmarkDynatraceSink(), BenchmarkDynatraceSink()]
+        for message in messages:
+            serialized_message = dynatrace.serialize_log_message(dict(message))
+            for sink in sinks:
+                sink.push(serialized_message)
+        for sink in sinks:
+            sink.flush()
+        dynatrace.compressed_batches.clear()
+        return len(messages)
+
+    def batch():
+        return sink_messages()[:dynatrace.DYNATRACE_LOG_INGEST_MAX_ENTRIES_COUNT]
+
+    def serialized_batch():
+        messages = batch()
+        return json.dumps(messages).encode(dynatrace.ENCODING), len(messages)
+
+    def serialize(messages):
+        json.dumps(messages).encode(dynatrace.ENCODING)
+        return len(messages)
+
+    def compress(batch_data):
+        data, num_messages = batch_data
+        gzip.compress(data, compresslevel=6)
+        return num_messages
+
+    def ingest(messages):
+        # the same batch is ingested on each repetition, don't reuse the last compressed batch
+        dynatrace.compressed_batches.clear()
+        BenchmarkDynatraceSink().ingest_logs(messages)
+        return len(messages)
+
+    def serialized_size(messages):
+        return len(json.dumps(messages))
+
+    benchmarks.append(Benchmark('sink.push_and_flush', sink_messages, push_and_flush, serialized_size))
+    benchmarks.append(Benchmark('sink.fan_out_push_and_flush', sink_messages, fan_out_push_and_flush,
+                                serialized_size))
+    benchmarks.append(Benchmark('sink.batch_serialization', batch, serialize, serialized_size))
+    benchmarks.append(Benchmark(
+        'sink.batch_compression',
+        serialized_batch, compress, lambda batch_data: len(batch_data[0])))
+    benchmarks.append(Benchmark('sink.ingest_logs', batch, ingest, serialized_size))
+
+    return benchmarks
+
+
+def compare_with_baseline(results: list, baseline: dict, max_regression: float) -> list:
+    '''
+    Returns the benchmarks whose records/s dropped more than max_regression percent
+    '''
+    baseline_results = {result['name']: result for result in baseline['results']}
+    regressions = []
+
+    for result in results:
+        baseline_result = baseline_results.get(result['name'])
+        if not baseline_result or not baseline_result['records_per_s']:
+            continue
+        change = (result['records_per_s'] / baseline_result['records_per_s'] - 1) * 100
+        result['change_vs_baseline_pct'] = change
+        if change < -max_regression:
+            regressions.append(f"{result['name']}: {change:.1f}% records/s")
+
+    return regressions
+
+
+def print_results(results: list) -> None:
+    print("{:<48} {:>9} {:>13} {:>9} {:>12} {:>9}".format(
+        'benchmark', 'records', 'records/s', 'MB/s', 'peak alloc', 'vs base'))
+    for result in results:
+        mb_per_s = f"{result['mb_per_s']:.1f}" if result['mb_per_s'] else '-'
+        peak = f"{result['peak_alloc_bytes'] / 1024:.0f} KB" if 'peak_alloc_bytes' in result else '-'
+        change = f"{result['change_vs_baseline_pct']:+.1f}%" if 'change_vs_baseline_pct' in result else '-'
+        print("{:<48} {:>9} {:>13.0f} {:>9} {:>12} {:>9}".format(
+            result['name'], result['records'], result['records_per_s'], mb_per_s, peak, change))
+
+
+def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Microbenchmarks for the processing and sink stages.')
+    parser.add_argument('--records', type=int, default=5000, help='Records per benchmark (default: 5000)')
+    parser.add_argument('--repeat', type=int, default=5, help='Measured repetitions per benchmark (default: 5)')
+    parser.add_argument('--seed', type=int, default=corpus.DEFAULT_SEED, help='Seed of the synthetic corpora')
+    parser.add_argument('--filter', help='Only run benchmarks whose name matches this regular expression')
+    parser.add_argument('--no-allocations', action='store_true', help="Don't trace memory allocations")
+    parser.add_argument('--output', help='Write the JSON results to this file')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare with')
+    parser.add_argument('--max-regression', type=float, default=None,
+                        help='With --baseline, exit with status 1 if records/s drop more than this percentage')
+    args = parser.parse_args()
+
+    # Rules log errors for records they can't parse (e.g. timestamps), keep the output readable
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    results = []
+    for benchmark in build_benchmarks(args.records, args.seed):
+        if args.filter and not re.search(args.filter, benchmark.name):
+            continue
+        results.append(measure(benchmark, args.repeat, not args.no_allocations))
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if (baseline['records'], baseline['seed']) != (args.records, args.seed):
+            print("WARNING: the baseline was run with a different corpus (--records {}, --seed {})".format(
+                baseline['records'], baseline['seed']), file=sys.stderr)
+        regressions = compare_with_baseline(results, baseline, args.max_regression or 0)
+
+    print_results(results)
+
+    report = {
+        'forwarder_version': get_version(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'records': args.records,
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.max_regression is not None and regressions:
+        print("")
+        for regression in regressions:
+            print("REGRESSION: {}".format(regression))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+import os
+from log.processing import processing
+from tests.benchmarks import differential
+
+os.environ['LOG_FORWARDER_CONFIGURATION_LOCATION'] = 'local'
+os.environ['DEPLOYMENT_NAME'] = 'test'
+
+
+class TestGoldenCorpus(unittest.TestCase):
+
+    def test_output_matches_golden_corpus(self):
+        '''
+        process_log_object and DynatraceSink must post exactly the records of the golden corpus. If
+        an output change is intended, regenerate it with tests/benchmarks/differential.py --update
+        '''
+        cases = differential.load_golden_cases()
+        self.assertGreater(len(cases), 0)
+
+        for case in cases:
+            with self.subTest(case=case.name):
+                records, _ = differential.run_engine(processing.process_log_object, case)
+                self.assertEqual(differential.compare_records(case.get_expected_records(), records), [])
+
+    def test_records_are_compared_with_attribute_order_and_types(self):
+        expected = ['{"content": "a", "status": 200}', '{"content": "b", "aws.region": "eu-west-1"}']
+
+        self.assertEqual(differential.compare_records(expected, list(expected)), [])
+        self.assertEqual(
+            differential.compare_records(expected, ['{"content": "a", "status": 200.0}', expected[1]]),
+            ['record 0: status: expected 200, got 200.0'])
+        self.assertEqual(
+            differential.compare_records(expected, [expected[0], '{"aws.region": "eu-west-1", "content": "b"}']),
+            ["record 1: attribute order: expected ['content', 'aws.region'], got ['aws.region', 'content']"])
+        self.assertEqual(
+            differential.compare_records(expected, [expected[0]]),
+            ['expected 2 records, got 1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+import os
+import re
+from importlib import metadata
+from pygrok import Grok
+from log.processing import log_processing_rules
+from log.processing import grok
+from log.processing.log_processing_rule import LogProcessingRule
+from utils.helpers import custom_grok_expressions
+
+os.environ['LOG_FORWARDER_CONFIGURATION_LOCATION'] = 'local'
+os.environ['DEPLOYMENT_NAME'] = 'test'
+
+
+class TestSharedGrokLibrary(unittest.TestCase):
+
+    def test_built_in_expressions_match_pygrok(self):
+        '''
+        Grok objects built from the shared library must produce the same regex as pygrok
+        '''
+        processing_rules, _ = log_processing_rules.load()
+
+        for source_rules in processing_rules.values():
+            for rule in source_rules.values():
+                if rule.attribute_extraction_grok_expression is None:
+                    continue
+                expected = Grok(rule.attribute_extraction_grok_expression,
+                                custom_patterns=custom_grok_expressions)
+                compiled = grok.compile_grok(rule.attribute_extraction_grok_expression)
+
+                self.assertEqual(expected.regex_obj.pattern, compiled.regex_obj.pattern, rule.name)
+                self.assertEqual(expected.type_mapper, compiled.type_mapper, rule.name)
+
+    def test_pattern_library_matches_pygrok(self):
+        '''
+        The pattern files must be read as pygrok does, with the custom expressions on top
+        '''
+        expected = Grok('%{WORD}', custom_patterns=custom_grok_expressions).predefined_patterns
+
+        self.assertEqual({name: pattern.regex_str for name, pattern in grok.get_pattern_library().items()},
+                         {name: pattern.regex_str for name, pattern in expected.items()})
+
+    def test_pygrok_version_is_pinned(self):
+        '''
+        SharedLibraryGrok duplicates the pattern expansion of pygrok's Grok.__init__, review it before
+        upgrading pygrok
+        '''
+        requirements_file = os.path.join(os.path.dirname(__file__), '../../../../src/requirements.txt')
+        with open(requirements_file, encoding='utf-8') as requirements:
+            pinned_version = re.search(r'^pygrok==(\S+)$', requirements.read(), re.MULTILINE)
+
+        self.assertIsNotNone(pinned_version)
+        self.assertEqual(metadata.version('pygrok'), pinned_version.group(1))
+
+    def test_pattern_library_is_loaded_once(self):
+        grok.get_pattern_library.cache_clear()
+
+        grok.compile_grok('%{IP:client} %{NUMBER:bytes:int}')
+        grok.compile_grok('%{WORD:method} %{URIPATHPARAM:request}')
+
+        self.assertEqual(grok.get_pattern_library.cache_info().misses, 1)
+        self.assertEqual(grok.compile_grok('%{IP:client} %{NUMBER:bytes:int}').match('10.0.0.1 42'),
+                         {'client': '10.0.0.1', 'bytes': 42})
+
+
+class TestLazyRuleCompilation(unittest.TestCase):
+
+    def test_rules_are_compiled_on_first_use(self):
+        processing_rules, _ = log_processing_rules.load()
+        rule = processing_rules['aws']['ALB']
+
+        self.assertFalse(rule.is_compiled())
+
+        rule.get_extracted_log_attributes('not an alb log line')
+
+        self.assertTrue(rule.is_compiled())
+        self.assertIs(rule.compile(), rule.compile())
+
+    def test_invalid_grok_expression_fails_on_load(self):
+        with self.assertRaises(ValueError):
+            LogProcessingRule(name='invalid_grok', source='custom', known_key_path_pattern='.*',
+                              log_format='text', skip_header_lines=0,
+                              attribute_extraction_grok_expression='%{WORD:verb} %{NOT_A_GROK_PATTERN:attr}')
+
+    def test_undefined_patterns(self):
+        self.assertEqual(grok.get_undefined_patterns('%{IP:client} %{NOPE} %{NOPE_EITHER:attr:int}'),
+                         {'NOPE', 'NOPE_EITHER'})
+        # patterns referenced by other patterns are resolved too
+        self.assertEqual(grok.get_undefined_patterns('%{COMBINEDAPACHELOG}'), set())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+import os
+import gzip
+import io
+import json
+from unittest.mock import Mock, patch
+from log.processing import guard_rails, log_processing_rules, processing
+from log.processing.log_processing_rule import LogProcessingRule
+
+os.environ['LOG_FORWARDER_CONFIGURATION_LOCATION'] = 'local'
+os.environ['DEPLOYMENT_NAME'] = 'test'
+os.environ['FORWARDER_FUNCTION_ARN'] = 'arn:aws:lambda:us-east-1:123456789012:function:test'
+
+TEXT_RULE = LogProcessingRule(
+    name='test_text', source='custom', known_key_path_pattern='.*', log_format='text',
+    skip_header_lines=0,
+    attribute_extraction_grok_expression='%{TIMESTAMP_ISO8601:timestamp} %{WORD:host} %{GREEDYDATA}',
+    attribute_extraction_jmespath_expression={'host.name': 'host'}
+)
+
+JSON_RULE = LogProcessingRule(
+    name='test_json', source='custom', known_key_path_pattern='.*', log_format='json',
+    log_entries_key='Records', attribute_extraction_jmespath_expression={'event.name': 'eventName'}
+)
+
+
+def process(log_rule: LogProcessingRule, content: bytes, key: str = 'test-key.gz'):
+    '''
+    Processes the content with the rule, returns the number of log entries, the pushed log messages
+    and the names of the metrics added
+    '''
+    s3_client = Mock()
+    s3_client.get_object.return_value = {
+        'Body': io.BytesIO(gzip.compress(content) if key.endswith('.gz') else content),
+        'ContentLength': len(content)
+    }
+    log_sink = Mock()
+    lambda_context = Mock()
+    lambda_context.get_remaining_time_in_millis.return_value = 300000
+
+    with patch.object(processing.metrics, 'add_metric') as add_metric:
+        num_log_entries = processing.process_log_object(log_rule, 'test-bucket', key, 'us-east-1', [log_sink],
+                                                        lambda_context, s3_client=s3_client)
+
+    log_messages = [json.loads(call.args[0].data) for call in log_sink.push.call_args_list]
+    metric_names = [call.kwargs['name'] for call in add_metric.call_args_list]
+
+    return num_log_entries, log_messages, metric_names
+
+
+class TestIterLines(unittest.TestCase):
+
+    def test_oversized_lines_are_truncated(self):
+        on_truncated = Mock()
+        stream = io.BufferedReader(io.BytesIO(b'line 1\n' + b'x' * 100 + b'\nline 3\r\nline 4'), buffer_size=16)
+
+        lines = list(guard_rails.iter_lines(stream, 10, keep_line_endings=False, on_truncated=on_truncated))
+
+        self.assertEqual(lines, [b'line 1', b'x' * 10, b'line 3', b'line 4'])
+        on_truncated.assert_called_once()
+
+    def test_line_endings_are_kept(self):
+        stream = io.BufferedReader(io.BytesIO(b'line 1\n\nline 3'))
+
+        self.assertEqual(list(guard_rails.iter_lines(stream, 0)), [b'line 1\n', b'\n', b'line 3'])
+
+
+class TestProcessLogObjectGuardRails(unittest.TestCase):
+
+    def test_long_lines_are_ingested_without_extraction(self):
+        content = b'2022-01-01T00:00:00Z host1 message\n2022-01-01T00:00:01Z host2 ' + b'x' * 200 + b'\n'
+
+        with patch.object(guard_rails, 'MAX_EXTRACTION_LINE_LENGTH', 100):
+            num_log_entries, log_messages, metric_names = process(TEXT_RULE, content)
+
+        self.assertEqual(num_log_entries, 2)
+        self.assertEqual(log_messages[0]['host.name'], 'host1')
+        self.assertNotIn('host.name', log_messages[1])
+        self.assertTrue(log_messages[1]['content'].startswith('2022-01-01T00:00:01Z host2 xxx'))
+        self.assertIn('LogRecordsExtractionSkipped', metric_names)
+
+    def test_oversized_lines_are_truncated(self):
+        content = b'2022-01-01T00:00:00Z host1 ' + b'x' * 200 + b'\n2022-01-01T00:00:01Z host2 message\n'
+
+        with patch.object(guard_rails, 'MAX_RECORD_SIZE', 100):
+            num_log_entries, log_messages, metric_names = process(TEXT_RULE, content, key='test-key.log')
+
+        self.assertEqual(num_log_entries, 2)
+        self.assertEqual(len(log_messages[0]['content']), 100)
+        self.assertEqual(log_messages[1]['content'], '2022-01-01T00:00:01Z host2 message')
+        self.assertIn('LogRecordsTruncated', metric_names)
+
+    def test_extraction_time_budget(self):
+        alb_rule = log_processing_rules.load_built_in_rules()['aws']['ALB']
+        # without quotes, the request and user agent groups of the ALB Grok expression backtrack
+        malformed_line = ('http 2022-01-01T00:00:00.000000Z app/my-alb/1234 10.0.0.1:1234 10.0.0.2:80 '
+                          '0.001 0.002 0.000 200 200 100 200 GET http://example.com:80/ HTTP/1.1' + ' x' * 1000)
+
+        with patch.object(guard_rails, 'EXTRACTION_TIME_BUDGET_MS', 10):
+            num_log_entries, log_messages, metric_names = process(alb_rule, malformed_line.encode('utf-8'))
+
+        self.assertEqual(num_log_entries, 1)
+        self.assertEqual(log_messages[0]['content'], malformed_line)
+        self.assertIn('LogRecordsExtractionTimeouts', metric_names)
+
+    def test_processing_stops_on_oversized_json_records(self):
+        records = [{'eventName': f'Event{i}', 'data': 'x' * 100} for i in range(1000)]
+        records.append({'eventName': 'Huge', 'data': 'x' * 1000000})
+        records.append({'eventName': 'After', 'data': ''})
+        content = json.dumps({'Records': records}).encode('utf-8')
+
+        with patch.object(guard_rails, 'MAX_RECORD_SIZE', 200000), \
+                self.assertLogs(processing.logger, 'ERROR') as logs:
+            num_log_entries, log_messages, metric_names = process(JSON_RULE, content)
+
+        self.assertEqual(num_log_entries, 1000)
+        self.assertEqual(log_messages[-1]['event.name'], 'Event999')
+        self.assertIn('LogFilesRecordTooLarge', metric_names)
+        self.assertIn('Stopped processing s3://test-bucket/test-key.gz', logs.output[0])
+
+    def test_processing_stops_on_decompression_bombs(self):
+        content = (b'2022-01-01T00:00:00Z host1 ' + b'x' * 100000 + b'\n') * 100
+
+        with patch.object(guard_rails, 'DECOMPRESSION_RATIO_MIN_SIZE', 1000000), \
+                self.assertLogs(processing.logger, 'ERROR') as logs:
+            num_log_entries, _, metric_names = process(TEXT_RULE, content)
+
+        self.assertLess(num_log_entries, 100)
+        self.assertIn('LogFilesDecompressionRatioExceeded', metric_names)
+        self.assertIn('Stopped processing s3://test-bucket/test-key.gz', logs.output[0])
+
+    def test_deeply_nested_json_records_are_truncated(self):
+        depth = 5000
+        content = ('{"Records": [{"eventName": "Nested", "data": ' + '{"a":' * depth + '1' + '}' * depth +
+                   '}, {"eventName": "Flat"}]}').encode('utf-8')
+
+        num_log_entries, log_messages, metric_names = process(JSON_RULE, content)
+
+        self.assertEqual(num_log_entries, 2)
+        self.assertEqual(log_messages[0]['event.name'], 'Nested')
+        self.assertIn(guard_rails.TRUNCATED_VALUE, log_messages[0]['content'])
+        self.assertEqual(log_messages[1]['event.name'], 'Flat')
+        self.assertEqual(metric_names.count('LogRecordsNestingTruncated'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
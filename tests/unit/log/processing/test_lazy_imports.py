@@ -0,0 +1,64 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+import os
+import subprocess
+import sys
+import textwrap
+
+SRC_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../../src'))
+
+
+def run_in_fresh_interpreter(code: str) -> str:
+    '''
+    Runs the given code on a new interpreter (so sys.modules is clean) and returns its stdout
+    '''
+    env = dict(os.environ)
+    env['PYTHONPATH'] = SRC_PATH
+    result = subprocess.run([sys.executable, '-c', textwrap.dedent(code)], env=env,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_json_rule_does_not_import_pygrok_or_dateutil(self):
+        output = run_in_fresh_interpreter('''
+            import sys
+            from log.processing.log_processing_rule import LogProcessingRule
+            rule = LogProcessingRule(name='test', source='custom', known_key_path_pattern='.*',
+                                     log_format='json', attribute_extraction_jmespath_expression={'a': 'b'})
+            rule.get_extracted_log_attributes({'b': 'value'})
+            print('pygrok' in sys.modules, 'dateutil.parser' in sys.modules)
+        ''')
+
+        self.assertEqual(output, 'False False')
+
+    def test_timestamp_transformation_imports_dateutil(self):
+        output = run_in_fresh_interpreter('''
+            import sys
+            from log.processing.log_processing_rule import LogProcessingRule
+            rule = LogProcessingRule(name='test', source='custom', known_key_path_pattern='.*',
+                                     log_format='json',
+                                     attribute_extraction_jmespath_expression={'timestamp_to_transform': 'date'})
+            print(rule.get_extracted_log_attributes({'date': '2023-02-21 16:58:20Z'})['timestamp'])
+            print('dateutil.parser' in sys.modules)
+        ''')
+
+        self.assertEqual(output.splitlines(), ['2023-02-21T16:58:20+00:00', 'True'])
+
+
+if __name__ == '__main__':
+    unittest.main()
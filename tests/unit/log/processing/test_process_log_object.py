@@ -341,7 +341,7 @@ class TestProcessLogObject(unittest.TestCase):
         )
 
         # Verify context attributes were added
-        call_args = self.mock_log_sink.push.call_args[0][0]
+        call_args = json.loads(self.mock_log_sink.push.call_args[0][0].data)
         self.assertIn('log.source.aws.s3.bucket.name', call_args)
         self.assertEqual(call_args['log.source.aws.s3.bucket.name'], 'my-test-bucket')
         self.assertIn('log.source.aws.s3.key.name', call_args)
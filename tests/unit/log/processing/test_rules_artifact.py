@@ -0,0 +1,76 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+from log.processing import log_processing_rules
+from log.processing import rules_artifact
+
+os.environ['LOG_FORWARDER_CONFIGURATION_LOCATION'] = 'local'
+os.environ['DEPLOYMENT_NAME'] = 'test'
+
+
+class TestRulesArtifact(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.artifact_file = os.path.join(self.tmp_dir, 'compiled_rules.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_load_uses_artifact(self):
+        rules_artifact.build(self.artifact_file)
+        expected_rules, _ = log_processing_rules.load()
+
+        with patch.dict(os.environ, {'LOG_PROCESSING_RULES_ARTIFACT': self.artifact_file}), \
+             patch.object(log_processing_rules, 'load_rules_from_dir') as load_rules_from_dir, \
+             patch.object(log_processing_rules, 'load_custom_rules_from_local_file') as load_from_local_file:
+            rules, _ = log_processing_rules.load()
+
+        load_rules_from_dir.assert_not_called()
+        load_from_local_file.assert_not_called()
+        self.assertEqual(rules, expected_rules)
+        self.assertFalse(rules['aws']['ALB'].is_compiled())
+
+    def test_outdated_artifact_is_ignored(self):
+        rule_file = os.path.join(self.tmp_dir, 'rule.yaml')
+        with open(rule_file, 'w', encoding='utf-8') as f:
+            f.write('name: test\n')
+
+        rules_artifact.build(self.artifact_file)
+        built_in_rule_files = log_processing_rules.list_built_in_rule_files()
+
+        self.assertIsNotNone(rules_artifact.load_rules(
+            rules_artifact.BUILT_IN_RULES_SECTION, built_in_rule_files, self.artifact_file))
+        self.assertIsNone(rules_artifact.load_rules(
+            rules_artifact.BUILT_IN_RULES_SECTION, built_in_rule_files + [rule_file], self.artifact_file))
+
+    def test_invalid_artifact_falls_back_to_source_files(self):
+        with open(self.artifact_file, 'wb') as f:
+            f.write(b'not a rules artifact')
+
+        expected_rules = log_processing_rules.load_rules_from_dir(log_processing_rules.BUILT_IN_PROCESSING_RULES_PATH)
+
+        with patch.dict(os.environ, {'LOG_PROCESSING_RULES_ARTIFACT': self.artifact_file}):
+            self.assertIsNone(rules_artifact.load_rules(
+                rules_artifact.BUILT_IN_RULES_SECTION, log_processing_rules.list_built_in_rule_files()))
+            self.assertEqual(log_processing_rules.load_built_in_rules(), expected_rules)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+import os
+import gzip
+import io
+import json
+import time
+from unittest.mock import Mock, patch
+from log.processing.processing import process_log_object
+from log.processing.log_processing_rule import LogProcessingRule
+from utils.timing import StageTimer, TimedReader
+
+os.environ['DEPLOYMENT_NAME'] = 'test'
+os.environ['FORWARDER_FUNCTION_ARN'] = 'arn:aws:lambda:us-east-1:123456789012:function:test'
+
+
+class TestStageTimer(unittest.TestCase):
+
+    def test_nested_stages_are_exclusive(self):
+        stage_timer = StageTimer()
+
+        stage_timer.start('Outer')
+        time.sleep(0.02)
+        stage_timer.start('Inner')
+        time.sleep(0.05)
+        stage_timer.stop()
+        stage_timer.stop()
+
+        timings = stage_timer.get_timings()
+        self.assertGreaterEqual(timings['Inner'], 50000000)
+        self.assertGreaterEqual(timings['Outer'], 20000000)
+        self.assertLess(timings['Outer'], 50000000)
+
+    def test_timed_reader_iterates_gzip_lines(self):
+        content = b'line 1\nline 2\nline 3'
+        stage_timer = StageTimer()
+
+        s3_stream = TimedReader(io.BytesIO(gzip.compress(content)), stage_timer, 'S3Read')
+        log_stream = TimedReader(gzip.GzipFile(mode='rb', fileobj=s3_stream), stage_timer, 'Decompression')
+        lines = list(stage_timer.iterate(io.BufferedReader(log_stream), 'Parsing'))
+
+        self.assertEqual(lines, [b'line 1\n', b'line 2\n', b'line 3'])
+        self.assertEqual(set(stage_timer.get_timings()), {'S3Read', 'Decompression', 'Parsing'})
+
+
+class TestProcessLogObjectStageTiming(unittest.TestCase):
+
+    @patch.object(StageTimer, 'emit_metrics', autospec=True)
+    def test_stage_timings_are_emitted_per_object(self, emit_metrics):
+        content = '\n'.join(f'2022-01-01T00:00:{i:02d}Z host{i} message {i}' for i in range(10))
+
+        s3_client = Mock()
+        s3_client.get_object.return_value = {
+            'Body': io.BytesIO(gzip.compress(content.encode('utf-8'))),
+            'ContentLength': len(content),
+            'ContentEncoding': 'gzip'
+        }
+
+        log_rule = LogProcessingRule(
+            name='test_text', source='custom', known_key_path_pattern='.*', log_format='text',
+            skip_header_lines=0,
+            attribute_extraction_grok_expression='%{TIMESTAMP_ISO8601:timestamp_to_transform} %{WORD:host} %{GREEDYDATA}',
+            attribute_extraction_jmespath_expression={'host.name': 'host'}
+        )
+
+        log_sink = Mock()
+        lambda_context = Mock()
+        lambda_context.get_remaining_time_in_millis.return_value = 300000
+
+        num_log_entries = process_log_object(log_rule, 'test-bucket', 'test-key.gz', 'us-east-1', [log_sink],
+                                             lambda_context, s3_client=s3_client)
+
+        self.assertEqual(num_log_entries, 10)
+        self.assertEqual(json.loads(log_sink.push.call_args.args[0].data)['host.name'], 'host9')
+
+        emit_metrics.assert_called_once()
+        stage_timer, dimensions = emit_metrics.call_args.args
+        self.assertEqual(dimensions, {'processing_rule': 'custom.test_text'})
+        self.assertEqual(set(stage_timer.get_timings()),
+                         {'S3GetObject', 'S3Read', 'Decompression', 'Parsing', 'RecordProcessing',
+                          'AttributeExtraction', 'Grok', 'Jmespath', 'TimestampParsing', 'RecordSerialization'})
+
+
+if __name__ == '__main__':
+    unittest.main()
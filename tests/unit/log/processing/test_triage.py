@@ -0,0 +1,152 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+import datetime
+import io
+import json
+import time
+from unittest.mock import Mock, patch
+from log.processing import log_processing_rules, processing
+from log.processing import triage
+from log.processing.log_processing_rule import LogProcessingRule
+
+CLOUDTRAIL_KEY = ('AWSLogs/012345678910/CloudTrail/us-east-1/2023/03/13/'
+                  '012345678910_CloudTrail_us-east-1_20230313T1205Z_abcdefghijklmnop.json.gz')
+VPC_FLOW_LOGS_KEY = ('AWSLogs/012345678910/vpcflowlogs/us-east-1/2023/03/14/'
+                     '012345678910_vpcflowlogs_us-east-1_fl-0123456789abcdef0_20230314T1205Z_abcdef01.log.gz')
+
+
+def get_notification(size: int = None):
+    s3_object = {'key': 'test.log'}
+    if size is not None:
+        s3_object['size'] = size
+    return {'detail': {'bucket': {'name': 'test-bucket'}, 'object': s3_object}}
+
+
+def get_timestamp(*date):
+    return datetime.datetime(*date, tzinfo=datetime.timezone.utc).timestamp()
+
+
+class TestTriage(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.rules = log_processing_rules.load_built_in_rules()
+
+    def test_date_from_key_name(self):
+        self.assertEqual(self.rules['aws']['CloudTrail'].get_date_from_s3_key(CLOUDTRAIL_KEY),
+                         datetime.date(2023, 3, 13))
+        self.assertEqual(self.rules['aws']['vpcflowlogs'].get_date_from_s3_key(VPC_FLOW_LOGS_KEY),
+                         datetime.date(2023, 3, 14))
+        self.assertIsNone(self.rules['aws']['CloudTrail'].get_date_from_s3_key('test.log'))
+        self.assertIsNone(self.rules['generic']['generic'].get_date_from_s3_key(CLOUDTRAIL_KEY))
+
+    @patch.object(triage, 'SKIP_EXPIRED_OBJECTS', True)
+    def test_expired_objects(self):
+        cloudtrail_rule = self.rules['aws']['CloudTrail']
+
+        # records of the 13th may be up to 1 day old until the end of the 14th
+        self.assertFalse(triage.is_expired_object(cloudtrail_rule, CLOUDTRAIL_KEY, get_timestamp(2023, 3, 14, 23)))
+        self.assertTrue(triage.is_expired_object(cloudtrail_rule, CLOUDTRAIL_KEY, get_timestamp(2023, 3, 15, 1)))
+        self.assertFalse(triage.is_expired_object(self.rules['generic']['generic'], CLOUDTRAIL_KEY,
+                                                  get_timestamp(2023, 3, 15, 1)))
+
+        with patch.object(triage, 'SKIP_EXPIRED_OBJECTS', False):
+            self.assertFalse(triage.is_expired_object(cloudtrail_rule, CLOUDTRAIL_KEY, get_timestamp(2023, 3, 15, 1)))
+
+    def test_empty_objects(self):
+        self.assertTrue(triage.is_empty_object(get_notification(0)))
+        self.assertFalse(triage.is_empty_object(get_notification(10)))
+        self.assertFalse(triage.is_empty_object(get_notification()))
+
+    @patch.object(triage, 'LARGE_OBJECT_SIZE', 1000)
+    def test_large_objects_are_deferred(self):
+        messages = [{'messageId': message_id, 'body': json.dumps(get_notification(size))}
+                    for message_id, size in (('1', 2000), ('2', 10), ('3', None), ('4', 5000))]
+        messages.append({'messageId': '5', 'body': 'invalid'})
+
+        messages, num_deferred = triage.defer_large_objects(messages)
+
+        self.assertEqual([message['messageId'] for message in messages], ['2', '3', '5', '1', '4'])
+        self.assertEqual(num_deferred, 2)
+
+
+class TestRecordAge(unittest.TestCase):
+
+    def test_record_timestamp_formats(self):
+        expected_timestamp = get_timestamp(2023, 3, 13, 12, 5)
+
+        for timestamp in ('2023-03-13T12:05:00Z', '2023-03-13T13:05:00+01:00', '2023-03-13 12:05:00',
+                          expected_timestamp, int(expected_timestamp * 1000), str(int(expected_timestamp * 1000)),
+                          int(expected_timestamp * 1000000000), '2023-03-13T12:05:00.000z'):
+            self.assertEqual(triage.get_record_timestamp(timestamp), expected_timestamp, timestamp)
+
+        # fractional and negative epochs
+        self.assertEqual(triage.get_record_timestamp('1700000000.123'), 1700000000.123)
+        self.assertAlmostEqual(triage.get_record_timestamp('1700000000123.5'), 1700000000.1235)
+        self.assertEqual(triage.get_record_timestamp('-86400'), -86400.0)
+        self.assertAlmostEqual(triage.get_record_timestamp(-1700000000123), -1700000000.123)
+
+        for timestamp in ('13/Mar/2023:12:05:00', None, True, {}, 'nan', float('inf')):
+            self.assertIsNone(triage.get_record_timestamp(timestamp), timestamp)
+
+    def test_check_record_age(self):
+        min_record_timestamp = get_timestamp(2023, 3, 13)
+
+        def check_record_age(timestamp):
+            dt_log_message = {'content': 'test', 'timestamp': timestamp}
+            return triage.check_record_age(dt_log_message, min_record_timestamp), dt_log_message
+
+        with patch.object(triage, 'EXPIRED_RECORDS_MODE', triage.EXPIRED_RECORDS_KEEP):
+            self.assertEqual(check_record_age('2023-03-12T23:00:00Z')[0], triage.RECORD_ACCEPTED)
+
+        with patch.object(triage, 'EXPIRED_RECORDS_MODE', triage.EXPIRED_RECORDS_DROP):
+            self.assertEqual(check_record_age('2023-03-12T23:00:00Z')[0], triage.RECORD_DROPPED)
+            self.assertEqual(check_record_age('2023-03-13T01:00:00Z')[0], triage.RECORD_ACCEPTED)
+            self.assertEqual(check_record_age('invalid')[0], triage.RECORD_ACCEPTED)
+            self.assertEqual(triage.check_record_age({'content': 'test'}, min_record_timestamp), triage.RECORD_ACCEPTED)
+
+        with patch.object(triage, 'EXPIRED_RECORDS_MODE', triage.EXPIRED_RECORDS_REWRITE):
+            result, dt_log_message = check_record_age('2023-03-12T23:00:00Z')
+            self.assertEqual(result, triage.RECORD_REWRITTEN)
+            self.assertEqual(dt_log_message['original_timestamp'], '2023-03-12T23:00:00Z')
+            self.assertGreater(triage.get_record_timestamp(dt_log_message['timestamp']), min_record_timestamp)
+
+    @patch.object(triage, 'EXPIRED_RECORDS_MODE', triage.EXPIRED_RECORDS_DROP)
+    def test_expired_records_are_not_pushed(self):
+        log_rule = LogProcessingRule(
+            name='test_json', source='custom', known_key_path_pattern='.*', log_format='json',
+            log_entries_key='Records', attribute_extraction_jmespath_expression={'timestamp': 'eventTime'})
+        records = [{'eventTime': int((time.time() - age) * 1000)} for age in (60, 2 * 86400, 120)]
+        s3_client = Mock()
+        s3_client.get_object.return_value = {
+            'Body': io.BytesIO(json.dumps({'Records': records}).encode()), 'ContentLength': 100}
+        log_sink = Mock()
+        lambda_context = Mock()
+        lambda_context.get_remaining_time_in_millis.return_value = 300000
+
+        with patch.object(processing.metrics, 'add_metric') as add_metric:
+            num_log_entries = processing.process_log_object(log_rule, 'test-bucket', 'test.json', 'us-east-1',
+                                                            [log_sink], lambda_context, s3_client=s3_client)
+
+        self.assertEqual(num_log_entries, 3)
+        self.assertEqual([json.loads(call.args[0].data)['timestamp'] for call in log_sink.push.call_args_list],
+                         [records[0]['eventTime'], records[2]['eventTime']])
+        self.assertIn(('LogRecordsExpiredDropped', 1),
+                      [(call.kwargs['name'], call.kwargs['value']) for call in add_metric.call_args_list])
+
+
+if __name__ == '__main__':
+    unittest.main()
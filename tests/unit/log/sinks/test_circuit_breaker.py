@@ -0,0 +1,81 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+from unittest.mock import patch
+import responses
+from log.sinks import circuit_breaker, dynatrace
+from log.sinks.circuit_breaker import CircuitBreaker
+
+mock_dt_url = 'https://test.live.dynatrace.com'
+mock_dt_key_parameter = '/dynatrace-s3-log-forwarder/test/api-key'
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_state_transitions(self):
+        breaker = CircuitBreaker('1', failure_threshold=2, recovery_timeout=60)
+
+        self.assertFalse(breaker.record_failure())
+        breaker.record_success()
+        self.assertFalse(breaker.record_failure())
+        self.assertTrue(breaker.allow_request())
+        self.assertTrue(breaker.record_failure())
+        self.assertEqual(breaker.state, circuit_breaker.OPEN)
+        self.assertFalse(breaker.allow_request())
+
+        with patch.object(circuit_breaker.time, 'monotonic', return_value=breaker._opened_at + 61):
+            self.assertTrue(breaker.allow_request())
+        self.assertEqual(breaker.state, circuit_breaker.HALF_OPEN)
+
+        # a failure in half-open state opens the circuit again
+        self.assertTrue(breaker.record_failure())
+        self.assertFalse(breaker.allow_request())
+
+        with patch.object(circuit_breaker.time, 'monotonic', return_value=breaker._opened_at + 61):
+            self.assertTrue(breaker.allow_request())
+        breaker.record_success()
+        self.assertEqual(breaker.state, circuit_breaker.CLOSED)
+
+    def test_disabled(self):
+        breaker = CircuitBreaker('1', failure_threshold=0)
+
+        for _ in range(10):
+            self.assertFalse(breaker.record_failure())
+        self.assertTrue(breaker.allow_request())
+
+
+class TestDynatraceSinkCircuitBreaker(unittest.TestCase):
+
+    @responses.activate
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    def test_sink_fails_fast_while_open(self, _):
+        dynatrace_sink = dynatrace.DynatraceSink(mock_dt_url, mock_dt_key_parameter, sink_id='1')
+        dynatrace_sink.circuit_breaker.failure_threshold = 2
+        dynatrace_sink.flow_control.adaptive = False
+        responses.add(responses.POST, dynatrace_sink.get_environment_url() + dynatrace.LOGV2_API_URL_SUFFIX,
+                      status=500)
+
+        for _ in range(2):
+            with self.assertRaises(dynatrace.DynatraceIngestionException):
+                dynatrace_sink.ingest_logs([{'content': 'test'}], batch_num=1)
+
+        self.assertFalse(dynatrace_sink.is_available())
+        with self.assertRaises(dynatrace.DynatraceSinkUnavailable):
+            dynatrace_sink.ingest_logs([{'content': 'test'}], batch_num=1)
+        self.assertEqual(len(responses.calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+import gzip
+import json
+from unittest.mock import patch
+import responses
+from log.sinks import dynatrace
+
+mock_dt_url = 'https://test.live.dynatrace.com'
+mock_dt_key_parameter = '/dynatrace-s3-log-forwarder/test/api-key'
+
+
+class TestDynatraceSinkCoalescing(unittest.TestCase):
+
+    def setUp(self):
+        self.dynatrace_sink = dynatrace.DynatraceSink(mock_dt_url, mock_dt_key_parameter, sink_id='1')
+        self.dynatrace_sink.flow_control.adaptive = False
+        self.sinks = {'1': self.dynatrace_sink}
+        self.url = self.dynatrace_sink.get_environment_url() + dynatrace.LOGV2_API_URL_SUFFIX
+
+    def get_posted_contents(self, call_index: int):
+        body = json.loads(gzip.decompress(responses.calls[call_index].request.body))
+        return [message['content'] for message in body]
+
+    @responses.activate
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    def test_log_objects_share_batches(self, _):
+        responses.add(responses.POST, self.url, status=204)
+
+        dynatrace.start_message(self.sinks, 'a')
+        self.dynatrace_sink.push({'content': 'a1'})
+        dynatrace.start_message(self.sinks, 'b')
+        self.dynatrace_sink.push({'content': 'b1'})
+        self.dynatrace_sink.push({'content': 'b2'})
+
+        self.assertEqual(len(responses.calls), 0)
+        self.assertEqual(dynatrace.flush_sinks(self.sinks), set())
+
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual(self.get_posted_contents(0), ['a1', 'b1', 'b2'])
+        self.assertIsNotNone(self.dynatrace_sink.get_ingestion_ack_times('a')[0])
+        self.assertEqual(self.dynatrace_sink.get_ingestion_ack_times('a'),
+                         self.dynatrace_sink.get_ingestion_ack_times('b'))
+        self.assertEqual(self.dynatrace_sink.get_ingestion_ack_times('c'), (None, None))
+
+    @responses.activate
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    def test_failed_batches_fail_their_messages(self, _):
+        responses.add(responses.POST, self.url, status=500)
+        responses.add(responses.POST, self.url, status=204)
+
+        with patch.object(self.dynatrace_sink.flow_control, 'get_batch_limits', return_value=(2, 1000000)), \
+                patch.object(self.dynatrace_sink.session.get_adapter(self.url).max_retries, 'total', 0):
+            dynatrace.start_message(self.sinks, 'a')
+            self.dynatrace_sink.push({'content': 'a1'})
+            dynatrace.start_message(self.sinks, 'b')
+            self.dynatrace_sink.push({'content': 'b1'})
+            dynatrace.start_message(self.sinks, 'c')
+            # the batch with entries of a and b is flushed and fails, but c keeps being processed
+            self.dynatrace_sink.push({'content': 'c1'})
+
+            self.assertEqual(dynatrace.flush_sinks(self.sinks), {'a', 'b'})
+
+        self.assertEqual(self.get_posted_contents(1), ['c1'])
+        self.assertIsNotNone(self.dynatrace_sink.get_ingestion_ack_times('c')[0])
+        self.assertEqual(self.dynatrace_sink.get_ingestion_ack_times('a'), (None, None))
+
+    @responses.activate
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    def test_failed_batch_with_entries_of_current_message_raises(self, _):
+        responses.add(responses.POST, self.url, status=500)
+
+        with patch.object(self.dynatrace_sink.flow_control, 'get_batch_limits', return_value=(2, 1000000)), \
+                patch.object(self.dynatrace_sink.session.get_adapter(self.url).max_retries, 'total', 0):
+            dynatrace.start_message(self.sinks, 'a')
+            self.dynatrace_sink.push({'content': 'a1'})
+            self.dynatrace_sink.push({'content': 'a2'})
+            with self.assertRaises(dynatrace.DynatraceIngestionException):
+                self.dynatrace_sink.push({'content': 'a3'})
+
+        self.assertEqual(dynatrace.flush_sinks(self.sinks), {'a'})
+
+    @responses.activate
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    def test_discard_message(self, _):
+        responses.add(responses.POST, self.url, status=204)
+
+        dynatrace.start_message(self.sinks, 'a')
+        self.dynatrace_sink.push({'content': 'a1'})
+        dynatrace.start_message(self.sinks, 'b')
+        self.dynatrace_sink.push({'content': 'b1'})
+        dynatrace.discard_message(self.sinks, 'b')
+
+        self.assertEqual(self.dynatrace_sink.get_num_of_buffered_messages(), 1)
+        dynatrace.flush_sinks(self.sinks)
+        self.assertEqual(self.get_posted_contents(0), ['a1'])
+        self.assertEqual(self.dynatrace_sink.get_ingestion_ack_times('b'), (None, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+import time
+from unittest.mock import patch
+import responses
+from log.sinks import dynatrace
+
+mock_dt_key_parameter = '/dynatrace-s3-log-forwarder/test/api-key'
+
+
+def slow_response(request):
+    time.sleep(0.3)
+    return (204, {}, '')
+
+
+class TestConcurrentFlush(unittest.TestCase):
+
+    def setUp(self):
+        self.sinks = [dynatrace.DynatraceSink(f'https://test{sink_id}.live.dynatrace.com', mock_dt_key_parameter,
+                                              sink_id=sink_id) for sink_id in ('1', '2', '3')]
+        for sink in self.sinks:
+            sink.flow_control.adaptive = False
+        self.addCleanup(dynatrace.empty_sinks, {sink.get_sink_id(): sink for sink in self.sinks})
+
+    def get_url(self, sink: dynatrace.DynatraceSink):
+        return sink.get_environment_url() + dynatrace.LOGV2_API_URL_SUFFIX
+
+    @responses.activate
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    def test_sinks_are_flushed_concurrently(self, _):
+        for sink in self.sinks:
+            responses.add_callback(responses.POST, self.get_url(sink), callback=slow_response)
+
+        serialized_log_message = dynatrace.serialize_log_message({'content': 'test'})
+        with patch.object(dynatrace.gzip, 'compress', wraps=dynatrace.gzip.compress) as compress:
+            for sink in self.sinks:
+                sink.push(serialized_log_message)
+
+            start_time = time.perf_counter()
+            dynatrace.flush_sinks_concurrently(self.sinks, next_batch=True)
+
+        self.assertLess(time.perf_counter() - start_time, 0.6)
+        self.assertEqual(len(responses.calls), 3)
+        # the batch is compressed once and shared by the sinks flushing it at the same time
+        self.assertEqual(compress.call_count, 1)
+        for sink in self.sinks:
+            self.assertTrue(sink.is_empty())
+            self.assertEqual(sink._batch_num, 2)
+
+    @responses.activate
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    def test_failures_are_aggregated(self, _):
+        responses.add(responses.POST, self.get_url(self.sinks[0]), status=204)
+        responses.add(responses.POST, self.get_url(self.sinks[1]), status=401)
+        responses.add(responses.POST, self.get_url(self.sinks[2]), status=401)
+
+        for sink in self.sinks:
+            sink.push({'content': 'test'})
+
+        with self.assertRaises(dynatrace.DynatraceFlushException) as context:
+            dynatrace.flush_sinks_concurrently(self.sinks)
+
+        self.assertEqual(set(context.exception.exceptions), {'2', '3'})
+        self.assertIsInstance(context.exception.exceptions['2'], dynatrace.DynatraceIngestionException)
+        self.assertEqual(len(responses.calls), 3)
+
+    @responses.activate
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    def test_single_failure_is_raised(self, _):
+        responses.add(responses.POST, self.get_url(self.sinks[0]), status=204)
+        responses.add(responses.POST, self.get_url(self.sinks[1]), status=204)
+        responses.add(responses.POST, self.get_url(self.sinks[2]), status=401)
+
+        for sink in self.sinks:
+            sink.push({'content': 'test'})
+
+        with self.assertRaises(dynatrace.DynatraceIngestionException) as context:
+            dynatrace.flush_sinks_concurrently(self.sinks)
+
+        self.assertNotIsInstance(context.exception, dynatrace.DynatraceFlushException)
+        self.assertTrue(self.sinks[0].is_empty())
+
+    @responses.activate
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    def test_metrics_are_added_under_the_lock(self, _):
+        for sink in self.sinks:
+            responses.add(responses.POST, self.get_url(sink), status=204)
+            sink.push({'content': 'test'})
+
+        metrics_locked = []
+        with patch.object(dynatrace.metrics, 'add_metric',
+                          side_effect=lambda **_: metrics_locked.append(dynatrace._metrics_lock.locked())):
+            dynatrace.flush_sinks_concurrently(self.sinks)
+
+        self.assertTrue(metrics_locked)
+        self.assertTrue(all(metrics_locked))
+
+
+if __name__ == '__main__':
+    unittest.main()
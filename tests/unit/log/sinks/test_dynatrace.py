@@ -13,6 +13,7 @@
 #  limitations under the License.
 
 import unittest
+from unittest.mock import patch
 from datetime import datetime
 import json
 import logging
@@ -111,5 +112,99 @@ class TestDynatraceSink(unittest.TestCase):
 
         self.assertRaises(requests.exceptions.RetryError,dynatrace_sink.ingest_logs,test_log_entries,session=session)
 
+    @responses.activate
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    def test_stage_timing(self, _):
+        dynatrace_sink = dynatrace.DynatraceSink(mock_dt_url,mock_dt_key_parameter,sink_id='1')
+
+        responses.add(responses.POST, dynatrace_sink.get_environment_url() + dynatrace.LOGV2_API_URL_SUFFIX,
+                      status=204)
+
+        dynatrace_sink.push({'content': 'test'})
+        dynatrace_sink.flush()
+
+        self.assertEqual(set(dynatrace_sink.stage_timer.get_timings()), {'Serialization', 'Compression', 'HTTPPost'})
+
+        with patch.object(dynatrace_sink.stage_timer, 'emit_metrics') as emit_metrics:
+            dynatrace_sink.emit_stage_timing_metrics('aws.ALB')
+        emit_metrics.assert_called_once_with({'processing_rule': 'aws.ALB', 'sink': '1'})
+
+        dynatrace_sink.empty_sink()
+        self.assertEqual(dynatrace_sink.stage_timer.get_timings(), {})
+
+    @responses.activate
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    def test_ingestion_ack_times(self, _):
+        dynatrace_sink = dynatrace.DynatraceSink(mock_dt_url,mock_dt_key_parameter,sink_id='1')
+
+        responses.add(responses.POST, dynatrace_sink.get_environment_url() + dynatrace.LOGV2_API_URL_SUFFIX,
+                      status=204)
+
+        self.assertEqual(dynatrace_sink.get_ingestion_ack_times(), (None, None))
+
+        dynatrace_sink.ingest_logs([{'content': 'batch 1'}], batch_num=1)
+        first_ack_time, _ = dynatrace_sink.get_ingestion_ack_times()
+        dynatrace_sink.ingest_logs([{'content': 'batch 2'}], batch_num=2)
+
+        self.assertEqual(dynatrace_sink.get_ingestion_ack_times()[0], first_ack_time)
+        self.assertGreaterEqual(dynatrace_sink.get_ingestion_ack_times()[1], first_ack_time)
+
+        dynatrace_sink.empty_sink()
+        self.assertEqual(dynatrace_sink.get_ingestion_ack_times(), (None, None))
+
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    def test_warm_up(self, get_parameter):
+        dynatrace_sink = dynatrace.DynatraceSink(mock_dt_url,mock_dt_key_parameter)
+
+        with patch.object(dynatrace_sink.session, 'head') as head:
+            dynatrace_sink.warm_up()
+
+        get_parameter.assert_called_once_with(mock_dt_key_parameter, max_age=120, decrypt=True, force_fetch=True)
+        head.assert_called_once()
+        self.assertEqual(head.call_args.args[0], dynatrace_sink.get_environment_url() + dynatrace.LOGV2_API_URL_SUFFIX)
+        self.assertNotIn('Authorization', head.call_args.kwargs['headers'])
+
+    @patch('log.sinks.dynatrace.parameters.get_parameter', side_effect=Exception('SSM unavailable'))
+    def test_warm_up_ignores_errors(self, _):
+        dynatrace_sink = dynatrace.DynatraceSink(mock_dt_url,mock_dt_key_parameter)
+
+        with patch.object(dynatrace_sink.session, 'head', side_effect=requests.exceptions.ConnectionError()):
+            dynatrace_sink.warm_up()
+
+    @responses.activate
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    def test_serialized_messages_shared_by_sinks(self, _):
+        sinks = [dynatrace.DynatraceSink(mock_dt_url, mock_dt_key_parameter, sink_id='1'),
+                 dynatrace.DynatraceSink('https://test2.live.dynatrace.com', mock_dt_key_parameter, sink_id='2')]
+        for dynatrace_sink in sinks:
+            responses.add(responses.POST, dynatrace_sink.get_environment_url() + dynatrace.LOGV2_API_URL_SUFFIX,
+                          status=204)
+
+        log_message = {'content': 'x' * (dynatrace.DYNATRACE_LOG_INGEST_CONTENT_MAX_LENGTH + 20)}
+        serialized_log_message = dynatrace.serialize_log_message(log_message)
+        self.assertTrue(json.loads(serialized_log_message.data)['content'].endswith(
+            dynatrace.DYNATRACE_LOG_INGEST_CONTENT_MARK_TRIMMED))
+
+        with patch.object(dynatrace.gzip, 'compress', wraps=dynatrace.gzip.compress) as compress:
+            for dynatrace_sink in sinks:
+                dynatrace_sink.push(serialized_log_message)
+                dynatrace_sink.push({'content': 'test'})
+            # the last messages pushed are different objects, each sink compresses its batch
+            for dynatrace_sink in sinks:
+                dynatrace_sink.flush()
+
+            self.assertEqual(compress.call_count, 2)
+            self.assertEqual(responses.calls[0].request.body, responses.calls[1].request.body)
+
+            for dynatrace_sink in sinks:
+                dynatrace_sink.push(serialized_log_message)
+                dynatrace_sink.flush()
+
+            self.assertEqual(compress.call_count, 3)
+            self.assertEqual(responses.calls[2].request.body, responses.calls[3].request.body)
+
+        dynatrace.empty_sinks({dynatrace_sink.get_sink_id(): dynatrace_sink for dynatrace_sink in sinks})
+
+
 if __name__ == '__main__':
     unittest.main()
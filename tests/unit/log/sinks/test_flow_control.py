@@ -0,0 +1,102 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+import time
+from unittest.mock import patch
+import responses
+from log.sinks import dynatrace, flow_control
+from log.sinks.flow_control import AdaptiveFlowControl
+
+mock_dt_url = 'https://test.live.dynatrace.com'
+mock_dt_key_parameter = '/dynatrace-s3-log-forwarder/test/api-key'
+
+
+class TestAdaptiveFlowControl(unittest.TestCase):
+
+    def test_additive_increase_multiplicative_decrease(self):
+        control = AdaptiveFlowControl(5000, 5000000, adaptive=True, latency_target=1)
+
+        control.on_response(204, 0.1, throttled_retries=1)
+        self.assertEqual(control.get_batch_limits(), (2500, 2500000))
+
+        control.on_response(204, 2.0)
+        self.assertEqual(control.get_batch_limits(), (1250, 1250000))
+
+        control.on_response(204, 0.1)
+        self.assertEqual(control.get_batch_limits(), (1750, 1750000))
+
+        for _ in range(20):
+            control.on_response(204, 0.1)
+        self.assertEqual(control.get_batch_limits(), (5000, 5000000))
+
+        for _ in range(20):
+            control.on_error()
+        self.assertEqual(control.get_batch_limits(), (flow_control.MIN_BATCH_ENTRIES, flow_control.MIN_BATCH_BYTES))
+
+    def test_backoff_honors_retry_after(self):
+        control = AdaptiveFlowControl(5000, 5000000, adaptive=True)
+
+        with patch.object(flow_control.random, 'uniform', return_value=0.0):
+            control.on_response(429, 0.1, retry_after='0.2')
+            backoff_time = control.wait_for_backoff()
+
+        self.assertGreaterEqual(backoff_time, 0.15)
+        self.assertEqual(control.wait_for_backoff(), 0.0)
+
+    def test_disabled(self):
+        control = AdaptiveFlowControl(5000, 5000000, adaptive=False)
+
+        control.on_response(429, 20, retry_after='60')
+        control.on_error()
+
+        self.assertEqual(control.get_batch_limits(), (5000, 5000000))
+        self.assertEqual(control.wait_for_backoff(), 0.0)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(flow_control.parse_retry_after('3'), 3.0)
+        self.assertEqual(flow_control.parse_retry_after(None), None)
+        self.assertEqual(flow_control.parse_retry_after('invalid'), None)
+        retry_after_date = time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(time.time() + 30))
+        self.assertAlmostEqual(flow_control.parse_retry_after(retry_after_date), 30, delta=2)
+
+
+class TestDynatraceSinkFlowControl(unittest.TestCase):
+
+    @responses.activate
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    def test_batches_shrink_after_throttling(self, _):
+        dynatrace_sink = dynatrace.DynatraceSink(mock_dt_url, mock_dt_key_parameter, sink_id='1')
+        dynatrace_sink.flow_control.adaptive = True
+        url = dynatrace_sink.get_environment_url() + dynatrace.LOGV2_API_URL_SUFFIX
+        responses.add(responses.POST, url, status=429, headers={'Retry-After': '0'})
+
+        with patch.object(dynatrace_sink.session.get_adapter(url).max_retries, 'total', 0):
+            with self.assertRaises(dynatrace.DynatraceThrottlingException):
+                dynatrace_sink.ingest_logs([{'content': 'test'}], batch_num=1)
+
+        self.assertEqual(dynatrace_sink.flow_control.get_batch_limits(),
+                         (dynatrace.DYNATRACE_LOG_INGEST_MAX_ENTRIES_COUNT // 2,
+                          dynatrace.DYNATRACE_LOG_INGEST_PAYLOAD_MAX_SIZE // 2))
+
+        responses.replace(responses.POST, url, status=204)
+        for _ in range(dynatrace.DYNATRACE_LOG_INGEST_MAX_ENTRIES_COUNT // 2 + 1):
+            dynatrace_sink.push({'content': 'test'})
+
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(dynatrace_sink.get_num_of_buffered_messages(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
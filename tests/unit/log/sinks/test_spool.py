@@ -0,0 +1,165 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+import gzip
+import json
+import tempfile
+from unittest.mock import patch
+import boto3
+import responses
+from moto import mock_aws
+from log.sinks import dynatrace, spool
+
+mock_dt_url = 'https://test.live.dynatrace.com'
+mock_dt_key_parameter = '/dynatrace-s3-log-forwarder/test/api-key'
+
+
+class TestBatchSpools(unittest.TestCase):
+
+    def check_spool(self, batch_spool: spool.BatchSpool):
+        with patch.object(spool.time, 'time', return_value=1700000000.0):
+            first_key = batch_spool.put('1', b'batch 1')
+        second_key = batch_spool.put('1', b'batch 2')
+        batch_spool.put('2', b'other sink')
+
+        batches = batch_spool.list('1', 10)
+        self.assertEqual([batch.key for batch in batches], [first_key, second_key])
+        self.assertEqual(batches[0].created_time, 1700000000.0)
+        self.assertEqual(batch_spool.get(first_key), b'batch 1')
+        self.assertEqual(len(batch_spool.list('1', 1)), 1)
+
+        batch_spool.delete(first_key)
+        self.assertEqual([batch.key for batch in batch_spool.list('1', 10)], [second_key])
+        self.assertEqual(batch_spool.list('3', 10), [])
+
+        # only the first claim gets the batch, which stays in the spool until deleted
+        self.assertEqual(batch_spool.claim(second_key), b'batch 2')
+        self.assertIsNone(batch_spool.claim(second_key))
+        self.assertEqual([batch.key for batch in batch_spool.list('1', 10)], [second_key])
+
+        batch_spool.release(second_key)
+        self.assertEqual(batch_spool.claim(second_key), b'batch 2')
+
+        # the claim of an execution environment that died is taken over once stale
+        with patch.object(spool, 'SPOOL_CLAIM_TTL', -10):
+            self.assertEqual(batch_spool.claim(second_key), b'batch 2')
+
+        batch_spool.delete(second_key)
+        self.assertEqual(batch_spool.list('1', 10), [])
+        self.assertIsNone(batch_spool.claim(second_key))
+
+    def test_filesystem_spool(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.check_spool(spool.FileSystemBatchSpool(directory))
+
+    @mock_aws
+    def test_s3_spool(self):
+        s3_client = boto3.client('s3', region_name='us-east-1')
+        s3_client.create_bucket(Bucket='spool-bucket')
+
+        batch_spool = spool.S3BatchSpool('spool-bucket', 'spool/', lambda: s3_client)
+        self.check_spool(batch_spool)
+        # no claims left behind
+        self.assertEqual(s3_client.list_objects_v2(Bucket='spool-bucket', Prefix='spool/1/')['KeyCount'], 0)
+
+        # claims don't count towards the maximum number of batches listed
+        first_key = batch_spool.put('1', b'batch 1')
+        batch_spool.put('1', b'batch 2')
+        self.assertEqual(batch_spool.claim(first_key), b'batch 1')
+        self.assertEqual(len(batch_spool.list('1', 2)), 2)
+
+    def test_spool_is_abstract(self):
+        with self.assertRaises(TypeError):
+            spool.BatchSpool()
+
+
+class TestDynatraceSinkSpool(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.spool = spool.FileSystemBatchSpool(directory.name)
+
+        self.dynatrace_sink = dynatrace.DynatraceSink(mock_dt_url, mock_dt_key_parameter, sink_id='1')
+        self.dynatrace_sink.flow_control.adaptive = False
+        dynatrace.set_spool({'1': self.dynatrace_sink}, self.spool)
+        self.url = self.dynatrace_sink.get_environment_url() + dynatrace.LOGV2_API_URL_SUFFIX
+
+    @responses.activate
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    def test_throttled_batches_are_spooled_and_replayed(self, _):
+        responses.add(responses.POST, self.url, status=204)
+        responses.add(responses.POST, self.url, status=429)
+
+        with patch.object(self.dynatrace_sink.session.get_adapter(self.url).max_retries, 'total', 0):
+            self.dynatrace_sink.ingest_logs([{'content': 'batch 1'}], batch_num=1)
+            self.dynatrace_sink.ingest_logs([{'content': 'batch 2'}], batch_num=2)
+
+        spooled_batches = self.spool.list('1', 10)
+        self.assertEqual(len(spooled_batches), 1)
+        self.assertEqual(json.loads(gzip.decompress(self.spool.get(spooled_batches[0].key))),
+                         [{'content': 'batch 2'}])
+
+        responses.replace(responses.POST, self.url, status=204)
+        self.assertEqual(self.dynatrace_sink.replay_spooled_batches(), 1)
+
+        self.assertEqual(self.spool.list('1', 10), [])
+        # the compressed batch throttled is POST'ed again as is
+        self.assertEqual(responses.calls[-1].request.body, responses.calls[1].request.body)
+        self.assertEqual(responses.calls[-1].request.headers['Content-Encoding'], 'gzip')
+
+    @responses.activate
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    def test_replay_stops_on_failure_and_discards_expired_batches(self, _):
+        with patch.object(spool.time, 'time', return_value=1700000000.0):
+            expired_key = self.spool.put('1', gzip.compress(b'[{"content": "expired"}]'))
+        batch_keys = {self.spool.put('1', gzip.compress(b'[{"content": "batch 1"}]')),
+                      self.spool.put('1', gzip.compress(b'[{"content": "batch 2"}]'))}
+        responses.add(responses.POST, self.url, status=429)
+
+        with patch.object(self.dynatrace_sink.session.get_adapter(self.url).max_retries, 'total', 0):
+            self.assertEqual(self.dynatrace_sink.replay_spooled_batches(), 0)
+
+        self.assertEqual(len(responses.calls), 1)
+        # the batch that failed stays in the spool and its claim is released
+        self.assertEqual({batch.key for batch in self.spool.list('1', 10)}, batch_keys)
+        self.assertNotIn(expired_key, batch_keys)
+        for key in batch_keys:
+            self.assertIsNotNone(self.spool.claim(key))
+
+    @responses.activate
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    def test_empty_spool_is_not_listed_again(self, _):
+        responses.add(responses.POST, self.url, status=204)
+
+        with patch.object(self.spool, 'list', wraps=self.spool.list) as list_batches:
+            self.assertEqual(self.dynatrace_sink.replay_spooled_batches(), 0)
+            self.assertEqual(self.dynatrace_sink.replay_spooled_batches(), 0)
+            self.assertEqual(list_batches.call_count, 1)
+
+            # listed again once the execution environment spools a batch
+            self.assertTrue(self.dynatrace_sink._spool_batch(gzip.compress(b'[{"content": "batch"}]'), 1))
+            self.assertEqual(self.dynatrace_sink.replay_spooled_batches(), 1)
+            self.assertEqual(list_batches.call_count, 2)
+
+    def test_spool_disabled(self):
+        dynatrace.set_spool({'1': self.dynatrace_sink}, None)
+
+        self.assertEqual(self.dynatrace_sink.replay_spooled_batches(), 0)
+        self.assertFalse(self.dynatrace_sink._spool_batch(b'batch', 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
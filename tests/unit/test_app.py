@@ -0,0 +1,112 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+import os
+import json
+from unittest.mock import Mock, patch
+import responses
+
+os.environ['LOG_FORWARDER_CONFIGURATION_LOCATION'] = 'local'
+os.environ['DEPLOYMENT_NAME'] = 'test'
+os.environ.setdefault('VERIFY_DT_SSL_CERT', 'true')
+os.environ.setdefault('POWERTOOLS_METRICS_NAMESPACE', 'local')
+os.environ.setdefault('DYNATRACE_1_ENV_URL', 'https://abc1234.live.dynatrace.com')
+os.environ.setdefault('DYNATRACE_1_API_KEY_PARAM', '/dynatrace/s3-log-forwarder/test/api-key')
+
+import app
+
+
+def get_lambda_context(remaining_time_in_millis: int = 300000):
+    context = Mock()
+    context.invoked_function_arn = 'arn:aws:lambda:us-east-1:012345678910:function:test'
+    context.get_remaining_time_in_millis.return_value = remaining_time_in_millis
+    return context
+
+
+class TestLambdaHandler(unittest.TestCase):
+
+    @patch('app.processing.process_log_object')
+    @patch('app.refresh_warm_state')
+    def test_warm_up_event(self, refresh_warm_state, process_log_object):
+        response = app.lambda_handler({'warm_up': True}, get_lambda_context())
+
+        self.assertEqual(response, {'batchItemFailures': []})
+        refresh_warm_state.assert_called_once()
+        process_log_object.assert_not_called()
+
+    @patch('app.processing.process_log_object')
+    def test_objects_fail_fast_while_circuit_breaker_is_open(self, process_log_object):
+        notification = {'region': 'us-east-1', 'detail': {
+            'bucket': {'name': 'test-bucket'}, 'object': {'key': 'test.log'}, 'requester': '012345678910'}}
+        event = {'Records': [{'messageId': '1', 'body': json.dumps(notification)}]}
+
+        sink = app.dynatrace_sinks['1']
+        with patch.object(sink.circuit_breaker, 'allow_request', return_value=False):
+            response = app.lambda_handler(event, get_lambda_context())
+
+        self.assertEqual(response, {'batchItemFailures': [{'itemIdentifier': '1'}]})
+        process_log_object.assert_not_called()
+
+    @responses.activate
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    @patch('app.processing.process_log_object')
+    def test_coalesced_batches_are_flushed_at_the_end_of_the_invocation(self, process_log_object, _):
+        def push_log_entry(processing_rule, bucket, key, region, sinks, context, **kwargs):
+            for sink in sinks:
+                sink.push({'content': key})
+
+        process_log_object.side_effect = push_log_entry
+        sink = app.dynatrace_sinks['1']
+        responses.add(responses.POST, sink.get_environment_url() + app.dynatrace.LOGV2_API_URL_SUFFIX, status=204)
+
+        records = []
+        for message_id in ('1', '2'):
+            notification = {'region': 'us-east-1', 'detail': {
+                'bucket': {'name': 'test-bucket'}, 'object': {'key': f'test-{message_id}.log'},
+                'requester': '012345678910'}}
+            records.append({'messageId': message_id, 'body': json.dumps(notification)})
+
+        with patch.object(app.dynatrace, 'DYNATRACE_COALESCE_BATCHES', True):
+            response = app.lambda_handler({'Records': records}, get_lambda_context())
+
+        self.assertEqual(response, {'batchItemFailures': []})
+        self.assertEqual(len(responses.calls), 1)
+        self.assertIsNotNone(sink.get_ingestion_ack_times('2')[0])
+
+    @responses.activate
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    @patch('app.processing.process_log_object')
+    def test_duplicate_notifications_are_skipped(self, process_log_object, _):
+        sink = app.dynatrace_sinks['1']
+        responses.add(responses.POST, sink.get_environment_url() + app.dynatrace.LOGV2_API_URL_SUFFIX, status=204)
+
+        notification = {'region': 'us-east-1', 'detail': {
+            'bucket': {'name': 'test-bucket'}, 'object': {'key': 'duplicate.log', 'etag': 'abc'},
+            'requester': '012345678910'}}
+        records = [{'messageId': message_id, 'body': json.dumps(notification)} for message_id in ('1', '2')]
+
+        with patch.object(app, 'idempotency_cache', app.idempotency.IdempotencyCache()):
+            response = app.lambda_handler({'Records': records}, get_lambda_context())
+            self.assertEqual(response, {'batchItemFailures': []})
+            self.assertEqual(process_log_object.call_count, 1)
+
+            # redelivered after the object was forwarded
+            response = app.lambda_handler({'Records': records[1:]}, get_lambda_context())
+            self.assertEqual(response, {'batchItemFailures': []})
+            self.assertEqual(process_log_object.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
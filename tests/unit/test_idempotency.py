@@ -0,0 +1,104 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+import tempfile
+import time
+from unittest.mock import Mock, patch
+import boto3
+from botocore.exceptions import ClientError
+from moto import mock_aws
+from utils import idempotency
+
+
+def get_notification(key: str = 'test.log', etag: str = 'abc', version_id: str = None):
+    s3_object = {'key': key, 'etag': etag}
+    if version_id is not None:
+        s3_object['version-id'] = version_id
+    return {'detail': {'bucket': {'name': 'test-bucket'}, 'object': s3_object}}
+
+
+class TestIdempotencyCache(unittest.TestCase):
+
+    def test_get_idempotency_key(self):
+        self.assertEqual(idempotency.get_idempotency_key(get_notification()), 'test-bucket/test.log#abc')
+        self.assertEqual(idempotency.get_idempotency_key(get_notification(version_id='v2')), 'test-bucket/test.log#v2')
+        self.assertIsNone(idempotency.get_idempotency_key(get_notification(etag=None)))
+        self.assertIsNone(idempotency.get_idempotency_key({'detail': {}}))
+
+    def test_completed_objects_expire(self):
+        cache = idempotency.IdempotencyCache(ttl=60)
+        cache.mark_completed('a')
+
+        self.assertTrue(cache.is_completed('a'))
+        self.assertFalse(cache.is_completed('b'))
+        with patch.object(idempotency.time, 'time', return_value=time.time() + 61):
+            self.assertFalse(cache.is_completed('a'))
+
+    def test_least_recently_used_objects_are_evicted(self):
+        cache = idempotency.IdempotencyCache(max_size=2)
+        cache.mark_completed('a')
+        cache.mark_completed('b')
+        cache.is_completed('a')
+        cache.mark_completed('c')
+
+        self.assertTrue(cache.is_completed('a'))
+        self.assertFalse(cache.is_completed('b'))
+        self.assertTrue(cache.is_completed('c'))
+
+    def test_shared_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = idempotency.FileSystemIdempotencyStore(directory)
+            idempotency.IdempotencyCache(store).mark_completed('a')
+
+            # another execution environment
+            cache = idempotency.IdempotencyCache(store)
+            self.assertTrue(cache.is_completed('a'))
+            self.assertFalse(cache.is_completed('b'))
+
+    def test_store_errors_process_the_object(self):
+        store = Mock()
+        store.get_expiry_time.side_effect = Exception('Store unavailable')
+        store.put.side_effect = Exception('Store unavailable')
+        cache = idempotency.IdempotencyCache(store)
+
+        self.assertFalse(cache.is_completed('a'))
+        cache.mark_completed('a')
+        self.assertTrue(cache.is_completed('a'))
+
+    @mock_aws
+    def test_s3_store(self):
+        s3_client = boto3.client('s3', region_name='us-east-1')
+        s3_client.create_bucket(Bucket='idempotency-bucket')
+        store = idempotency.S3IdempotencyStore('idempotency-bucket', 'idempotency/', lambda: s3_client)
+
+        self.assertIsNone(store.get_expiry_time('test-bucket/test.log#abc'))
+        store.put('test-bucket/test.log#abc', 1234.5)
+        self.assertEqual(store.get_expiry_time('test-bucket/test.log#abc'), 1234.5)
+
+    def test_s3_store_forbidden_head_is_a_miss(self):
+        s3_client = Mock()
+        s3_client.head_object.side_effect = ClientError({'Error': {'Code': '403', 'Message': 'Forbidden'}}, 'HeadObject')
+        store = idempotency.S3IdempotencyStore('idempotency-bucket', 'idempotency/', lambda: s3_client)
+
+        with self.assertNoLogs(level='WARNING'):
+            self.assertFalse(idempotency.IdempotencyCache(store).is_completed('test-bucket/test.log#abc'))
+
+    def test_store_is_abstract(self):
+        with self.assertRaises(TypeError):
+            idempotency.IdempotencyStore()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+from datetime import datetime
+from unittest.mock import Mock, patch
+from utils import ingestion_lag
+
+OBJECT_CREATED_TIME = datetime.fromisoformat('2026-01-01T00:00:00Z').timestamp()
+
+
+def get_sink(first_ack_time, last_ack_time):
+    sink = Mock()
+    sink.get_ingestion_ack_times.return_value = (first_ack_time, last_ack_time)
+    return sink
+
+
+class TestIngestionLag(unittest.TestCase):
+
+    def emit_metrics(self, s3_notification: dict, message: dict, sinks: list) -> dict:
+        with patch.object(ingestion_lag, 'EphemeralMetrics') as ephemeral_metrics:
+            ingestion_lag.emit_ingestion_lag_metrics(s3_notification, message, OBJECT_CREATED_TIME + 60,
+                                                     sinks, 'test-bucket', 'aws.ALB')
+
+        lag_metrics = ephemeral_metrics.return_value
+        dimensions = {call.kwargs['name']: call.kwargs['value'] for call in lag_metrics.add_dimension.call_args_list}
+        if lag_metrics.add_metric.called:
+            self.assertEqual(dimensions['bucket'], 'test-bucket')
+            self.assertEqual(dimensions['processing_rule'], 'aws.ALB')
+            lag_metrics.flush_metrics.assert_called_once()
+
+        return {call.kwargs['name']: call.kwargs['value'] for call in lag_metrics.add_metric.call_args_list}
+
+    def test_ingestion_lag_metrics(self):
+        sinks = [get_sink(OBJECT_CREATED_TIME + 65, OBJECT_CREATED_TIME + 80),
+                 get_sink(OBJECT_CREATED_TIME + 62, OBJECT_CREATED_TIME + 70),
+                 get_sink(None, None)]
+        message = {'messageId': '1', 'attributes': {
+            'ApproximateReceiveCount': '3',
+            'SentTimestamp': str(int((OBJECT_CREATED_TIME + 1) * 1000)),
+            'ApproximateFirstReceiveTimestamp': str(int((OBJECT_CREATED_TIME + 21.5) * 1000))}}
+
+        lag_metrics = self.emit_metrics({'time': '2026-01-01T00:00:00Z'}, message, sinks)
+
+        self.assertEqual(lag_metrics, {
+            'ObjectReceivedLag': 60,
+            'FirstBatchIngestedLag': 62,
+            'LastBatchIngestedLag': 80,
+            'SQSQueuedTime': 20.5,
+            'SQSApproximateReceiveCount': 3
+        })
+
+    def test_objects_without_acknowledged_batches(self):
+        lag_metrics = self.emit_metrics({'time': '2026-01-01T00:00:00Z'}, {'messageId': '1'}, [get_sink(None, None)])
+
+        self.assertEqual(lag_metrics, {'ObjectReceivedLag': 60})
+
+    def test_notifications_without_event_time(self):
+        sinks = [get_sink(OBJECT_CREATED_TIME + 65, OBJECT_CREATED_TIME + 80)]
+
+        self.assertEqual(self.emit_metrics({'time': 'invalid'}, {'messageId': '1'}, sinks), {})
+        self.assertEqual(
+            self.emit_metrics({}, {'messageId': '1', 'attributes': {'ApproximateReceiveCount': '1'}}, sinks),
+            {'SQSApproximateReceiveCount': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
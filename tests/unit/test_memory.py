@@ -0,0 +1,84 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+import os
+from unittest.mock import Mock, patch
+from utils import memory
+
+
+def get_sink(sink_id: str, num_messages: int, size: int):
+    sink = Mock()
+    sink.get_sink_id.return_value = sink_id
+    sink.get_num_of_buffered_messages.return_value = num_messages
+    sink.get_size_of_buffered_messages.return_value = size
+    return sink
+
+
+class TestMemoryAccounting(unittest.TestCase):
+
+    @patch.object(memory.ObjectMemoryAccount, 'emit_metrics', autospec=True)
+    def test_tracemalloc_accounting(self, emit_metrics):
+        sink = get_sink('1', 0, 2)
+
+        with patch.object(memory, 'MEMORY_ACCOUNTING_MODE', memory.MEMORY_ACCOUNTING_TRACEMALLOC):
+            with memory.account_object('test-bucket', 'test.log', [sink], 'aws.ALB'):
+                memory.sample('S3GetObject')
+                data = bytearray(8 * memory.BYTES_PER_MB)
+                sink.get_num_of_buffered_messages.return_value = 1000
+                sink.get_size_of_buffered_messages.return_value = 500000
+                memory.sample('RecordProcessing')
+                del data
+                memory.sample('Serialization')
+                memory.sample('Compression')
+
+        account, processing_rule_name = emit_metrics.call_args.args
+        self.assertEqual(processing_rule_name, 'aws.ALB')
+        self.assertGreaterEqual(account.stage_peak_bytes['RecordProcessing'], 8 * memory.BYTES_PER_MB)
+        self.assertLess(account.stage_peak_bytes['Compression'], 8 * memory.BYTES_PER_MB)
+        self.assertGreaterEqual(account.peak_bytes, 8 * memory.BYTES_PER_MB)
+        self.assertEqual(account.buffered_messages_at_peak, 1000)
+        self.assertEqual(account.buffered_bytes_at_peak, 500000)
+        self.assertEqual(account.max_buffered_bytes, {'1': 500000})
+
+        # no sample is taken after the object
+        memory.sample('RecordProcessing')
+        emit_metrics.assert_called_once()
+
+    @patch.object(memory.ObjectMemoryAccount, 'emit_metrics', autospec=True)
+    def test_warning_close_to_memory_limit(self, emit_metrics):
+        with patch.object(memory, 'MEMORY_ACCOUNTING_MODE', memory.MEMORY_ACCOUNTING_RSS), \
+             patch.dict(os.environ, {'AWS_LAMBDA_FUNCTION_MEMORY_SIZE': '1'}):
+            with self.assertLogs(level='WARNING') as logs:
+                with memory.account_object('test-bucket', 'AWSLogs/test.log.gz', [], 'aws.ALB'):
+                    memory.sample('RecordProcessing')
+                    memory.sample('Serialization')
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('s3://test-bucket/AWSLogs/test.log.gz during RecordProcessing', logs.output[0])
+
+        account = emit_metrics.call_args.args[0]
+        self.assertGreater(account.peak_bytes, 0)
+        self.assertEqual(set(account.stage_peak_bytes), {'RecordProcessing', 'Serialization'})
+
+    @patch.object(memory.ObjectMemoryAccount, 'emit_metrics', autospec=True)
+    def test_accounting_disabled(self, emit_metrics):
+        with memory.account_object('test-bucket', 'test.log', [], 'aws.ALB'):
+            memory.sample('RecordProcessing')
+
+        emit_metrics.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
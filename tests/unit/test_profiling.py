@@ -0,0 +1,92 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+import os
+import pstats
+import shutil
+import tempfile
+from unittest.mock import Mock, patch
+from utils import profiling
+
+
+def process_log_object():
+    return sum(i for i in range(1000))
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.patched_directory = patch.object(profiling, 'PROFILING_DIRECTORY', self.tmp_dir)
+        self.patched_directory.start()
+
+    def tearDown(self):
+        self.patched_directory.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_profiling_requested_by_message_attribute(self):
+        message = {'messageAttributes': {'profile': {'stringValue': 'true', 'dataType': 'String'}}}
+        s3_client = Mock()
+
+        with patch.object(profiling, 'PROFILING_S3_BUCKET', 'profiles-bucket'):
+            with profiling.profile_object('test-bucket', 'AWSLogs/test.log.gz', message, s3_client):
+                process_log_object()
+
+        profile_files = os.listdir(self.tmp_dir)
+        self.assertEqual(len(profile_files), 1)
+        self.assertTrue(profile_files[0].endswith('-test-bucket_AWSLogs_test.log.gz.prof'))
+
+        function_names = [function[2] for function in pstats.Stats(
+            os.path.join(self.tmp_dir, profile_files[0])).stats]
+        self.assertIn('process_log_object', function_names)
+
+        s3_client.upload_file.assert_called_once_with(
+            os.path.join(self.tmp_dir, profile_files[0]), 'profiles-bucket',
+            profiling.PROFILING_S3_PREFIX + profile_files[0])
+
+    def test_object_profiling_mode_with_key_pattern(self):
+        with patch.object(profiling, 'PROFILING_MODE', profiling.PROFILING_MODE_OBJECT), \
+             patch.object(profiling, 'PROFILING_KEY_PATTERN', r'\.gz$'):
+            self.assertTrue(profiling.should_profile_object('AWSLogs/test.log.gz', {}))
+            self.assertFalse(profiling.should_profile_object('AWSLogs/test.log', {}))
+
+        self.assertFalse(profiling.should_profile_object('AWSLogs/test.log.gz', {}))
+
+    def test_invocation_profiling_includes_objects(self):
+        @profiling.profile_invocation()
+        def handler(event, context):
+            with profiling.profile_object('test-bucket', 'test.log', {}):
+                return process_log_object()
+
+        context = Mock()
+        context.aws_request_id = 'test-request-id'
+
+        with patch.object(profiling, 'PROFILING_MODE', profiling.PROFILING_MODE_INVOCATION), \
+             patch.object(profiling, 'PROFILING_KEY_PATTERN', None):
+            self.assertEqual(handler({}, context), 499500)
+
+        profile_files = os.listdir(self.tmp_dir)
+        self.assertEqual(len(profile_files), 1)
+        self.assertTrue(profile_files[0].endswith('-invocation-test-request-id.prof'))
+
+    def test_profiling_disabled(self):
+        with profiling.profile_object('test-bucket', 'test.log', {}):
+            process_log_object()
+
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
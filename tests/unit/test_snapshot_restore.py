@@ -0,0 +1,66 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+import os
+import random
+from unittest.mock import patch, call
+
+os.environ['LOG_FORWARDER_CONFIGURATION_LOCATION'] = 'local'
+os.environ['DEPLOYMENT_NAME'] = 'test'
+os.environ.setdefault('VERIFY_DT_SSL_CERT', 'true')
+os.environ.setdefault('POWERTOOLS_METRICS_NAMESPACE', 'local')
+os.environ.setdefault('DYNATRACE_1_ENV_URL', 'https://abc1234.live.dynatrace.com')
+os.environ.setdefault('DYNATRACE_1_API_KEY_PARAM', '/dynatrace/s3-log-forwarder/test/api-key')
+
+import app
+
+
+class TestSnapshotRestore(unittest.TestCase):
+    '''
+    Simulates the snapshot and restore cycle of the execution environment calling the runtime hooks
+    in the order the runtime would.
+    '''
+
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    @patch('app.parameters.clear_caches')
+    def test_snapshot_restore_cycle(self, clear_caches, get_parameter):
+        app.before_snapshot()
+
+        # every rule is compiled and the API keys aren't part of the snapshot
+        for source_rules in app.defined_log_processing_rules.values():
+            for rule in source_rules.values():
+                self.assertTrue(rule.is_compiled(), rule.name)
+        clear_caches.assert_called_once()
+
+        snapshot_random_state = random.getstate()
+        snapshot_boto3_session = app.boto3_session
+        snapshot_http_sessions = {k: v.session for k, v in app.dynatrace_sinks.items()}
+
+        app.after_restore()
+
+        self.assertNotEqual(random.getstate(), snapshot_random_state)
+        self.assertIsNot(app.boto3_session, snapshot_boto3_session)
+        for sink_id, sink in app.dynatrace_sinks.items():
+            self.assertIsNot(sink.session, snapshot_http_sessions[sink_id])
+            self.assertIn(call(sink._api_key_parameter, max_age=120, decrypt=True, force_fetch=True),
+                          get_parameter.call_args_list)
+
+    @patch('log.sinks.dynatrace.parameters.get_parameter', side_effect=Exception('SSM unavailable'))
+    def test_restore_does_not_fail_if_api_key_fetch_fails(self, _):
+        app.after_restore()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+import threading
+import time
+from unittest.mock import Mock, patch
+from utils import sqs_visibility
+from utils.sqs_visibility import VisibilityHeartbeat
+
+QUEUE_ARN = 'arn:aws:sqs:us-east-1:012345678910:test-queue'
+
+
+class FakeQueueClient():
+    '''
+    Local fake of the SQS client, recording the visibility timeout set for each receipt handle
+    '''
+
+    def __init__(self):
+        self.visibility_timeouts = {}
+        self.requests = 0
+        self.extended = threading.Event()
+
+    def change_message_visibility_batch(self, QueueUrl, Entries):
+        assert QueueUrl == 'https://sqs.us-east-1.amazonaws.com/012345678910/test-queue'
+        assert len(Entries) <= sqs_visibility.MAX_BATCH_ENTRIES
+        for entry in Entries:
+            self.visibility_timeouts[entry['ReceiptHandle']] = entry['VisibilityTimeout']
+        self.requests += 1
+        self.extended.set()
+        return {'Successful': [{'Id': entry['Id']} for entry in Entries], 'Failed': []}
+
+
+def get_messages(num_messages: int):
+    return [{'messageId': str(i), 'receiptHandle': f'handle-{i}', 'eventSourceARN': QUEUE_ARN}
+            for i in range(num_messages)]
+
+
+def get_lambda_context(remaining_time_in_millis: int = 600000):
+    context = Mock()
+    context.get_remaining_time_in_millis.return_value = remaining_time_in_millis
+    return context
+
+
+class TestVisibilityHeartbeat(unittest.TestCase):
+
+    def test_extension_from_progress(self):
+        heartbeat = VisibilityHeartbeat(FakeQueueClient, get_messages(1), get_lambda_context(),
+                                        visibility_timeout=300)
+        now = time.time()
+
+        # no progress reported yet, the visibility timeout of the queue
+        self.assertEqual(heartbeat.get_extension(now), 300)
+
+        heartbeat.object_started(1000)
+        heartbeat._object_start_time = now - 100
+        heartbeat.report_progress(250)
+        # 300 more seconds estimated for the remaining 75%
+        self.assertEqual(heartbeat.get_extension(now), 600)
+
+        heartbeat.report_progress(900)
+        self.assertEqual(heartbeat.get_extension(now), sqs_visibility.MIN_VISIBILITY_EXTENSION)
+
+        # never beyond the end of the invocation
+        heartbeat.lambda_context = get_lambda_context(10000)
+        heartbeat.report_progress(100)
+        self.assertEqual(heartbeat.get_extension(now), 10 + sqs_visibility.VISIBILITY_HEARTBEAT_MARGIN)
+
+    def test_stalled(self):
+        heartbeat = VisibilityHeartbeat(FakeQueueClient, get_messages(1), get_lambda_context(),
+                                        visibility_timeout=300)
+
+        self.assertFalse(heartbeat.is_stalled(time.time() + 200))
+        self.assertTrue(heartbeat.is_stalled(time.time() + 400))
+        heartbeat.report_progress(100)
+        self.assertFalse(heartbeat.is_stalled(time.time() + 200))
+
+    def test_heartbeat_extends_visibility_before_it_expires(self):
+        queue_client = FakeQueueClient()
+        # the visibility timeout expires in VISIBILITY_HEARTBEAT_MARGIN + 1 seconds
+        heartbeat = VisibilityHeartbeat(lambda: queue_client, get_messages(12) + [{'messageId': 'invalid'}],
+                                        get_lambda_context(), visibility_timeout=sqs_visibility.VISIBILITY_HEARTBEAT_MARGIN + 1,
+                                        batching_window=0)
+
+        heartbeat.start()
+        try:
+            self.assertTrue(queue_client.extended.wait(5))
+        finally:
+            heartbeat.stop()
+
+        self.assertEqual(queue_client.requests, 2)
+        self.assertEqual(set(queue_client.visibility_timeouts), {f'handle-{i}' for i in range(12)})
+        self.assertEqual(set(queue_client.visibility_timeouts.values()), {sqs_visibility.VISIBILITY_HEARTBEAT_MARGIN + 1})
+        self.assertEqual(heartbeat.extensions, 1)
+
+    def test_errors_are_ignored(self):
+        queue_client = Mock()
+        queue_client.change_message_visibility_batch.side_effect = Exception('SQS unavailable')
+        messages = get_messages(1) + [{'messageId': 'invalid', 'receiptHandle': 'handle', 'eventSourceARN': 'invalid'}]
+        heartbeat = VisibilityHeartbeat(lambda: queue_client, messages, get_lambda_context())
+
+        heartbeat.extend_visibility(60)
+
+        queue_client.change_message_visibility_batch.assert_called_once()
+        self.assertEqual(heartbeat._metric_values['SQSVisibilityExtensionErrors'], 2)
+
+    def test_metrics_are_added_when_stopped(self):
+        heartbeat = VisibilityHeartbeat(FakeQueueClient, get_messages(3), get_lambda_context())
+
+        with patch.object(sqs_visibility.metrics, 'add_metric') as add_metric:
+            heartbeat.extend_visibility(60)
+            add_metric.assert_not_called()
+            heartbeat.stop()
+
+        self.assertEqual([(call.kwargs['name'], call.kwargs['value']) for call in add_metric.call_args_list],
+                         [('SQSVisibilityExtendedMessages', 3)])
+
+    def test_queue_client_is_created_on_first_extension(self):
+        queue_client = FakeQueueClient()
+        queue_client_getter = Mock(return_value=queue_client)
+        heartbeat = VisibilityHeartbeat(queue_client_getter, get_messages(1), get_lambda_context())
+
+        heartbeat.start()
+        heartbeat.stop()
+        queue_client_getter.assert_not_called()
+
+        heartbeat.extend_visibility(60)
+        queue_client_getter.assert_called_once()
+        self.assertEqual(queue_client.visibility_timeouts, {'handle-0': 60})
+
+    def test_get_queue_url(self):
+        self.assertEqual(sqs_visibility.get_queue_url(QUEUE_ARN),
+                         'https://sqs.us-east-1.amazonaws.com/012345678910/test-queue')
+        self.assertEqual(sqs_visibility.get_queue_url('arn:aws-cn:sqs:cn-north-1:012345678910:test-queue'),
+                         'https://sqs.cn-north-1.amazonaws.com.cn/012345678910/test-queue')
+        self.assertIsNone(sqs_visibility.get_queue_url('invalid'))
+        self.assertIsNone(sqs_visibility.get_queue_url(None))
+
+    def test_handler_decorator(self):
+        queue_client = FakeQueueClient()
+        current_heartbeats = []
+
+        @sqs_visibility.heartbeat_invocation(lambda: queue_client)
+        def handler(event, context):
+            current_heartbeats.append(sqs_visibility._current_heartbeat)
+            return {'batchItemFailures': []}
+
+        handler({'Records': get_messages(2)}, get_lambda_context())
+        handler({'warm_up': True}, get_lambda_context())
+        with patch.object(sqs_visibility, 'SQS_VISIBILITY_HEARTBEAT', False):
+            handler({'Records': get_messages(2)}, get_lambda_context())
+
+        self.assertIsInstance(current_heartbeats[0], VisibilityHeartbeat)
+        self.assertEqual(current_heartbeats[1:], [None, None])
+        self.assertIsNone(sqs_visibility._current_heartbeat)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+# Copyright 2026 Dynatrace LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#      https://www.apache.org/licenses/LICENSE-2.0
+
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import unittest
+import os
+import io
+import json
+import tempfile
+from unittest.mock import Mock, patch
+import responses
+from log.processing import processing
+from log.processing.log_processing_rule import LogProcessingRule
+from log.sinks import dynatrace
+from utils import tracing
+
+os.environ['LOG_FORWARDER_CONFIGURATION_LOCATION'] = 'local'
+os.environ['DEPLOYMENT_NAME'] = 'test'
+os.environ['FORWARDER_FUNCTION_ARN'] = 'arn:aws:lambda:us-east-1:123456789012:function:test'
+
+TEXT_RULE = LogProcessingRule(
+    name='test_text', source='custom', known_key_path_pattern='.*', log_format='text', skip_header_lines=0
+)
+
+XRAY_TRACE_HEADER = 'Root=1-5759e988-bd862e3fe1be46a994272793;Parent=53995c3f42cd8ad8;Sampled=1'
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        trace_file = tempfile.NamedTemporaryFile(suffix='.jsonl', delete=False)
+        trace_file.close()
+        self.trace_file = trace_file.name
+        self.addCleanup(os.remove, self.trace_file)
+
+        for patcher in (patch.object(tracing, 'TRACING_MODE', tracing.TRACING_MODE_FILE),
+                        patch.object(tracing, 'TRACING_FILE', self.trace_file),
+                        patch.dict(os.environ, {'_X_AMZN_TRACE_ID': XRAY_TRACE_HEADER})):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get_spans(self) -> dict:
+        with open(self.trace_file, encoding='utf-8') as f:
+            return {span['name']: span for span in map(json.loads, f)}
+
+    def test_spans_are_nested_in_lambda_segment(self):
+        with tracing.span('parent', {'key': 'value'}):
+            with tracing.span('child') as child:
+                child.set_attribute('count', 1)
+
+        with self.assertRaises(ValueError):
+            with tracing.span('failed'):
+                raise ValueError('bad record')
+
+        spans = self.get_spans()
+        self.assertEqual(spans['parent']['trace_id'], '5759e988bd862e3fe1be46a994272793')
+        self.assertEqual(spans['parent']['parent_span_id'], '53995c3f42cd8ad8')
+        self.assertEqual(spans['parent']['attributes'], {'key': 'value'})
+        self.assertEqual(spans['child']['parent_span_id'], spans['parent']['span_id'])
+        self.assertEqual(spans['child']['attributes'], {'count': 1})
+        self.assertEqual(spans['failed']['parent_span_id'], '53995c3f42cd8ad8')
+        self.assertEqual(spans['failed']['status'], {'code': 'ERROR', 'message': 'ValueError: bad record'})
+        self.assertIs(tracing.get_current_span(), tracing.NOOP_SPAN)
+
+    def test_open_child_spans_end_with_parent(self):
+        parent = tracing.start_span('parent')
+        tracing.start_span('child')
+        parent.end()
+
+        spans = self.get_spans()
+        self.assertEqual(spans['child']['parent_span_id'], spans['parent']['span_id'])
+        self.assertLessEqual(spans['child']['end_time_unix_nano'], spans['parent']['end_time_unix_nano'])
+        self.assertIs(tracing.get_current_span(), tracing.NOOP_SPAN)
+
+    def test_xray_subsegment(self):
+        with tracing.span('S3GetObject', {'aws.s3.key': 'AWSLogs/test.log', 'object': {}}) as span:
+            pass
+
+        document = span.to_xray()
+        self.assertEqual(document['type'], 'subsegment')
+        self.assertEqual(document['trace_id'], '1-5759e988-bd862e3fe1be46a994272793')
+        self.assertEqual(document['parent_id'], '53995c3f42cd8ad8')
+        self.assertEqual(document['annotations'], {'aws_s3_key': 'AWSLogs/test.log'})
+
+    @responses.activate
+    @patch('log.sinks.dynatrace.parameters.get_parameter', return_value='fakeapikey')
+    def test_process_log_object_spans(self, _):
+        sink = dynatrace.DynatraceSink('https://test.live.dynatrace.com', '/test/api-key')
+        responses.add(responses.POST, sink.get_environment_url() + dynatrace.LOGV2_API_URL_SUFFIX, status=204)
+
+        s3_client = Mock()
+        s3_client.get_object.return_value = {'Body': io.BytesIO(b'line 1\nline 2\n'), 'ContentLength': 14}
+        lambda_context = Mock()
+        lambda_context.get_remaining_time_in_millis.return_value = 300000
+
+        with tracing.span('SQSRecord'):
+            processing.process_log_object(TEXT_RULE, 'test-bucket', 'test.log', 'us-east-1', [sink],
+                                          lambda_context, s3_client=s3_client)
+            sink.flush()
+
+        spans = self.get_spans()
+        record_span_id = spans['SQSRecord']['span_id']
+        self.assertEqual(spans['S3GetObject']['parent_span_id'], record_span_id)
+        self.assertEqual(spans['S3GetObject']['attributes']['aws.s3.content_length'], 14)
+        self.assertEqual(spans['ParseLogObject']['parent_span_id'], record_span_id)
+        self.assertEqual(spans['ParseLogObject']['attributes']['log.entries'], 2)
+        self.assertIn('stage.Parsing.ms', spans['ParseLogObject']['attributes'])
+
+        ingest_attributes = spans['DynatraceIngest']['attributes']
+        self.assertEqual(spans['DynatraceIngest']['parent_span_id'], record_span_id)
+        self.assertEqual(ingest_attributes['batch.records'], 2)
+        self.assertEqual(ingest_attributes['http.status_code'], 204)
+        self.assertGreater(ingest_attributes['batch.compressed_bytes'], 0)
+
+
+class TestTracingDisabled(unittest.TestCase):
+
+    def test_no_spans_are_recorded(self):
+        with patch.object(tracing, 'export_span') as export_span:
+            with tracing.span('parent') as span:
+                tracing.get_current_span().set_attribute('key', 'value')
+
+        self.assertIs(span, tracing.NOOP_SPAN)
+        export_span.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()